@@ -46,7 +46,7 @@ fi
 # Quick data check
 echo "🔍 Checking data..."
 TRACT_COUNT=$(psql -d extra_orbital -t -c "SELECT COUNT(*) FROM dev.tracts;" 2>/dev/null | xargs)
-SAT_COUNT=$(psql -d extra_orbital -t -c "SELECT COUNT(*) FROM dev.tle_snapshots WHERE position IS NOT NULL;" 2>/dev/null | xargs)
+SAT_COUNT=$(psql -d extra_orbital -t -c "SELECT COUNT(*) FROM dev.tle_latest;" 2>/dev/null | xargs)
 
 if [ "$TRACT_COUNT" -gt 0 ] && [ "$SAT_COUNT" -gt 0 ]; then
     echo "✅ Data ready: $TRACT_COUNT tracts, $SAT_COUNT satellites"
@@ -1,20 +1,67 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template
 from flask_cors import CORS
-import psycopg2
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+import threading
+from itertools import chain
+
+from columnar_feed import MIMETYPE as FEED_MIMETYPE, encode_satellite_feed
+from compression import compress_response
+from db_pool import pool_from_env
+from history_query import DEFAULT_TRACK_MINUTES, catalog_snapshot, parse_time, satellite_track
+from live_propagation import LivePropagator
+from refresh_listener import RefreshListener
+from response_cache import ResponseCache
+from satellite_query import SatelliteQuery, stream_satellites
+from satellite_stream import SatelliteBroadcaster, SubscriberLimit
+from tract_index import TractIndex
 
 app = Flask(__name__, template_folder='../frontend/templates', static_folder='../frontend/static')
 CORS(app)
+app.after_request(compress_response)
+
+db_pool = pool_from_env()
+tract_index = TractIndex(refresh_interval=float(os.getenv('TRACT_INDEX_REFRESH_SECONDS', '60')))
+response_cache = ResponseCache(ttl=float(os.getenv('RESPONSE_CACHE_TTL', '300')))
+live_propagator = LivePropagator(catalog_ttl=float(os.getenv('LIVE_CATALOG_TTL', '60')),
+                                 quantum=float(os.getenv('LIVE_POSITION_QUANTUM', '1')))
+# Each open stream holds a server thread here; async_app.py fans out without one
+satellite_broadcaster = SatelliteBroadcaster(threshold=float(os.getenv('STREAM_DELTA_THRESHOLD', '0.1')),
+                                             max_subscribers=int(os.getenv('STREAM_MAX_SUBSCRIBERS', '32')))
+
+def on_data_refresh(payload=None):
+    """Drop cached responses once the position pipeline has new data"""
+    response_cache.invalidate()
+    tract_index.invalidate()
+    live_propagator.invalidate()
+    if satellite_broadcaster.loaded:
+        # Push the moved satellites to /api/satellites/stream subscribers
+        satellite_broadcaster.refresh(get_db)
+
+refresh_listener = None
+_refresh_listener_lock = threading.Lock()
+
+@app.before_request
+def start_refresh_listener():
+    """Invalidate caches whenever the pipeline (or scheduler) sends NOTIFY orbital_refresh
+
+    Started once per process on its first request, so it runs under
+    `python3 app.py`, `flask run` and WSGI servers alike. The debug
+    reloader's parent process never serves requests and never listens.
+    """
+    global refresh_listener
+    if refresh_listener is not None:
+        return
+    with _refresh_listener_lock:
+        if refresh_listener is None:
+            listener = RefreshListener(db_pool.connect_kwargs)
+            listener.subscribe(on_data_refresh)
+            listener.start()
+            refresh_listener = listener
 
 def get_db():
-    """Get database connection"""
-    return psycopg2.connect(
-        host=os.getenv('DB_HOST', 'localhost'),
-        database=os.getenv('DB_NAME', 'extra_orbital'),
-        user=os.getenv('DB_USER', 'postgres'),
-        password=os.getenv('DB_PASSWORD', '')
-    )
+    """Check out a pooled database connection (use as a context manager)"""
+    return db_pool.connection()
 
 @app.route('/')
 def index():
@@ -22,59 +69,186 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/stats')
+@response_cache.cached()
 def get_stats():
     """Get system statistics"""
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        
-        # Total tracts
-        cur.execute("SELECT COUNT(*) FROM dev.tracts")
-        total_tracts = cur.fetchone()[0]
-        
-        # Active satellites
-        cur.execute("SELECT COUNT(*) FROM dev.tle_snapshots WHERE position IS NOT NULL")
-        active_satellites = cur.fetchone()[0]
-        
-        conn.close()
+        with get_db() as conn:
+            cur = conn.cursor()
+            
+            # Total tracts
+            cur.execute("SELECT COUNT(*) FROM dev.tracts")
+            total_tracts = cur.fetchone()[0]
+            
+            # Active satellites: one current snapshot each (dev.tle_latest)
+            cur.execute("SELECT COUNT(*) FROM dev.tle_latest")
+            active_satellites = cur.fetchone()[0]
+            
+            # Occupied tracts from the occupancy index (tract_occupancy.py)
+            cur.execute("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL")
+            if cur.fetchone()[0]:
+                cur.execute("SELECT COUNT(DISTINCT tract_id) FROM dev.tract_occupancy")
+                occupied_tracts = cur.fetchone()[0]
+            else:
+                # Not built yet: assume one satellite per tract
+                occupied_tracts = min(active_satellites, total_tracts)
         
         return jsonify({
             'total_tracts': total_tracts,
             'active_satellites': active_satellites,
-            'available_tracts': total_tracts - active_satellites,
+            'occupied_tracts': occupied_tracts,
+            'available_tracts': total_tracts - occupied_tracts,
             'last_updated': datetime.now().isoformat()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/satellites')
+@response_cache.cached()
 def get_satellites():
-    """Get live satellite data"""
+    """Get live satellite data
+    
+    Optional query parameters: limit/cursor (keyset pagination), fields,
+    bbox=min_lon,min_lat,max_lon,max_lat, min_altitude and max_altitude.
+    """
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT satellite_id, name, altitude, inclination, longitude, latitude 
-            FROM dev.tle_snapshots 
-            WHERE position IS NOT NULL 
-            ORDER BY name
-        """)
-        
-        satellites = []
-        for row in cur.fetchall():
-            satellites.append({
-                'satellite_id': row[0],
-                'name': row[1],
-                'altitude': round(row[2], 1),
-                'inclination': round(row[3], 1),
-                'longitude': round(row[4], 1),
-                'latitude': round(row[5], 1)
-            })
+        query = SatelliteQuery(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # Pull the first chunk eagerly so database errors still become a 500
+        stream = stream_satellites(get_db, query)
+        first = next(stream)
+        return Response(chain([first], stream), mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/satellites/columnar')
+@response_cache.cached()
+def get_satellites_columnar():
+    """Live satellite data as packed float32 columns (see columnar_feed.py)"""
+    try:
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT satellite_id, name, latitude, longitude, altitude, inclination
+                FROM dev.tle_latest 
+                ORDER BY name
+            """)
+            rows = cur.fetchall()
         
-        conn.close()
-        return jsonify(satellites)
+        return Response(encode_satellite_feed(rows), mimetype=FEED_MIMETYPE)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/satellites/stream')
+def stream_satellite_updates():
+    """Server-sent events: a snapshot on connect, then deltas after each refresh"""
+    try:
+        satellite_broadcaster.ensure_loaded(get_db)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    try:
+        subscriber = satellite_broadcaster.subscribe(request.headers.get('Last-Event-ID'))
+    except SubscriberLimit as e:
+        return jsonify({'error': str(e)}), 503
+    return Response(satellite_broadcaster.stream(subscriber), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/satellites/positions')
+def get_live_positions():
+    """Propagate the catalog to time t on request (see live_propagation.py)
+    
+    Optional query parameters: t (ISO 8601 or Unix seconds, default now) and
+    format=columnar for the binary feed layout.
+    """
+    try:
+        result = live_propagator.positions(get_db, parse_time(request.args.get('t')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if request.args.get('format') == 'columnar':
+        rows = list(zip(result['satellite_id'], result['name'], result['latitude'].tolist(),
+                        result['longitude'].tolist(), result['altitude'].tolist(),
+                        result['inclination'].tolist()))
+        response = Response(encode_satellite_feed(rows), mimetype=FEED_MIMETYPE)
+    else:
+        response = jsonify({
+            'epoch': result['epoch'].strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            'satellites': [{
+                'satellite_id': satellite_id,
+                'name': name,
+                'altitude': round(alt, 1),
+                'inclination': round(inc, 1),
+                'longitude': round(lon, 1),
+                'latitude': round(lat, 1)
+            } for satellite_id, name, lat, lon, alt, inc in zip(
+                result['satellite_id'], result['name'], result['latitude'].tolist(),
+                result['longitude'].tolist(), result['altitude'].tolist(),
+                result['inclination'].tolist())]
+        })
+    response.headers['X-Propagation-Epoch'] = result['epoch'].isoformat()
+    return response
+
+@app.route('/api/satellites/<satellite_id>/track')
+# Without `start` the window follows the clock, so it is never cached
+@response_cache.cached(unless=lambda: not request.args.get('start'))
+def get_satellite_track(satellite_id):
+    """Stored trajectory of one satellite (see database/position_history.py)
+    
+    Optional query parameters: start and end (ISO 8601 or Unix seconds);
+    defaults to the next 90 minutes.
+    """
+    try:
+        start = parse_time(request.args.get('start'))
+        if request.args.get('end'):
+            end = parse_time(request.args['end'])
+        else:
+            end = start + timedelta(minutes=DEFAULT_TRACK_MINUTES)
+        with get_db() as conn:
+            points = satellite_track(conn, satellite_id, start, end)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if not points:
+        return jsonify({'error': 'No stored history for this satellite and window'}), 404
+    
+    return jsonify({
+        'satellite_id': satellite_id,
+        'start': start.isoformat() + 'Z',
+        'end': end.isoformat() + 'Z',
+        'points': points
+    })
+
+@app.route('/api/satellites/snapshot')
+# Without `t` the snapshot is taken now, so it is never cached
+@response_cache.cached(ttl=60, unless=lambda: not request.args.get('t'))
+def get_satellite_snapshot():
+    """Catalog positions at time t (ISO 8601 or Unix seconds, default now) from stored history"""
+    try:
+        when = parse_time(request.args.get('t'))
+        with get_db() as conn:
+            epoch, satellites = catalog_snapshot(conn, when)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    if epoch is None:
+        return jsonify({'error': 'No stored history covers this time'}), 404
+    
+    return jsonify({
+        'epoch': epoch.isoformat() + 'Z',
+        'satellites': satellites
+    })
 
 @app.route('/api/tracts/available')
 def get_available_tracts():
@@ -83,32 +257,87 @@ def get_available_tracts():
     inclination = request.args.get('inclination', type=float)
     
     try:
-        conn = get_db()
-        cur = conn.cursor()
-        
-        # Find tracts matching criteria
-        cur.execute("""
-            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
-            FROM dev.tracts 
-            WHERE %s BETWEEN alt_min AND alt_max 
-            AND %s BETWEEN inc_min AND inc_max
-            LIMIT 10
-        """, (altitude, inclination))
-        
-        tracts = []
-        for row in cur.fetchall():
-            tracts.append({
-                'tract_id': row[0],
-                'altitude_range': f"{row[1]}-{row[2]}km",
-                'inclination_range': f"{row[3]}-{row[4]}°",
-                'raan_range': f"{row[5]}-{row[6]}°"
-            })
+        with get_db() as conn:
+            tract_index.ensure_fresh(conn)
+            
+            if tract_index.regular:
+                # Regular grid: pure bin arithmetic, occupied tracts skipped
+                rows = tract_index.lookup(altitude, inclination, limit=10)
+            else:
+                # Find unoccupied tracts matching criteria; the envelope test
+                # can use idx_tracts_bounds_envelope (database/schema.py)
+                cur = conn.cursor()
+                cur.execute("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL")
+                unoccupied = """
+                    AND NOT EXISTS (SELECT 1 FROM dev.tract_occupancy o WHERE o.tract_id = dev.tracts.tract_id)
+                """ if cur.fetchone()[0] else ""
+                cur.execute(f"""
+                    SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+                    FROM dev.tracts 
+                    WHERE ST_MakeEnvelope(alt_min, inc_min, alt_max, inc_max) && ST_MakePoint(%s, %s)
+                    AND %s BETWEEN alt_min AND alt_max 
+                    AND %s BETWEEN inc_min AND inc_max
+                    {unoccupied}
+                    LIMIT 10
+                """, (altitude, inclination, altitude, inclination))
+                rows = cur.fetchall()
+            
+            tracts = []
+            for row in rows:
+                tracts.append({
+                    'tract_id': row[0],
+                    'altitude_range': f"{row[1]}-{row[2]}km",
+                    'inclination_range': f"{row[3]}-{row[4]}°",
+                    'raan_range': f"{row[5]}-{row[6]}°"
+                })
         
-        conn.close()
         return jsonify(tracts)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tracts/<tract_id>/occupants')
+@response_cache.cached()
+def get_tract_occupants(tract_id):
+    """Satellites currently occupying a tract (indexed lookup on dev.tract_occupancy)"""
+    try:
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+                FROM dev.tracts WHERE tract_id = %s
+            """, (tract_id,))
+            tract = cur.fetchone()
+            
+            if not tract:
+                return jsonify({'error': 'Invalid tract ID'}), 404
+            
+            cur.execute("""
+                SELECT o.satellite_id, l.name, o.altitude, o.inclination, o.raan, o.updated_at
+                FROM dev.tract_occupancy o
+                LEFT JOIN dev.tle_latest l ON l.satellite_id::text = o.satellite_id
+                WHERE o.tract_id = %s
+                ORDER BY COALESCE(l.name, ''), o.satellite_id
+            """, (tract_id,))
+            rows = cur.fetchall()
+        
+        return jsonify({
+            'tract_id': tract[0],
+            'altitude_range': f"{tract[1]}-{tract[2]}km",
+            'inclination_range': f"{tract[3]}-{tract[4]}°",
+            'raan_range': f"{tract[5]}-{tract[6]}°",
+            'occupant_count': len(rows),
+            'occupants': [{
+                'satellite_id': row[0],
+                'name': row[1],
+                'altitude': round(row[2], 1),
+                'inclination': round(row[3], 1),
+                'raan': round(row[4], 1),
+                'updated_at': row[5].isoformat()
+            } for row in rows]
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/satellites/register', methods=['POST'])
 def register_satellite():
     """Register a new satellite in an orbital tract"""
@@ -121,16 +350,17 @@ def register_satellite():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        conn = get_db()
-        cur = conn.cursor()
+        with get_db() as conn:
+            cur = conn.cursor()
+            
+            # Verify tract exists and get details
+            cur.execute("""
+                SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+                FROM dev.tracts WHERE tract_id = %s
+            """, (data['tract_id'],))
+            
+            tract = cur.fetchone()
         
-        # Verify tract exists and get details
-        cur.execute("""
-            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
-            FROM dev.tracts WHERE tract_id = %s
-        """, (data['tract_id'],))
-        
-        tract = cur.fetchone()
         if not tract:
             return jsonify({'error': 'Invalid tract ID'}), 400
         
@@ -154,12 +384,69 @@ def register_satellite():
             }
         }
         
-        conn.close()
         return jsonify(registration)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def scheduler_metrics():
+    """Last-24h run summary per job from database/scheduler.py (None if it never ran)"""
+    with get_db() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('dev.scheduler_runs')")
+        if cur.fetchone()[0] is None:
+            return None
+        cur.execute("""
+            SELECT job,
+                   COUNT(*) FILTER (WHERE status = 'ok'),
+                   COUNT(*) FILTER (WHERE status = 'failed'),
+                   COUNT(*) FILTER (WHERE status = 'skipped'),
+                   MAX(started_at) FILTER (WHERE status = 'ok'),
+                   AVG(duration_seconds),
+                   MAX(duration_seconds)
+            FROM dev.scheduler_runs
+            WHERE started_at > timezone('utc', now()) - interval '24 hours'
+            GROUP BY job
+            ORDER BY job
+        """)
+        rows = cur.fetchall()
+        cur.execute("""
+            SELECT DISTINCT ON (job) job, duration_seconds
+            FROM dev.scheduler_runs
+            WHERE status <> 'skipped'
+            ORDER BY job, started_at DESC
+        """)
+        last = dict(cur.fetchall())
+
+    return {
+        job: {
+            'runs': ok,
+            'failures': failed,
+            'skipped': skipped,
+            'last_success': last_success.isoformat() + 'Z' if last_success else None,
+            'last_seconds': round(last[job], 3) if last.get(job) is not None else None,
+            'avg_seconds': round(avg, 3) if avg is not None else None,
+            'max_seconds': round(longest, 3) if longest is not None else None,
+        }
+        for job, ok, failed, skipped, last_success, avg, longest in rows
+    }
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Operational metrics for the API process"""
+    try:
+        scheduler = scheduler_metrics()
+    except Exception as e:
+        scheduler = {'error': str(e)}
+    return jsonify({
+        'db_pool': db_pool.stats(),
+        'tract_index': tract_index.stats(),
+        'response_cache': response_cache.stats(),
+        'live_propagation': live_propagator.stats(),
+        'satellite_stream': satellite_broadcaster.stats(),
+        'scheduler': scheduler
+    })
+
 if __name__ == '__main__':
     print("🛰️  Starting Extra Orbital Solutions Demo Server...")
     print("📡 Demo available at: http://localhost:3000")
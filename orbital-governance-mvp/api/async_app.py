@@ -0,0 +1,342 @@
+"""
+Async API Server (ASGI)
+
+Starlette + asyncpg serving mode for the core API endpoints:
+- GET /api/stats - the independent COUNT queries run concurrently, each on
+  its own pooled connection, so the response takes as long as the slowest
+  count instead of their sum
+- GET /api/satellites - same parameters and JSON as the Flask endpoint,
+  streamed from a server-side cursor
+- GET /api/tracts/available - regular-grid lookups use the shared
+  TractIndex (reloaded in a worker thread); other grids query PostgreSQL.
+  Either way occupied tracts are skipped
+- POST /api/satellites/register
+- GET /api/satellites/stream - the same server-sent events as the Flask
+  endpoint. Subscribers wait on asyncio queues rather than holding a thread
+  each, so one worker fans out to many clients; a RefreshListener thread
+  pushes the deltas after each NOTIFY orbital_refresh
+
+A slow query only suspends its own request, so one uvicorn worker keeps
+serving while it waits. Responses are not cached here (ResponseCache is
+Flask-specific); app.py remains the full-featured dashboard server.
+
+Usage:
+    cd api && python3 async_app.py
+    uvicorn async_app:app --app-dir api --port 3001 --workers 4
+"""
+
+import asyncio
+import json
+import os
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import asyncpg
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from db_pool import DatabasePool, connect_kwargs_from_env
+from refresh_listener import RefreshListener
+from satellite_query import STREAM_CHUNK_ROWS, SatelliteQuery, encode_cursor
+from satellite_stream import SatelliteBroadcaster, SubscriberLimit
+from tract_index import TractIndex
+
+ASYNC_API_PORT = int(os.getenv('ASYNC_API_PORT', '3001'))
+
+db_settings = connect_kwargs_from_env()
+tract_index = TractIndex(refresh_interval=float(os.getenv('TRACT_INDEX_REFRESH_SECONDS', '60')))
+# TractIndex and the stream broadcaster read through psycopg2, from worker
+# threads, and only need a connection when they reload
+sync_db_pool = DatabasePool(minconn=0, maxconn=2, **db_settings)
+satellite_broadcaster = SatelliteBroadcaster(
+    threshold=float(os.getenv('STREAM_DELTA_THRESHOLD', '0.1')),
+    max_subscribers=int(os.getenv('ASYNC_STREAM_MAX_SUBSCRIBERS', '1000')))
+db = None
+
+REQUIRED_REGISTRATION_FIELDS = ['satellite_name', 'operator', 'tract_id', 'mission_type']
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global db
+    db = await asyncpg.create_pool(
+        min_size=int(os.getenv('DB_POOL_MIN', '1')),
+        max_size=int(os.getenv('DB_POOL_MAX', '10')),
+        host=db_settings['host'],
+        database=db_settings['database'],
+        user=db_settings['user'],
+        password=db_settings['password'] or None,
+    )
+    listener = RefreshListener(db_settings)
+    listener.subscribe(on_data_refresh)
+    listener.start()
+    try:
+        yield
+    finally:
+        await db.close()
+        sync_db_pool.close()
+
+
+def on_data_refresh(payload=None):
+    """Runs in the RefreshListener thread after NOTIFY orbital_refresh"""
+    tract_index.invalidate()
+    if satellite_broadcaster.loaded:
+        satellite_broadcaster.refresh(sync_db_pool.connection)
+
+
+class QueryArgs:
+    """Werkzeug-style .get(name, type=...) over Starlette query parameters"""
+
+    def __init__(self, params):
+        self._params = params
+
+    def __getitem__(self, name):
+        return self._params[name]
+
+    def get(self, name, default=None, type=None):
+        value = self._params.get(name)
+        if value is None:
+            return default
+        if type is None:
+            return value
+        try:
+            return type(value)
+        except ValueError:
+            return default
+
+
+def to_asyncpg(sql):
+    """Rewrite psycopg2 %s placeholders as asyncpg $1, $2, ..."""
+    counter = iter(range(1, sql.count('%s') + 1))
+    return re.sub(r'%s', lambda _: f"${next(counter)}", sql)
+
+
+def error(message, status=500):
+    return JSONResponse({'error': message}, status_code=status)
+
+
+async def count_occupied_tracts(total_tracts_task, active_satellites_task):
+    async with db.acquire() as conn:
+        if await conn.fetchval("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL"):
+            return await conn.fetchval("SELECT COUNT(DISTINCT tract_id) FROM dev.tract_occupancy")
+    # Not built yet: assume one satellite per tract
+    return min(await active_satellites_task, await total_tracts_task)
+
+
+async def get_stats(request):
+    """Get system statistics"""
+    try:
+        total_tracts = asyncio.ensure_future(db.fetchval("SELECT COUNT(*) FROM dev.tracts"))
+        active_satellites = asyncio.ensure_future(
+            db.fetchval("SELECT COUNT(*) FROM dev.tle_latest"))
+        total, active, occupied = await asyncio.gather(
+            total_tracts, active_satellites, count_occupied_tracts(total_tracts, active_satellites))
+    except Exception as e:
+        return error(str(e))
+
+    return JSONResponse({
+        'total_tracts': total,
+        'active_satellites': active,
+        'occupied_tracts': occupied,
+        'available_tracts': total - occupied,
+        'last_updated': datetime.now().isoformat()
+    })
+
+
+async def stream_satellites(conn, query):
+    """Async mirror of satellite_query.stream_satellites"""
+    yield '{"satellites": [' if query.paginated else '['
+
+    emitted = 0
+    last_row = None
+    has_more = False
+    chunk = []
+    async with conn.transaction():
+        async for row in conn.cursor(to_asyncpg(query.sql()), *query.params, prefetch=STREAM_CHUNK_ROWS):
+            if query.paginated and emitted == query.limit:
+                has_more = True
+                break
+            chunk.append(json.dumps(query.row_to_dict(tuple(row))))
+            emitted += 1
+            last_row = row
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield (',' if emitted > len(chunk) else '') + ','.join(chunk)
+                chunk = []
+
+    if chunk:
+        yield (',' if emitted > len(chunk) else '') + ','.join(chunk)
+
+    if query.paginated:
+        next_cursor = encode_cursor(last_row[0], last_row[1]) if has_more else None
+        yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+    else:
+        yield ']'
+
+
+async def get_satellites(request):
+    """Get live satellite data (same parameters as the Flask endpoint)"""
+    try:
+        query = SatelliteQuery(QueryArgs(request.query_params))
+    except ValueError as e:
+        return error(str(e), 400)
+
+    try:
+        conn = await db.acquire()
+    except Exception as e:
+        return error(str(e))
+
+    async def body():
+        try:
+            async for chunk in stream_satellites(conn, query):
+                yield chunk
+        finally:
+            await db.release(conn)
+
+    # Pull the first chunk eagerly so database errors still become a 500
+    chunks = body()
+    try:
+        first = await chunks.__anext__()
+    except Exception as e:
+        await chunks.aclose()
+        return error(str(e))
+
+    async def resumed():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(resumed(), media_type='application/json')
+
+
+def refresh_tract_index():
+    with sync_db_pool.connection() as conn:
+        tract_index.ensure_fresh(conn)
+
+
+async def get_available_tracts(request):
+    """Find available orbital tracts"""
+    args = QueryArgs(request.query_params)
+    altitude = args.get('altitude', type=float)
+    inclination = args.get('inclination', type=float)
+
+    try:
+        if tract_index.needs_refresh:
+            await run_in_threadpool(refresh_tract_index)
+
+        if tract_index.regular:
+            # Regular grid: pure bin arithmetic, occupied tracts skipped
+            rows = tract_index.lookup(altitude, inclination, limit=10)
+        else:
+            # Same answer as the index path: occupied tracts are skipped
+            async with db.acquire() as conn:
+                occupancy = await conn.fetchval("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL")
+                unoccupied = """
+                    AND NOT EXISTS (SELECT 1 FROM dev.tract_occupancy o WHERE o.tract_id = dev.tracts.tract_id)
+                """ if occupancy else ""
+                rows = await conn.fetch(f"""
+                    SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+                    FROM dev.tracts
+                    WHERE ST_MakeEnvelope(alt_min, inc_min, alt_max, inc_max) && ST_MakePoint($1, $2)
+                    AND $1 BETWEEN alt_min AND alt_max
+                    AND $2 BETWEEN inc_min AND inc_max
+                    {unoccupied}
+                    LIMIT 10
+                """, altitude, inclination)
+    except Exception as e:
+        return error(str(e))
+
+    return JSONResponse([{
+        'tract_id': row[0],
+        'altitude_range': f"{row[1]}-{row[2]}km",
+        'inclination_range': f"{row[3]}-{row[4]}°",
+        'raan_range': f"{row[5]}-{row[6]}°"
+    } for row in rows])
+
+
+async def register_satellite(request):
+    """Register a new satellite in an orbital tract"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return error('Request body must be JSON', 400)
+    if not isinstance(data, dict):
+        return error('Request body must be a JSON object', 400)
+
+    for field in REQUIRED_REGISTRATION_FIELDS:
+        if field not in data:
+            return error(f'Missing required field: {field}', 400)
+
+    try:
+        tract = await db.fetchrow("""
+            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+            FROM dev.tracts WHERE tract_id = $1
+        """, data['tract_id'])
+    except Exception as e:
+        return error(str(e))
+
+    if not tract:
+        return error('Invalid tract ID', 400)
+
+    return JSONResponse({
+        'registration_id': f"REG-{data['tract_id']}-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+        'satellite_name': data['satellite_name'],
+        'operator': data['operator'],
+        'tract_id': data['tract_id'],
+        'mission_type': data['mission_type'],
+        'status': 'APPROVED',
+        'registered_at': datetime.now().isoformat(),
+        'tract_details': {
+            'altitude_range': f"{tract[1]}-{tract[2]}km",
+            'inclination_range': f"{tract[3]}-{tract[4]}°",
+            'raan_range': f"{tract[5]}-{tract[6]}°"
+        }
+    })
+
+
+async def stream_satellite_updates(request):
+    """Server-sent events: a snapshot on connect, then deltas after each refresh"""
+    try:
+        await run_in_threadpool(satellite_broadcaster.ensure_loaded, sync_db_pool.connection)
+        subscriber = satellite_broadcaster.subscribe_async(request.headers.get('last-event-id'))
+    except SubscriberLimit as e:
+        return error(str(e), 503)
+    except Exception as e:
+        return error(str(e))
+
+    return StreamingResponse(satellite_broadcaster.stream_async(subscriber), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def get_metrics(request):
+    """Pool and tract index metrics for this worker"""
+    return JSONResponse({
+        'db_pool': {
+            'min_size': db.get_min_size(),
+            'max_size': db.get_max_size(),
+            'size': db.get_size(),
+            'idle': db.get_idle_size(),
+        },
+        'tract_index': tract_index.stats(),
+        'satellite_stream': satellite_broadcaster.stats(),
+    })
+
+
+app = Starlette(routes=[
+    Route('/api/stats', get_stats),
+    Route('/api/satellites', get_satellites),
+    Route('/api/satellites/stream', stream_satellite_updates),
+    Route('/api/tracts/available', get_available_tracts),
+    Route('/api/satellites/register', register_satellite, methods=['POST']),
+    Route('/api/metrics', get_metrics),
+], lifespan=lifespan)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🛰️  Starting Extra Orbital Solutions async API server...")
+    print(f"📡 API available at: http://localhost:{ASYNC_API_PORT}")
+    uvicorn.run(app, host='0.0.0.0', port=ASYNC_API_PORT)
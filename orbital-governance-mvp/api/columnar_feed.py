@@ -0,0 +1,65 @@
+"""
+Binary Columnar Satellite Feed
+
+Packs satellite positions into float32 columns so visualization clients can
+wrap the payload in Float32Array views without parsing any JSON per row.
+
+Layout (all integers little-endian):
+
+    offset        size   contents
+    0             4      magic b'OGSF'
+    4             2      uint16 format version (1)
+    6             2      uint16 column count (4)
+    8             4      uint32 satellite count N
+    12            4      uint32 dictionary length D in bytes
+    16            4*N    float32 latitude   (degrees)
+    16 + 4N       4*N    float32 longitude  (degrees)
+    16 + 8N       4*N    float32 altitude   (km)
+    16 + 12N      4*N    float32 inclination (degrees)
+    16 + 16N      D      UTF-8 JSON {"satellite_id": [...], "name": [...]}
+
+Every column starts on a 4-byte boundary, so `new Float32Array(buffer,
+16 + 4 * N * k, N)` is a zero-copy view of column k.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'OGSF'
+VERSION = 1
+COLUMNS = ['latitude', 'longitude', 'altitude', 'inclination']
+HEADER = struct.Struct('<4sHHII')
+MIMETYPE = 'application/vnd.orbital.satellite-feed'
+
+
+def encode_satellite_feed(rows):
+    """Encode (satellite_id, name, latitude, longitude, altitude, inclination) rows"""
+    count = len(rows)
+    ids = [row[0] for row in rows]
+    names = [row[1] for row in rows]
+
+    values = np.array([row[2:6] for row in rows], dtype='<f4').reshape(count, len(COLUMNS))
+    dictionary = json.dumps({'satellite_id': ids, 'name': names},
+                            separators=(',', ':')).encode('utf-8')
+
+    header = HEADER.pack(MAGIC, VERSION, len(COLUMNS), count, len(dictionary))
+    # Transposing gives one contiguous block per column
+    return header + np.ascontiguousarray(values.T).tobytes() + dictionary
+
+
+def decode_satellite_feed(payload):
+    """Decode a feed back into column arrays (used by tests and benchmarks)"""
+    magic, version, n_columns, count, dict_len = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version 1 satellite feed")
+
+    offset = HEADER.size
+    columns = {}
+    for name in COLUMNS[:n_columns]:
+        columns[name] = np.frombuffer(payload, dtype='<f4', count=count, offset=offset)
+        offset += 4 * count
+
+    columns.update(json.loads(payload[offset:offset + dict_len]))
+    return columns
@@ -0,0 +1,103 @@
+"""
+Response Compression
+
+gzip (and brotli, when the optional `brotli` package is installed)
+compression for JSON and text responses, applied in an after_request hook.
+Streamed responses are compressed chunk by chunk so they keep streaming.
+Responses that already carry a Content-Encoding are left alone, so
+ResponseCache can serve its stored compressed bodies without re-encoding.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+from columnar_feed import MIMETYPE as FEED_MIMETYPE
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript',
+    FEED_MIMETYPE,
+}
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Suffixes appended to strong ETags so each encoding has a distinct validator
+ETAG_SUFFIXES = {'gzip': '-gzip', 'br': '-br'}
+
+
+def choose_encoding():
+    """Pick the best encoding the client accepts, or None"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compressible(mimetype, size):
+    return mimetype in COMPRESSIBLE_MIMETYPES and size >= MIN_SIZE
+
+
+def compress_body(body, encoding):
+    """Encode a complete body with `encoding` ('br' or 'gzip')"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL)
+
+
+def _compress_stream(chunks, encoding):
+    # Both encoders flush after every chunk, so each chunk reaches the client
+    # as soon as it is produced
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(_to_bytes(chunk)) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        # wbits=31 produces a gzip container rather than a raw zlib stream
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(_to_bytes(chunk))
+            if data:
+                yield data
+            yield compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+def _to_bytes(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def compress_response(response):
+    """after_request hook: compress eligible responses in place"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_SIZE:
+            return response
+        response.set_data(compress_body(body, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+    return response
@@ -0,0 +1,189 @@
+"""
+Pooled PostgreSQL Connections for the API
+
+Wraps psycopg2's ThreadedConnectionPool with:
+- Configurable min/max size (DB_POOL_MIN / DB_POOL_MAX)
+- Blocking checkout with a timeout instead of failing when the pool is busy
+- Health checks for connections that have been idle for a while
+- A context manager that always returns the connection, even on errors
+- Counters exposed through the API metrics endpoint
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class DatabasePool:
+    """Thread-safe pool of PostgreSQL connections"""
+
+    def __init__(self, minconn, maxconn, timeout=5.0, health_check_after=30.0, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.connect_kwargs = connect_kwargs
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self._counters = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'health_checks': 0,
+            'health_check_failures': 0,
+            'discarded': 0,
+            'errors': 0,
+        }
+        self._in_use = 0
+        self._wait_seconds = 0.0
+
+    def _get_pool(self):
+        # Created lazily so the API can start before PostgreSQL is reachable
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = pool.ThreadedConnectionPool(
+                        self.minconn, self.maxconn, **self.connect_kwargs
+                    )
+        return self._pool
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _healthy(self, conn):
+        """Check a connection before handing it out"""
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_after:
+            return True
+
+        self._count('health_checks')
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            self._count('health_check_failures')
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._count('discarded')
+        try:
+            self._get_pool().putconn(conn, close=True)
+        except pool.PoolError:
+            pass
+
+    def _checkout(self):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise PoolTimeout(f"No database connection available within {self.timeout}s")
+
+        try:
+            pg_pool = self._get_pool()
+            # Retries cover connections that went stale while idle
+            for _ in range(3):
+                conn = pg_pool.getconn()
+                if self._healthy(conn):
+                    break
+                self._discard(conn)
+            else:
+                raise psycopg2.OperationalError("Could not obtain a healthy database connection")
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._counters['checkouts'] += 1
+            self._in_use += 1
+            self._wait_seconds += time.monotonic() - started
+        return conn
+
+    def _checkin(self, conn, broken=False):
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+                return
+
+            # Never hand the next request a connection left mid-transaction
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+
+            self._last_used[id(conn)] = time.monotonic()
+            self._get_pool().putconn(conn)
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection and always give it back to the pool"""
+        conn = self._checkout()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            self._count('errors')
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not broken and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._checkin(conn, broken)
+
+    def stats(self):
+        """Snapshot of pool size and usage counters"""
+        with self._lock:
+            idle = len(self._pool._pool) if self._pool is not None else 0
+            checkouts = self._counters['checkouts']
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'in_use': self._in_use,
+                'idle': idle,
+                'avg_wait_ms': round(self._wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+                **self._counters,
+            }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+
+
+def connect_kwargs_from_env():
+    """PostgreSQL connection settings from the DB_* environment variables"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'extra_orbital'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+    }
+
+
+def pool_from_env():
+    """Build the API pool from the DB_* environment variables"""
+    return DatabasePool(
+        minconn=int(os.getenv('DB_POOL_MIN', '1')),
+        maxconn=int(os.getenv('DB_POOL_MAX', '10')),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_SECONDS', '30')),
+        **connect_kwargs_from_env()
+    )
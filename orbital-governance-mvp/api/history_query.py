@@ -0,0 +1,128 @@
+"""
+Position History Queries
+
+Reads the hourly packed trajectories written by database/position_history.py:
+each dev.position_history row holds one satellite-hour of float32
+(latitude, longitude, altitude) samples. Tracks unpack whole rows; a
+catalog snapshot at time T slices out a single sample per satellite in SQL.
+No propagation happens here.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+SAMPLE_DTYPE = np.dtype('<f4')
+SAMPLE_WIDTH = 3
+SAMPLE_BYTES = SAMPLE_DTYPE.itemsize * SAMPLE_WIDTH
+
+MAX_TRACK_HOURS = 24
+DEFAULT_TRACK_MINUTES = 90
+
+
+def parse_time(value, default=None):
+    """Parse an ISO 8601 timestamp or Unix seconds into a naive UTC datetime"""
+    if value is None or value == '':
+        when = default or datetime.now(timezone.utc)
+    else:
+        try:
+            try:
+                when = datetime.fromtimestamp(float(value), timezone.utc)
+            except ValueError:
+                when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (ValueError, OverflowError, OSError):
+            raise ValueError(f"Invalid time: {value}")
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when
+
+
+def decode_samples(blob):
+    """(n, 3) array of latitude, longitude, altitude"""
+    return np.frombuffer(bytes(blob), dtype=SAMPLE_DTYPE).reshape(-1, SAMPLE_WIDTH)
+
+
+def _sample(value):
+    return None if not np.isfinite(value) else round(float(value), 3)
+
+
+def satellite_track(conn, satellite_id, start, end):
+    """Stored samples for one satellite between start and end (naive UTC)"""
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > timedelta(hours=MAX_TRACK_HOURS):
+        raise ValueError(f"Track window is limited to {MAX_TRACK_HOURS} hours")
+
+    cur = conn.cursor()
+    # Partition pruning on hour_start keeps this to one or two daily partitions
+    cur.execute("""
+        SELECT hour_start, step_seconds, samples
+        FROM dev.position_history
+        WHERE satellite_id = %s
+        AND hour_start >= date_trunc('hour', %s::timestamp) AND hour_start < %s
+        ORDER BY hour_start
+    """, (satellite_id, start, end))
+
+    points = []
+    for hour_start, step_seconds, blob in cur.fetchall():
+        for k, (lat, lon, alt) in enumerate(decode_samples(blob)):
+            when = hour_start + timedelta(seconds=k * step_seconds)
+            if start <= when <= end:
+                points.append({
+                    't': when.isoformat() + 'Z',
+                    'latitude': _sample(lat),
+                    'longitude': _sample(lon),
+                    'altitude': _sample(alt),
+                })
+    return points
+
+
+def catalog_snapshot(conn, when):
+    """Every satellite's stored position at the sample nearest `when`
+
+    Returns (sample epoch, list of satellite dicts). Only the 12 bytes of
+    the chosen sample are read back per satellite.
+    """
+    hour_start = when.replace(minute=0, second=0, microsecond=0)
+    offset = (when - hour_start).total_seconds()
+
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT step_seconds FROM dev.position_history WHERE hour_start = %s LIMIT 1
+    """, (hour_start,))
+    row = cur.fetchone()
+    if row is None:
+        return None, []
+
+    step_seconds = row[0]
+    index = int(round(offset / step_seconds))
+    if index * step_seconds >= 3600:
+        # Nearest sample is the first one of the next hour
+        hour_start += timedelta(hours=1)
+        index = 0
+
+    # Names come from the current view by satellite_id: the archived
+    # snapshot a row was propagated from may since have been downsampled
+    cur.execute("""
+        SELECT h.satellite_id, l.name, substring(h.samples FROM %s FOR %s)
+        FROM dev.position_history h
+        LEFT JOIN dev.tle_latest l ON l.satellite_id::text = h.satellite_id
+        WHERE h.hour_start = %s AND h.sample_count > %s
+        ORDER BY COALESCE(l.name, ''), h.satellite_id
+    """, (index * SAMPLE_BYTES + 1, SAMPLE_BYTES, hour_start, index))
+    rows = cur.fetchall()
+
+    samples = decode_samples(b''.join(bytes(row[2]) for row in rows)) if rows else np.empty((0, 3))
+    satellites = []
+    for (satellite_id, name, _), (lat, lon, alt) in zip(rows, samples):
+        if not np.isfinite(alt):
+            continue
+        satellites.append({
+            'satellite_id': satellite_id,
+            'name': name,
+            'latitude': round(float(lat), 1),
+            'longitude': round(float(lon), 1),
+            'altitude': round(float(alt), 1),
+        })
+
+    return hour_start + timedelta(seconds=index * step_seconds), satellites
@@ -0,0 +1,198 @@
+"""
+On-Demand Catalog Propagation
+
+Propagates the whole catalog to an arbitrary time for
+/api/satellites/positions, reusing the batch SGP4 engine from
+database/propagation.py. Three caches keep this affordable under load:
+
+- SatrecCache (propagation.py): parsed Satrec objects keyed by the TLE
+  content hash, LRU-bounded with a TTL, so unchanged TLEs are never parsed
+  twice.
+- The catalog (ids, names, SatrecArray) is reloaded at most every
+  catalog_ttl seconds, or when the position pipeline signals a refresh.
+- Computed positions are kept briefly per quantized timestamp, and
+  concurrent requests for the same quantum share one propagation
+  (single flight): the first caller computes, the others wait for it.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sgp4.api import SatrecArray
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from propagation import SatrecCache, epoch_arrays, teme_to_geodetic  # noqa: E402
+
+# Requests further than this from now are rejected (SGP4 accuracy degrades quickly)
+MAX_OFFSET_DAYS = 30
+
+
+class _Catalog:
+    def __init__(self, satellite_ids, names, inclinations, satrec_array, loaded_at):
+        self.satellite_ids = satellite_ids
+        self.names = names
+        self.inclinations = inclinations
+        self.satrec_array = satrec_array
+        self.loaded_at = loaded_at
+
+
+class _Flight:
+    """One in-progress propagation that other requests can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LivePropagator:
+    """Propagate the latest TLE of every satellite to a requested time"""
+
+    def __init__(self, catalog_ttl=60.0, quantum=1.0, position_ttl=10.0, max_positions=32,
+                 satrec_cache=None):
+        self.catalog_ttl = catalog_ttl
+        self.quantum = quantum
+        self.position_ttl = position_ttl
+        self.max_positions = max_positions
+        self.satrecs = satrec_cache or SatrecCache()
+
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+        self._positions = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'propagations': 0, 'position_hits': 0, 'shared_flights': 0}
+        self._last_elapsed = None
+
+    def invalidate(self):
+        """Drop the catalog and computed positions (called on refresh notifications)"""
+        with self._catalog_lock:
+            self._catalog = None
+        with self._lock:
+            self._positions.clear()
+
+    def quantize(self, when):
+        """Round a naive UTC datetime down to the position cache quantum"""
+        seconds = when.replace(tzinfo=timezone.utc).timestamp()
+        return round(seconds - seconds % self.quantum, 6)
+
+    def positions(self, get_db, when):
+        """Positions of the whole catalog at `when` (naive UTC datetime)
+
+        Returns a dict of arrays plus the quantized epoch. Raises ValueError
+        for times outside the supported window.
+        """
+        if abs(when - datetime.now(timezone.utc).replace(tzinfo=None)) > timedelta(days=MAX_OFFSET_DAYS):
+            raise ValueError(f"t must be within {MAX_OFFSET_DAYS} days of now")
+
+        key = self.quantize(when)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._positions.get(key)
+            if cached is not None and cached[1] > now:
+                self._positions.move_to_end(key)
+                self._counters['position_hits'] += 1
+                return cached[0]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._counters['shared_flights'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._propagate(get_db, key)
+            with self._lock:
+                self._positions[key] = (flight.result, time.monotonic() + self.position_ttl)
+                while len(self._positions) > self.max_positions:
+                    self._positions.popitem(last=False)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _load_catalog(self, get_db):
+        with self._catalog_lock:
+            catalog = self._catalog
+            if catalog is not None and time.monotonic() - catalog.loaded_at < self.catalog_ttl:
+                return catalog
+
+            with get_db() as conn:
+                cur = conn.cursor()
+                cur.execute("""
+                    SELECT satellite_id, name, tle_line1, tle_line2
+                    FROM dev.tle_latest
+                """)
+                rows = cur.fetchall()
+
+            satellite_ids, names, satrecs = [], [], []
+            for satellite_id, name, line1, line2 in rows:
+                try:
+                    satrecs.append(self.satrecs.get(line1, line2))
+                except Exception:
+                    continue
+                satellite_ids.append(satellite_id)
+                names.append(name)
+
+            inclinations = np.degrees(np.fromiter((s.inclo for s in satrecs), dtype=float, count=len(satrecs)))
+            self._catalog = _Catalog(satellite_ids, names, inclinations,
+                                     SatrecArray(satrecs) if satrecs else None, time.monotonic())
+            return self._catalog
+
+    def _propagate(self, get_db, key):
+        catalog = self._load_catalog(get_db)
+        epoch = datetime.fromtimestamp(key, timezone.utc)
+        started = time.perf_counter()
+
+        if catalog.satrec_array is None:
+            empty = np.empty(0)
+            lat = lon = alt = empty
+            ok = np.empty(0, dtype=bool)
+        else:
+            jd, fr, jd_ut1, fraction_ut1 = epoch_arrays(epoch)
+            errors, r, _ = catalog.satrec_array.sgp4(jd, fr)
+            lat, lon, alt = (a[:, 0] for a in teme_to_geodetic(r, jd_ut1, fraction_ut1))
+            ok = (errors[:, 0] == 0) & np.isfinite(alt)
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counters['propagations'] += 1
+            self._last_elapsed = elapsed
+
+        return {
+            'epoch': epoch,
+            'satellite_id': [s for s, good in zip(catalog.satellite_ids, ok) if good],
+            'name': [n for n, good in zip(catalog.names, ok) if good],
+            'latitude': lat[ok],
+            'longitude': lon[ok],
+            'altitude': alt[ok],
+            'inclination': catalog.inclinations[ok],
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['cached_positions'] = len(self._positions)
+            stats['last_propagation_ms'] = (round(self._last_elapsed * 1000, 1)
+                                            if self._last_elapsed is not None else None)
+        catalog = self._catalog
+        stats['catalog_size'] = len(catalog.satellite_ids) if catalog is not None else None
+        stats['satrec_cache'] = self.satrecs.stats()
+        return stats
@@ -0,0 +1,68 @@
+"""
+Refresh Notification Listener
+
+The position pipeline runs in a separate process and announces finished
+refreshes with `NOTIFY orbital_refresh`. This module keeps one dedicated
+LISTEN connection open in a daemon thread and calls the registered
+callbacks (cache invalidation, index refresh, ...) for every notification.
+"""
+
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+REFRESH_CHANNEL = 'orbital_refresh'
+
+
+class RefreshListener(threading.Thread):
+    """Daemon thread that turns pg_notify messages into callbacks"""
+
+    def __init__(self, connect_kwargs, channel=REFRESH_CHANNEL, poll_timeout=5.0):
+        super().__init__(name='refresh-listener', daemon=True)
+        self.connect_kwargs = connect_kwargs
+        self.channel = channel
+        self.poll_timeout = poll_timeout
+        self.callbacks = []
+        self.notifications = 0
+
+    def subscribe(self, callback):
+        """Register callback(payload) to run on every refresh notification"""
+        self.callbacks.append(callback)
+
+    def _listen(self):
+        conn = psycopg2.connect(**self.connect_kwargs)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        conn.cursor().execute(f"LISTEN {self.channel}")
+        print(f"📻 Listening for '{self.channel}' refresh notifications")
+
+        try:
+            while True:
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self.notifications += 1
+                    for callback in self.callbacks:
+                        try:
+                            callback(notify.payload)
+                        except Exception as e:
+                            print(f"⚠️  Refresh callback failed: {e}")
+        finally:
+            conn.close()
+
+    def run(self):
+        backoff = 1.0
+        while True:
+            started = time.monotonic()
+            try:
+                self._listen()
+            except psycopg2.Error as e:
+                if time.monotonic() - started > 60:
+                    backoff = 1.0
+                print(f"⚠️  Refresh listener disconnected ({e}); retrying in {backoff:.0f}s")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
@@ -0,0 +1,161 @@
+"""
+Response Cache with TTL and ETags
+
+Caches encoded response bodies per (endpoint, query args). Each entry gets a
+strong ETag so clients that send a matching If-None-Match receive an empty
+304 instead of the full payload. Compressed variants are built once per
+Content-Encoding and kept with the entry, so cache hits are served without
+re-compressing. Entries expire after a TTL and the whole
+cache is dropped explicitly when the position pipeline signals a refresh.
+"""
+
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from compression import ETAG_SUFFIXES, choose_encoding, compress_body, compressible
+
+
+class CacheEntry:
+    def __init__(self, body, mimetype, expires_at):
+        self.body = body
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        """The body compressed with `encoding`, built on first use"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            # A concurrent first use compresses twice; both results are identical
+            body = self._encoded[encoding] = compress_body(self.body, encoding)
+        return body
+
+
+class ResponseCache:
+    """In-process cache of successful GET responses"""
+
+    def __init__(self, ttl=300.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'not_modified': 0,
+            'invalidations': 0,
+        }
+
+    @staticmethod
+    def make_key():
+        return (request.endpoint,
+                tuple(sorted((request.view_args or {}).items())),
+                tuple(sorted(request.args.items(multi=True))))
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def put(self, key, body, mimetype, generation, ttl=None):
+        """Store a body unless the cache was invalidated while it was built"""
+        entry = CacheEntry(body, mimetype, time.monotonic() + (ttl or self.ttl))
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._counters['invalidations'] += 1
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def respond(self, entry, status):
+        """Build a 200 or 304 response for a cache entry, compressed when accepted"""
+        encoding = choose_encoding() if compressible(entry.mimetype, len(entry.body)) else None
+        etag = entry.etag + ETAG_SUFFIXES[encoding] if encoding else entry.etag
+        validators = [entry.etag] + [entry.etag + suffix for suffix in ETAG_SUFFIXES.values()]
+        if any(request.if_none_match.contains(tag) for tag in validators):
+            self._count('not_modified')
+            response = Response(status=304)
+        else:
+            response = Response(entry.encoded(encoding) if encoding else entry.body, mimetype=entry.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Cache'] = status
+        return response
+
+    def cached(self, ttl=None, unless=None):
+        """Decorator caching a view's successful responses
+
+        When `unless()` returns true the view is called directly, bypassing
+        the cache (e.g. for windows relative to "now").
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if unless is not None and unless():
+                    return view(*args, **kwargs)
+                key = self.make_key()
+                entry = self.get(key)
+                if entry is not None:
+                    self._count('hits')
+                    return self.respond(entry, 'HIT')
+
+                self._count('misses')
+                generation = self.generation
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+                if response.is_streamed:
+                    # Keep streaming to this client; cache once the body completes
+                    response.response = self._tee(response.response, key, response.mimetype, generation, ttl)
+                    response.headers['X-Cache'] = 'MISS'
+                    return response
+
+                entry = self.put(key, response.get_data(), response.mimetype, generation, ttl)
+                return self.respond(entry, 'MISS')
+            return wrapper
+        return decorator
+
+    def _tee(self, chunks, key, mimetype, generation, ttl):
+        parts = []
+        complete = False
+        try:
+            for chunk in chunks:
+                parts.append(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                yield chunk
+            complete = True
+        finally:
+            # A body cut short by an error or a client disconnect is never cached
+            if complete:
+                self.put(key, b''.join(parts), mimetype, generation, ttl)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl,
+                **self._counters,
+            }
@@ -0,0 +1,167 @@
+"""
+Satellite Query Builder
+
+Turns /api/satellites query parameters into a keyset-paginated SQL query:
+- `limit` / `cursor`: keyset pagination on (name, snapshot id)
+- `fields`: projection over the public satellite fields
+- `bbox=min_lon,min_lat,max_lon,max_lat`: bounding box on the PostGIS position
+- `min_altitude` / `max_altitude`: altitude range in kilometers
+
+Rows come from dev.tle_latest (one current snapshot per satellite) through a
+server-side cursor and are encoded as they arrive, so even the full catalog
+is never materialized as one Python list.
+"""
+
+import base64
+import json
+
+SATELLITE_FIELDS = ['satellite_id', 'name', 'altitude', 'inclination', 'longitude', 'latitude']
+ROUNDED_FIELDS = {'altitude', 'inclination', 'longitude', 'latitude'}
+
+MAX_PAGE_SIZE = 5000
+STREAM_CHUNK_ROWS = 500
+
+
+def encode_cursor(sort_name, snapshot_id):
+    raw = json.dumps([sort_name, snapshot_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_name, snapshot_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(sort_name), int(snapshot_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _float_list(value, count, name):
+    try:
+        numbers = [float(v) for v in value.split(',')]
+    except ValueError:
+        raise ValueError(f"{name} must be {count} comma-separated numbers")
+    if len(numbers) != count:
+        raise ValueError(f"{name} must be {count} comma-separated numbers")
+    return numbers
+
+
+class SatelliteQuery:
+    """Validated /api/satellites request"""
+
+    def __init__(self, args):
+        fields = args.get('fields')
+        if fields:
+            self.fields = [f.strip() for f in fields.split(',') if f.strip()]
+            unknown = [f for f in self.fields if f not in SATELLITE_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+        else:
+            self.fields = list(SATELLITE_FIELDS)
+
+        self.limit = args.get('limit', type=int)
+        if args.get('limit') is not None and self.limit is None:
+            raise ValueError("limit must be an integer")
+        if self.limit is not None and not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+        self.cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+        if self.cursor is not None and self.limit is None:
+            raise ValueError("cursor requires limit")
+
+        self.conditions = ["position IS NOT NULL"]
+        self.params = []
+
+        if args.get('bbox'):
+            min_lon, min_lat, max_lon, max_lat = _float_list(args['bbox'], 4, 'bbox')
+            self.conditions.append("position && ST_MakeEnvelope(%s, %s, %s, %s, 4326)")
+            self.params += [min_lon, min_lat, max_lon, max_lat]
+
+        for arg, op in (('min_altitude', '>='), ('max_altitude', '<=')):
+            if args.get(arg) is not None:
+                value = args.get(arg, type=float)
+                if value is None:
+                    raise ValueError(f"{arg} must be a number")
+                self.conditions.append(f"altitude {op} %s")
+                self.params.append(value)
+
+        if self.cursor is not None:
+            self.conditions.append("(COALESCE(name, ''), id) > (%s, %s)")
+            self.params += list(self.cursor)
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+    def sql(self):
+        columns = ', '.join(self.fields)
+        sql = f"""
+            SELECT COALESCE(name, '') AS sort_name, id, {columns}
+            FROM dev.tle_latest
+            WHERE {' AND '.join(self.conditions)}
+            ORDER BY COALESCE(name, ''), id
+        """
+        if self.paginated:
+            # One extra row tells us whether another page exists
+            sql += f" LIMIT {self.limit + 1}"
+        return sql
+
+    def row_to_dict(self, row):
+        item = {}
+        for field, value in zip(self.fields, row[2:]):
+            if field in ROUNDED_FIELDS and value is not None:
+                value = round(value, 1)
+            item[field] = value
+        return item
+
+
+def stream_satellites(get_db, query):
+    """Yield a JSON document for `query` chunk by chunk
+
+    Unpaginated requests produce the plain array the dashboard expects;
+    paginated requests produce {"satellites": [...], "next_cursor": ...}.
+    A database error after the first chunk is logged and re-raised without
+    closing the JSON, so the server aborts the response and the client never
+    sees a body that looks complete.
+    """
+    try:
+        yield from _stream_satellites(get_db, query)
+    except Exception as e:
+        print(f"❌ /api/satellites stream aborted: {e}")
+        raise
+
+
+def _stream_satellites(get_db, query):
+    with get_db() as conn:
+        # Named cursor = server-side cursor: rows arrive in batches of itersize
+        cur = conn.cursor(name='satellite_stream')
+        cur.itersize = STREAM_CHUNK_ROWS
+        cur.execute(query.sql(), query.params)
+
+        yield '{"satellites": [' if query.paginated else '['
+
+        emitted = 0
+        last_row = None
+        has_more = False
+        chunk = []
+        for row in cur:
+            if query.paginated and emitted == query.limit:
+                has_more = True
+                break
+            chunk.append(json.dumps(query.row_to_dict(row)))
+            emitted += 1
+            last_row = row
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield (',' if emitted > len(chunk) else '') + ','.join(chunk)
+                chunk = []
+
+        if chunk:
+            yield (',' if emitted > len(chunk) else '') + ','.join(chunk)
+
+        cur.close()
+
+    if query.paginated:
+        next_cursor = encode_cursor(last_row[0], last_row[1]) if has_more else None
+        yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
+    else:
+        yield ']'
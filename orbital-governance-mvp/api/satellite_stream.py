@@ -0,0 +1,298 @@
+"""
+Live Satellite Push (Server-Sent Events)
+
+Backs GET /api/satellites/stream in both serving modes. Each subscriber
+receives:
+- `snapshot`: the latest positioned snapshot of every satellite, sent once
+  on connect
+- `delta`: after every pipeline refresh (NOTIFY orbital_refresh), only the
+  satellites that moved more than `threshold` (degrees of latitude or
+  longitude, or km of altitude), plus the ids that disappeared
+
+Messages are encoded once per version and the same bytes object is queued
+for every subscriber, so fan-out costs a queue put per client rather than a
+JSON encode. Satellites are rows of STREAM_FIELDS rather than objects to
+keep deltas compact. A subscriber whose queue fills up (a stalled client) is
+disconnected; the EventSource reconnects and resyncs from a fresh snapshot.
+
+Under the sync Flask server every open stream holds a worker thread for as
+long as the client stays connected, so `max_subscribers` caps them and
+further clients are refused (the dashboard falls back to polling). The
+Starlette app (async_app.py) streams from asyncio queues instead, with no
+thread per subscriber, and is the mode for large fan-out.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+STREAM_FIELDS = ['satellite_id', 'name', 'latitude', 'longitude', 'altitude', 'inclination']
+
+KEEPALIVE_SECONDS = 15.0
+SUBSCRIBER_QUEUE_SIZE = 16
+
+_CLOSED = object()
+
+
+class SubscriberLimit(Exception):
+    """Raised when a broadcaster already has `max_subscribers` streams open"""
+
+
+class _QueueSubscriber(queue.Queue):
+    """Subscriber drained by a server thread (Flask)"""
+
+    def close(self):
+        # Make room for the close marker so the stream ends promptly
+        try:
+            while True:
+                self.get_nowait()
+        except queue.Empty:
+            pass
+        self.put_nowait(_CLOSED)
+
+
+class _AsyncSubscriber:
+    """Subscriber drained by a coroutine on `loop` (Starlette)
+
+    Messages are handed over with call_soon_threadsafe, since refreshes run
+    in the refresh listener's thread.
+    """
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self.maxsize = maxsize
+
+    def put_nowait(self, message):
+        # qsize lags puts that are still scheduled; the bound is approximate
+        if self._queue.qsize() >= self.maxsize:
+            raise queue.Full
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+        except RuntimeError:  # event loop already closed
+            raise queue.Full
+
+    def close(self):
+        try:
+            self._loop.call_soon_threadsafe(self._close)
+        except RuntimeError:
+            pass
+
+    def _close(self):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+def encode_event(event, event_id, payload):
+    """One SSE message as bytes"""
+    data = json.dumps(payload, separators=(',', ':'))
+    return f"event: {event}\nid: {event_id}\ndata: {data}\n\n".encode('utf-8')
+
+
+def changed_positions(old, new, threshold):
+    """Mask of rows in `new` that moved more than `threshold` from `old`
+
+    Both are (n, 3) arrays of latitude, longitude, altitude; longitude
+    differences wrap around the antimeridian.
+    """
+    delta = np.abs(new - old)
+    delta[:, 1] = np.minimum(delta[:, 1], 360.0 - delta[:, 1])
+    return (delta > threshold).any(axis=1)
+
+
+class _Catalog:
+    """Latest positions keyed by sorted satellite id"""
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.ids = np.array([row[0] for row in rows], dtype=str)
+        self.rows = [[row[0], row[1]] + [round(float(v), 1) if v is not None else None for v in row[2:]]
+                     for row in rows]
+        self.positions = np.array([row[2:5] for row in rows], dtype=float).reshape(-1, 3)
+
+
+class SatelliteBroadcaster:
+    """Shared snapshot/delta encoder and subscriber fan-out"""
+
+    def __init__(self, threshold=0.1, queue_size=SUBSCRIBER_QUEUE_SIZE, max_subscribers=None):
+        self.threshold = threshold
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.version = 0
+        # Event ids carry a per-process token so a Last-Event-ID from before
+        # a restart never matches
+        self._instance = format(int(time.time()), 'x')
+        self._catalog = None
+        self._snapshot = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._counters = {'refreshes': 0, 'deltas': 0, 'messages_queued': 0, 'dropped_subscribers': 0,
+                          'refused_subscribers': 0}
+        self._last_delta = None
+
+    @staticmethod
+    def _load(get_db):
+        with get_db() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT satellite_id, name, latitude, longitude, altitude, inclination
+                FROM dev.tle_latest
+            """)
+            return cur.fetchall()
+
+    @property
+    def event_id(self):
+        return f"{self._instance}.{self.version}"
+
+    def _snapshot_message(self, catalog):
+        return encode_event('snapshot', self.event_id, {
+            'version': self.version,
+            'fields': STREAM_FIELDS,
+            'satellites': catalog.rows,
+        })
+
+    @property
+    def loaded(self):
+        return self._catalog is not None
+
+    def ensure_loaded(self, get_db):
+        if not self.loaded:
+            self.refresh(get_db)
+
+    def refresh(self, get_db):
+        """Reload positions and broadcast a delta if anything moved"""
+        with self._refresh_lock:
+            catalog = _Catalog(self._load(get_db))
+            previous = self._catalog
+            self._counters['refreshes'] += 1
+
+            if previous is None:
+                with self._lock:
+                    self.version += 1
+                    self._catalog = catalog
+                    self._snapshot = self._snapshot_message(catalog)
+                return
+
+            # Rows present before and now, matched by satellite id
+            k = np.searchsorted(previous.ids, catalog.ids)
+            k = np.minimum(k, max(len(previous.ids) - 1, 0))
+            known = (previous.ids[k] == catalog.ids) if len(previous.ids) else np.zeros(len(catalog.ids), bool)
+            moved = ~known
+            if known.any():
+                moved[known] = changed_positions(previous.positions[k[known]], catalog.positions[known],
+                                                 self.threshold)
+            removed = np.setdiff1d(previous.ids, catalog.ids, assume_unique=True)
+
+            # Rows below the threshold keep the values clients already hold,
+            # so drift accumulates until it is large enough to be sent
+            kept = np.flatnonzero(known & ~moved)
+            catalog.positions[kept] = previous.positions[k[kept]]
+            for i, j in zip(kept.tolist(), k[kept].tolist()):
+                catalog.rows[i] = previous.rows[j]
+
+            if not moved.any() and not len(removed):
+                return
+
+            with self._lock:
+                self.version += 1
+                delta = encode_event('delta', self.event_id, {
+                    'version': self.version,
+                    'fields': STREAM_FIELDS,
+                    'changed': [catalog.rows[i] for i in np.flatnonzero(moved)],
+                    'removed': removed.tolist(),
+                })
+                self._catalog = catalog
+                self._snapshot = self._snapshot_message(catalog)
+                self._counters['deltas'] += 1
+                self._last_delta = {'changed': int(moved.sum()), 'removed': len(removed), 'bytes': len(delta)}
+                self._broadcast(delta)
+
+    def _broadcast(self, message):
+        # Called with self._lock held
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(message)
+                self._counters['messages_queued'] += 1
+            except queue.Full:
+                self._subscribers.discard(subscriber)
+                self._counters['dropped_subscribers'] += 1
+                subscriber.close()
+
+    def _register(self, subscriber, last_event_id):
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                self._counters['refused_subscribers'] += 1
+                raise SubscriberLimit(f"{self.max_subscribers} live streams already open")
+            if self._snapshot is not None and last_event_id != self.event_id:
+                subscriber.put_nowait(self._snapshot)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber queue, primed with the current snapshot
+
+        A client resuming at the current version (Last-Event-ID) gets no
+        snapshot since it already holds these positions. Raises
+        SubscriberLimit when `max_subscribers` streams are already open.
+        """
+        return self._register(_QueueSubscriber(maxsize=self.queue_size), last_event_id)
+
+    def subscribe_async(self, last_event_id=None):
+        """Like subscribe(), for a client served by the running event loop (see stream_async)"""
+        return self._register(_AsyncSubscriber(asyncio.get_running_loop(), self.queue_size), last_event_id)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber, keepalive=KEEPALIVE_SECONDS):
+        """Yield queued messages for one client, with keepalive comments"""
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is _CLOSED:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def stream_async(self, subscriber, keepalive=KEEPALIVE_SECONDS):
+        """Async counterpart of stream() for subscribe_async() subscribers"""
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    message = await subscriber.get(keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if message is _CLOSED:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['subscribers'] = len(self._subscribers)
+            stats['max_subscribers'] = self.max_subscribers
+            stats['version'] = self.version
+            stats['satellites'] = len(self._catalog.ids) if self._catalog is not None else None
+            stats['snapshot_bytes'] = len(self._snapshot) if self._snapshot is not None else None
+            stats['last_delta'] = self._last_delta
+        return stats
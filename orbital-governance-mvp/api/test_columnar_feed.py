@@ -0,0 +1,43 @@
+"""
+Columnar Feed Round-Trip Test
+
+Encodes synthetic satellite rows with columnar_feed.py and decodes them
+again; needs no database.
+"""
+
+import numpy as np
+import pytest
+
+from columnar_feed import COLUMNS, HEADER, decode_satellite_feed, encode_satellite_feed
+
+ROWS = [
+    ('44713', 'STARLINK-1007', 53.05, -122.41, 550.2, 53.05),
+    ('45001', 'ONEWEB-0012', -12.5, 77.125, 1200.0, 87.9),
+    ('25544', 'ISS (ZARYA)', 0.0, 180.0, 418.7, 51.64),
+]
+
+
+def test_round_trip():
+    feed = decode_satellite_feed(encode_satellite_feed(ROWS))
+
+    assert feed['satellite_id'] == [row[0] for row in ROWS]
+    assert feed['name'] == [row[1] for row in ROWS]
+    for k, column in enumerate(COLUMNS):
+        assert feed[column].dtype == np.dtype('<f4')
+        np.testing.assert_array_equal(feed[column], np.array([row[2 + k] for row in ROWS], dtype='<f4'))
+
+
+@pytest.mark.parametrize('count', [0, 1, 3])
+def test_columns_are_4_byte_aligned(count):
+    payload = encode_satellite_feed(ROWS[:count])
+
+    assert HEADER.size % 4 == 0
+    for k in range(len(COLUMNS)):
+        assert (HEADER.size + 4 * count * k) % 4 == 0
+    assert len(payload) == HEADER.size + 4 * count * len(COLUMNS) + HEADER.unpack_from(payload)[4]
+    assert decode_satellite_feed(payload)['satellite_id'] == [row[0] for row in ROWS[:count]]
+
+
+def test_rejects_other_formats():
+    with pytest.raises(ValueError):
+        decode_satellite_feed(b'XXXX' + encode_satellite_feed(ROWS)[4:])
@@ -0,0 +1,257 @@
+"""
+In-Process Orbital Tract Index
+
+The tract grid built by generate_tracts.py is perfectly regular (fixed
+altitude, inclination and RAAN bin widths), so a tract lookup is just
+integer arithmetic on the bin origin and width. This module loads dev.tracts
+once, verifies that it really is a complete regular grid, and then answers
+availability queries from compact NumPy arrays plus an occupancy bitmap.
+
+If the grid is not regular the index reports `regular = False` and callers
+fall back to querying the database.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+
+
+class GridAxis:
+    """One regular axis of the tract grid (origin, bin width, bin count)"""
+
+    def __init__(self, origin, width, count):
+        self.origin = float(origin)
+        self.width = float(width)
+        self.count = int(count)
+
+    @classmethod
+    def detect(cls, mins, maxs):
+        """Return a GridAxis if the bins are uniform and contiguous, else None"""
+        widths = np.unique(maxs - mins)
+        starts = np.unique(mins)
+        if len(widths) != 1 or widths[0] <= 0:
+            return None
+
+        width = widths[0]
+        expected = starts[0] + width * np.arange(len(starts))
+        if not np.allclose(starts, expected):
+            return None
+        return cls(starts[0], width, len(starts))
+
+    def bins_containing(self, value):
+        """Bin indices whose closed interval [min, max] contains value
+
+        A value exactly on an interior edge belongs to both neighbours,
+        matching the inclusive BETWEEN used by the SQL queries.
+        """
+        if value is None or not math.isfinite(value):
+            return []
+        offset = (value - self.origin) / self.width
+        k = math.floor(offset)
+        bins = []
+        if offset == k and 0 < k <= self.count:
+            bins.append(k - 1)
+        if 0 <= k < self.count:
+            bins.append(k)
+        return bins
+
+    def index_of(self, values):
+        """Vectorized half-open bin index; -1 for values outside the axis"""
+        idx = np.floor((np.asarray(values, dtype=float) - self.origin) / self.width)
+        valid = (idx >= 0) & (idx < self.count)
+        return np.where(valid, idx, -1).astype(np.int64)
+
+    def bounds(self, k):
+        lo = self.origin + k * self.width
+        return lo, lo + self.width
+
+
+class OccupancyBitmap:
+    """One bit per tract, set when a tracked satellite occupies the tract"""
+
+    def __init__(self, size):
+        self.size = size
+        self.bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+
+    def set_many(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        np.bitwise_or.at(self.bits, indices >> 3, (1 << (indices & 7)).astype(np.uint8))
+
+    def test_many(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        return ((self.bits[indices >> 3] >> (indices & 7)) & 1).astype(bool)
+
+    def count(self):
+        return int(np.unpackbits(self.bits).sum())
+
+
+class _IndexState:
+    """Snapshot of the grid; replaced wholesale when tract data changes"""
+
+    def __init__(self, signature, regular=False, axes=None, tract_ids=None, occupancy=None):
+        self.signature = signature
+        self.regular = regular
+        self.axes = axes
+        self.tract_ids = tract_ids
+        self.occupancy = occupancy
+
+
+class TractIndex:
+    """O(1) tract lookup over a regular alt/inc/RAAN grid"""
+
+    def __init__(self, refresh_interval=60.0):
+        self.refresh_interval = refresh_interval
+        self._state = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def regular(self):
+        return self._state is not None and self._state.regular
+
+    @property
+    def needs_refresh(self):
+        return self._state is None or time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def ensure_fresh(self, conn):
+        """Load on first use, then re-check the tract signature periodically"""
+        if not self.needs_refresh:
+            return
+
+        # Only one request reloads; the others keep serving the current state
+        if not self._lock.acquire(blocking=self._state is None):
+            return
+        try:
+            if not self.needs_refresh:
+                return
+            signature = self._signature(conn)
+            if self._state is None or signature != self._state.signature:
+                self._state = self._build(conn, signature)
+            else:
+                self._state.occupancy = self._load_occupancy(conn, self._state)
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Force a signature check on the next request"""
+        self._checked_at = 0.0
+
+    def _signature(self, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*), MAX(created_at), MIN(alt_min), MAX(alt_max) FROM dev.tracts")
+        return tuple(cur.fetchone())
+
+    def _build(self, conn, signature):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+            FROM dev.tracts
+        """)
+        rows = cur.fetchall()
+        if not rows:
+            return _IndexState(signature)
+
+        bounds = np.array([row[1:] for row in rows], dtype=float)
+        axes = tuple(GridAxis.detect(bounds[:, 2 * d], bounds[:, 2 * d + 1]) for d in range(3))
+        if any(axis is None for axis in axes):
+            return _IndexState(signature)
+
+        flat = self._flat_index(axes, bounds[:, 0], bounds[:, 2], bounds[:, 4])
+        size = axes[0].count * axes[1].count * axes[2].count
+        if len(rows) != size or (flat < 0).any() or len(np.unique(flat)) != size:
+            return _IndexState(signature)
+
+        tract_ids = np.empty(size, dtype=object)
+        tract_ids[flat] = [row[0] for row in rows]
+
+        state = _IndexState(signature, True, axes, tract_ids)
+        state.occupancy = self._load_occupancy(conn, state)
+        return state
+
+    @staticmethod
+    def _flat_index(axes, alt, inc, raan):
+        a = axes[0].index_of(alt)
+        i = axes[1].index_of(inc)
+        r = axes[2].index_of(np.mod(raan, 360.0))
+        flat = (a * axes[1].count + i) * axes[2].count + r
+        return np.where((a < 0) | (i < 0) | (r < 0), -1, flat)
+
+    def _load_occupancy(self, conn, state):
+        bitmap = OccupancyBitmap(len(state.tract_ids))
+        if not state.regular:
+            return bitmap
+
+        cur = conn.cursor()
+        cur.execute("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL")
+        if cur.fetchone()[0]:
+            # Occupancy index maintained by the position pipeline; bin centres
+            # keep the flat index clear of edge rounding
+            cur.execute("""
+                SELECT (t.alt_min + t.alt_max) / 2, (t.inc_min + t.inc_max) / 2, (t.az_min + t.az_max) / 2
+                FROM (SELECT DISTINCT tract_id FROM dev.tract_occupancy WHERE tract_id IS NOT NULL) o
+                JOIN dev.tracts t ON t.tract_id = o.tract_id
+            """)
+            return self._set_occupied(bitmap, state, cur.fetchall())
+
+        # Prefer the RAAN propagated to the position epoch; fall back to the TLE epoch value
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'dev' AND table_name = 'tle_snapshots'
+            AND column_name IN ('raan', 'raan_deg')
+        """)
+        available = {row[0] for row in cur.fetchall()}
+        raan_column = next((c for c in ('raan', 'raan_deg') if c in available), None)
+        if raan_column is None:
+            return bitmap
+
+        cur.execute(f"""
+            SELECT altitude, inclination, {raan_column}
+            FROM dev.tle_snapshots
+            WHERE position IS NOT NULL AND {raan_column} IS NOT NULL
+        """)
+        return self._set_occupied(bitmap, state, cur.fetchall())
+
+    def _set_occupied(self, bitmap, state, rows):
+        sats = np.array(rows, dtype=float).reshape(-1, 3)
+        flat = self._flat_index(state.axes, sats[:, 0], sats[:, 1], sats[:, 2])
+        bitmap.set_many(flat[flat >= 0])
+        return bitmap
+
+    def lookup(self, altitude, inclination, limit=10):
+        """Unoccupied tracts whose altitude and inclination bins contain the query"""
+        state = self._state
+        alt_axis, inc_axis, raan_axis = state.axes
+
+        results = []
+        for a in alt_axis.bins_containing(altitude):
+            for i in inc_axis.bins_containing(inclination):
+                base = (a * inc_axis.count + i) * raan_axis.count
+                candidates = base + np.arange(raan_axis.count)
+                free = candidates[~state.occupancy.test_many(candidates)]
+
+                alt_min, alt_max = alt_axis.bounds(a)
+                inc_min, inc_max = inc_axis.bounds(i)
+                for flat in free[:limit - len(results)]:
+                    az_min, az_max = raan_axis.bounds(int(flat - base))
+                    results.append((state.tract_ids[flat], alt_min, alt_max,
+                                    inc_min, inc_max, az_min, az_max))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def stats(self):
+        state = self._state
+        if state is None:
+            return {'loaded': False}
+        if not state.regular:
+            return {'loaded': True, 'regular': False}
+        return {
+            'loaded': True,
+            'regular': True,
+            'tracts': len(state.tract_ids),
+            'occupied': state.occupancy.count(),
+            'bins': [axis.count for axis in state.axes],
+        }
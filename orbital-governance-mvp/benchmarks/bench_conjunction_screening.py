@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Conjunction Screening Benchmark
+
+Screens a synthetic catalog (20,000 objects by default) built with
+Satrec.sgp4init: a few dense constellation shells plus a random debris
+population. Runs offline - no database needed.
+
+The spatial-hash screen is first checked against a brute-force all-pairs
+screen on a subset, then timed on the full catalog.
+
+Usage:
+    python3 benchmarks/bench_conjunction_screening.py [objects] [hours]
+"""
+
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sgp4.api import WGS72, Satrec
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from conjunction_screening import MAX_RELATIVE_SPEED_KM_S, refine_linear, screen_catalog, time_grid
+from propagation import propagate_teme
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+EARTH_RADIUS_KM = 6378.135
+MU = 398600.8  # WGS72, km^3/s^2
+
+# (altitude km, inclination deg, planes, satellites per plane)
+SHELLS = [(550, 53.0, 72, 22), (570, 70.0, 36, 20), (1200, 87.9, 12, 49), (780, 86.4, 6, 11)]
+
+
+def make_satrec(satnum, altitude, inclination, raan, mean_anomaly, ecc=0.0001, argp=0.0):
+    a = EARTH_RADIUS_KM + altitude
+    mean_motion = math.sqrt(MU / a ** 3) * 60.0  # rad/min
+    satrec = Satrec()
+    # Epoch in days since 1949 December 31 00:00 UT (2024-01-01)
+    satrec.sgp4init(WGS72, 'i', satnum, 27029.0, 0.0, 0.0, 0.0, ecc, math.radians(argp),
+                    math.radians(inclination), math.radians(mean_anomaly), mean_motion,
+                    math.radians(raan))
+    return satrec
+
+
+def synthetic_catalog(count, seed=42):
+    """Constellation shells for up to half the catalog, random debris for the rest"""
+    rng = np.random.default_rng(seed)
+    satrecs = []
+    for altitude, inclination, planes, per_plane in SHELLS:
+        for p in range(planes):
+            for s in range(per_plane):
+                if len(satrecs) < count // 2:
+                    satrecs.append(make_satrec(len(satrecs) + 1, altitude + rng.normal(0, 0.5), inclination,
+                                               360.0 * p / planes, 360.0 * s / per_plane + rng.uniform(0, 0.2)))
+    while len(satrecs) < count:
+        satrecs.append(make_satrec(len(satrecs) + 1, rng.uniform(350, 1500), rng.uniform(0, 110),
+                                   rng.uniform(0, 360), rng.uniform(0, 360),
+                                   ecc=rng.uniform(0.0001, 0.02), argp=rng.uniform(0, 360)))
+    return satrecs
+
+
+def brute_force(satrecs, hours, step_seconds, threshold_km):
+    """All-pairs screen with the same linear refinement, for checking and timing"""
+    jd, fr, offsets = time_grid(EPOCH, hours, step_seconds)
+    _, r, v = propagate_teme(satrecs, jd, fr)
+    half_step = step_seconds / 2
+    reach = threshold_km + MAX_RELATIVE_SPEED_KM_S * half_step
+    i, j = np.triu_indices(len(satrecs), k=1)
+    found = set()
+    for k in range(len(offsets)):
+        dr = r[j, k] - r[i, k]
+        close = np.einsum('ij,ij->i', dr, dr) <= reach * reach
+        _, miss = refine_linear(dr[close], v[j[close], k] - v[i[close], k], half_step)
+        hit = miss <= threshold_km
+        found.update(zip(i[close][hit].tolist(), j[close][hit].tolist()))
+    return found
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    step, threshold = 10.0, 10.0
+
+    print(f"🛰️  Conjunction screening benchmark ({count:,} objects, {hours}h window, {step:.0f}s steps)")
+    print("=" * 50)
+
+    satrecs = synthetic_catalog(count)
+
+    subset = satrecs[:1500] + satrecs[count // 2:count // 2 + 500]
+    started = time.perf_counter()
+    expected = brute_force(subset, 0.25, step, threshold)
+    brute_time = time.perf_counter() - started
+    result = screen_catalog(subset, EPOCH, 0.25, step, threshold)
+    screened = set(zip(result['i'].tolist(), result['j'].tolist()))
+    print(f"\n🔎 Check on {len(subset):,} objects / 15 min: all-pairs {brute_time:.2f}s, "
+          f"hashed {result['stats']['elapsed']:.2f}s, "
+          f"{'identical' if screened == expected else 'DIFFERENT'} ({len(expected)} conjunctions)")
+
+    result = screen_catalog(satrecs, EPOCH, hours, step, threshold)
+    stats = result['stats']
+    per_step = stats['elapsed'] / stats['steps']
+    print(f"\n⚡ Full catalog: {stats['elapsed']:.2f}s for {stats['steps']} steps "
+          f"({per_step * 1000:.1f} ms/step, propagation {stats['propagation_elapsed']:.2f}s)")
+    print(f"   Candidate pairs refined: {stats['refined']:,} of "
+          f"{stats['all_pairs_per_step'] * stats['steps']:,} all-pairs checks "
+          f"({stats['radial_pruned']:,} pruned by apogee/perigee)")
+    print(f"   Conjunctions under {threshold:.0f} km: {stats['conjunctions']:,}")
+    if stats['conjunctions']:
+        print(f"   Closest: {result['miss_km'][0]:.3f} km at T+{result['tca'][0]:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
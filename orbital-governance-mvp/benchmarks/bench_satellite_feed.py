@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Satellite Feed Benchmark: JSON vs Binary Columnar
+
+Compares payload size and encode time of the /api/satellites JSON path
+against the /api/satellites/columnar float32 feed on a synthetic catalog.
+Runs offline - no database needed.
+
+Usage:
+    python3 benchmarks/bench_satellite_feed.py [satellite_count]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from columnar_feed import decode_satellite_feed, encode_satellite_feed
+
+
+def synthetic_rows(count, seed=42):
+    """Rows shaped like the dev.tle_snapshots query results"""
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-90, 90, count)
+    lon = rng.uniform(-180, 180, count)
+    alt = rng.uniform(300, 1200, count)
+    inc = rng.uniform(0, 100, count)
+    return [
+        (str(40000 + i), f"STARLINK-{i}", float(lat[i]), float(lon[i]), float(alt[i]), float(inc[i]))
+        for i in range(count)
+    ]
+
+
+def encode_json(rows):
+    """Mirror of the JSON endpoint: one dict per row, then json.dumps"""
+    satellites = []
+    for row in rows:
+        satellites.append({
+            'satellite_id': row[0],
+            'name': row[1],
+            'altitude': round(row[4], 1),
+            'inclination': round(row[5], 1),
+            'longitude': round(row[3], 1),
+            'latitude': round(row[2], 1)
+        })
+    return json.dumps(satellites).encode('utf-8')
+
+
+def best_of(fn, rows, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        payload = fn(rows)
+        timings.append(time.perf_counter() - started)
+    return payload, min(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = synthetic_rows(count)
+
+    print(f"🛰️  Satellite feed benchmark ({count:,} satellites)")
+    print("=" * 50)
+
+    json_payload, json_time = best_of(encode_json, rows)
+    bin_payload, bin_time = best_of(encode_satellite_feed, rows)
+
+    started = time.perf_counter()
+    json.loads(json_payload)
+    json_parse = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decode_satellite_feed(bin_payload)
+    bin_parse = time.perf_counter() - started
+
+    for label, payload, encode_time, parse_time in (
+        ('JSON', json_payload, json_time, json_parse),
+        ('Columnar', bin_payload, bin_time, bin_parse),
+    ):
+        print(f"   {label:<9} raw={len(payload) / 1024:8.1f} KiB  "
+              f"gzip={len(gzip.compress(payload, 6)) / 1024:8.1f} KiB  "
+              f"encode={encode_time * 1000:7.2f} ms  decode={parse_time * 1000:7.2f} ms")
+
+    print(f"\n📊 Columnar is {len(json_payload) / len(bin_payload):.1f}x smaller "
+          f"and encodes {json_time / bin_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tract Shell Geometry Benchmark: per-tract loop vs vectorized pipeline
+
+Builds the LEO volumetric shells three ways - the original one-Polygon-per-
+tract loop (with per-polygon validity/area checks and WKT serialization),
+vectorized Shapely 2 chunks in a single process, and the same chunks across
+a process pool - at the current grid resolution and at 4x finer resolution
+(2.5° inclination and RAAN bins). Runs offline - no database needed; the
+COPY write is not included.
+
+Usage:
+    python3 benchmarks/bench_tract_geometry.py [workers]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'database'))
+
+from shapely.geometry import Polygon
+from shapely.wkt import dumps
+
+from shell_geometry import POLAR_CUTOFF, SHELL_INPUT_COLUMNS, build_shell_chunk, map_shell_chunks
+from tract_grid import ZONES
+
+CHUNK_SIZE = 10000
+
+
+def grid_chunks(grid):
+    """The grid as shell-input chunks, shaped like the generate_tracts SELECT"""
+    chunks = []
+    for chunk in grid.iter_chunks(CHUNK_SIZE):
+        chunks.append({column: chunk[column] for column in SHELL_INPUT_COLUMNS})
+    return chunks
+
+
+def legacy_loop(chunks):
+    """Original approach: one Polygon, validity check and WKT dump per tract"""
+    count = 0
+    for chunk in chunks:
+        for tract_id, alt_min, alt_max, inc_min, inc_max, raan_min, raan_max in zip(
+                *(chunk[column] for column in SHELL_INPUT_COLUMNS)):
+            if inc_min >= POLAR_CUTOFF:
+                continue
+            avg_alt = (alt_min + alt_max) / 2
+            poly = Polygon([
+                (raan_min, inc_min, avg_alt),
+                (raan_max, inc_min, avg_alt),
+                (raan_max, inc_max, avg_alt),
+                (raan_min, inc_max, avg_alt),
+                (raan_min, inc_min, avg_alt),
+            ])
+            if not poly.is_valid or poly.is_empty or poly.area == 0:
+                continue
+            dumps(poly, output_dimension=3)
+            count += 1
+    return count
+
+
+def vectorized(chunks):
+    return sum(len(build_shell_chunk(chunk)['tract_id']) for chunk in chunks)
+
+
+def pooled(chunks, workers):
+    return sum(len(result['tract_id']) for result in map_shell_chunks(chunks, workers))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    count = fn(*args)
+    return count, time.perf_counter() - started
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    base = ZONES['LEO']
+    grids = [
+        ('current', base),
+        ('4x finer', base.with_widths(inc_width=base.inc.width / 2, raan_width=base.raan.width / 2)),
+    ]
+
+    print(f"🛰️  Tract shell geometry benchmark ({workers} workers)")
+    print("=" * 50)
+
+    for label, grid in grids:
+        chunks = grid_chunks(grid)
+        print(f"\n📐 {label}: {grid.size:,} tracts")
+
+        results = [
+            ('Per-tract loop', *timed(legacy_loop, chunks)),
+            ('Vectorized', *timed(vectorized, chunks)),
+            ('Vectorized + pool', *timed(pooled, chunks, workers)),
+        ]
+        baseline = results[0][2]
+        for name, count, elapsed in results:
+            print(f"   {name:<18} shells={count:>8,}  {elapsed:7.2f}s  "
+                  f"{grid.size / elapsed:>10,.0f} tracts/s  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
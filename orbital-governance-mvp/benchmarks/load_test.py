@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+API Load Test: Flask vs Async
+
+Drives the core endpoints with a fixed number of concurrent clients and
+reports p50/p99 latency and requests per second for each server. Start
+both servers first:
+
+    cd api && python3 app.py          # Flask, port 3000
+    cd api && python3 async_app.py    # ASGI, port 3001
+
+Note that the Flask app serves /api/stats and /api/satellites from its
+response cache after the first request; pass --no-cache to add a unique
+query parameter to every request and measure the uncached path.
+
+Usage:
+    python3 benchmarks/load_test.py [--flask URL] [--async URL] [--concurrency 32] [--requests 500]
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    ('stats', 'GET', '/api/stats'),
+    ('satellites', 'GET', '/api/satellites?limit=500'),
+    ('tracts', 'GET', '/api/tracts/available?altitude=550&inclination=53'),
+    ('register', 'POST', '/api/satellites/register'),
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def sample_tract_id(base_url):
+    """A real tract id for the registration payload"""
+    with urllib.request.urlopen(base_url + ENDPOINTS[2][2], timeout=30) as response:
+        tracts = json.load(response)
+    return tracts[0]['tract_id'] if tracts else 'UNKNOWN'
+
+
+def make_request(base_url, method, path, body, sequence):
+    url = base_url + path
+    if sequence is not None:
+        url += ('&' if '?' in url else '?') + f"_={sequence}"
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'} if data else {})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_endpoint(base_url, method, path, body, concurrency, requests, bust_cache):
+    """Issue `requests` calls with `concurrency` client threads"""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def next_sequence():
+        with lock:
+            return next(counter, None)
+
+    def client():
+        results = []
+        while True:
+            sequence = next_sequence()
+            if sequence is None:
+                return results
+            results.append(make_request(base_url, method, path, body,
+                                        sequence if bust_cache else None))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(client) for _ in range(concurrency)]
+        results = [r for f in futures for r in f.result()]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, ok in results if ok)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok in results if not ok),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+        'per_second': len(results) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the Flask and async API servers under load")
+    parser.add_argument('--flask', default='http://localhost:3000', help="Flask server base URL ('' to skip)")
+    parser.add_argument('--async', dest='async_url', default='http://localhost:3001',
+                        help="async server base URL ('' to skip)")
+    parser.add_argument('--concurrency', type=int, default=32, help="concurrent clients")
+    parser.add_argument('--requests', type=int, default=500, help="requests per endpoint")
+    parser.add_argument('--no-cache', action='store_true', help="defeat response caching with a unique parameter")
+    args = parser.parse_args()
+
+    servers = [(name, url.rstrip('/')) for name, url in (('flask', args.flask), ('async', args.async_url)) if url]
+    print(f"🚀 {args.requests} requests per endpoint, {args.concurrency} concurrent clients"
+          f"{', cache defeated' if args.no_cache else ''}")
+    print(f"\n{'server':<8} {'endpoint':<12} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'errors':>7}")
+
+    for server, base_url in servers:
+        try:
+            tract_id = sample_tract_id(base_url)
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            print(f"❌ {server} at {base_url} is not reachable: {e}")
+            continue
+
+        registration = {'satellite_name': 'LOADTEST-1', 'operator': 'Load Test',
+                        'tract_id': tract_id, 'mission_type': 'Test'}
+        for name, method, path in ENDPOINTS:
+            body = registration if method == 'POST' else None
+            result = run_endpoint(base_url, method, path, body, args.concurrency, args.requests,
+                                  args.no_cache and method == 'GET')
+            print(f"{server:<8} {name:<12} {result['per_second']:>9,.1f} {result['p50_ms']:>9.1f} "
+                  f"{result['p99_ms']:>9.1f} {result['mean_ms']:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
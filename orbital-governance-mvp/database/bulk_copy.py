@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Bulk COPY Helpers
+
+Streams rows into PostgreSQL with COPY ... FROM STDIN in fixed-size
+batches, so large writes cost a handful of round trips instead of one
+statement per row while keeping memory bounded by the batch size.
+"""
+
+import io
+import math
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def format_copy_value(value):
+    """Format one value for COPY's text format"""
+    if value is None:
+        return r'\N'
+    if isinstance(value, float):
+        return r'\N' if math.isnan(value) else repr(value)
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def copy_rows(cursor, table, columns, rows, batch_size=DEFAULT_BATCH_SIZE):
+    """COPY an iterable of row tuples into `table`, `batch_size` rows at a time
+
+    Returns the number of rows copied.
+    """
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    buffer = io.StringIO()
+    pending = 0
+    total = 0
+
+    for row in rows:
+        buffer.write('\t'.join(format_copy_value(v) for v in row))
+        buffer.write('\n')
+        pending += 1
+
+        if pending >= batch_size:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            total += pending
+            buffer = io.StringIO()
+            pending = 0
+
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        total += pending
+
+    return total
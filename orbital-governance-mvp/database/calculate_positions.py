@@ -4,35 +4,78 @@ Calculate Satellite Positions from TLE Data
 
 This script takes raw TLE (Two-Line Element) data and calculates:
 - Geographic positions (latitude, longitude, altitude)
-- Orbital parameters (inclination)
+- Orbital parameters (inclination, mean RAAN at the propagation epoch)
 - PostGIS geometry for spatial queries
+- The tract each satellite occupies (dev.tract_occupancy, see tract_occupancy.py)
+- The current snapshot per satellite (dev.tle_latest, see tle_latest.py)
+
+The whole catalog is propagated in one vectorized SGP4 call (see
+propagation.py) rather than one EarthSatellite per row, and positions are
+written back with COPY into a staging table plus one set-based UPDATE.
+Parsed Satrec objects are cached by TLE content hash, so in a long-running
+process (scheduler.py) unchanged TLEs are not parsed again on every run.
 
 This is essential for the demo to show live satellite positions.
 """
 
-from skyfield.api import EarthSatellite, load
+import os
+import time
+
+import numpy as np
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from datetime import timezone
+from datetime import datetime, timezone
+
+from bulk_copy import copy_rows
+from propagation import SatrecCache, parse_catalog, propagate_catalog
+from schema import ORBIT_BINS_INDEX
+from tle_latest import LATEST_VIEW_STATEMENTS, refresh_latest_view
+from tract_occupancy import remove_departed, update_occupancy
 
 # Database connection
 engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
 Session = sessionmaker(bind=engine)
 session = Session()
 
-def calculate_satellite_positions():
-    """Calculate positions for satellites that don't have geometry yet"""
+# Rows per COPY batch when writing positions back
+POSITION_BATCH_SIZE = int(os.getenv('POSITION_BATCH_SIZE', '5000'))
+
+# Parsed TLEs reused across runs; keyed by content, so changed TLEs always miss
+satrec_cache = SatrecCache(ttl=86400.0)
+
+def ensure_position_schema():
+    """Add the propagated RAAN column, its tract-assignment index and dev.tle_latest if missing"""
+    session.execute(text("ALTER TABLE dev.tle_snapshots ADD COLUMN IF NOT EXISTS raan DOUBLE PRECISION"))
+    session.execute(text(ORBIT_BINS_INDEX))
+    for statement in LATEST_VIEW_STATEMENTS:
+        session.execute(text(statement))
+    session.commit()
+
+def calculate_satellite_positions(recompute_latest=False):
+    """Calculate positions for satellites that don't have geometry yet
     
-    print("🛰️  Calculating satellite positions from TLE data...")
+    With `recompute_latest`, each satellite's current snapshot
+    (dev.tle_latest) is re-propagated to the current time as well, so served
+    positions keep moving between TLE loads. Returns the number of rows
+    updated.
+    """
     
-    # Load time scale for orbital calculations
-    ts = load.timescale()
+    print("🛰️  Calculating satellite positions from TLE data...")
+    ensure_position_schema()
     
-    # Get TLE snapshots that need position calculation
-    result = session.execute(text("""
-        SELECT id, tle_line1, tle_line2, name
+    # Get TLE snapshots that need position calculation (or a RAAN backfill);
+    # the predicate matches idx_tle_snapshots_pending, so history is not scanned
+    latest_clause = """
+        UNION
+        SELECT s.id, s.tle_line1, s.tle_line2, s.name, s.satellite_id
+        FROM dev.tle_snapshots s
+        JOIN dev.tle_latest l ON l.id = s.id
+    """ if recompute_latest else ""
+    result = session.execute(text(f"""
+        SELECT id, tle_line1, tle_line2, name, satellite_id
         FROM dev.tle_snapshots
-        WHERE position IS NULL
+        WHERE position IS NULL OR raan IS NULL
+        {latest_clause}
         ORDER BY id
     """))
     rows = result.fetchall()
@@ -41,64 +84,48 @@ def calculate_satellite_positions():
     
     if len(rows) == 0:
         print("✅ All satellites already have positions calculated")
-        return
-    
-    updates = []
-    errors = 0
-    
-    for row in rows:
-        snapshot_id, line1, line2, name = row
-        try:
-            # Create satellite object from TLE data
-            satellite = EarthSatellite(line1, line2, name=name or str(snapshot_id), ts=ts)
-            
-            # Calculate current position
-            now = ts.now()
-            subpoint = satellite.at(now).subpoint()
-            
-            # Extract position data
-            lat = subpoint.latitude.degrees
-            lon = subpoint.longitude.degrees
-            alt = subpoint.elevation.km
-            
-            # Get inclination from orbital model
-            incl = satellite.model.inclo  # radians
-            incl_deg = incl * 180 / 3.141592653589793
-            
-            # Create PostGIS point geometry
-            point_wkt = f"POINTZ({lon} {lat} {alt})"
-            
-            updates.append({
-                'point_wkt': point_wkt,
-                'lon': float(lon),
-                'lat': float(lat),
-                'alt': float(alt),
-                'incl': float(incl_deg),
-                'snapshot_id': snapshot_id
-            })
-            
-        except Exception as e:
-            print(f"⚠️  Error calculating position for {name or snapshot_id}: {e}")
-            errors += 1
-    
-    # Apply position updates to database
-    if updates:
-        print(f"💾 Updating {len(updates)} satellite positions...")
+        session.close()
+        return 0
+    
+    names = {row[0]: row[3] for row in rows}
+    satellite_ids = {row[0]: row[4] for row in rows}
+    
+    # Parse the whole catalog once, then propagate it in a single batch call
+    hits, misses = satrec_cache.hits, satrec_cache.misses
+    snapshot_ids, satrecs, parse_errors = parse_catalog(((row[0], row[1], row[2]) for row in rows),
+                                                        cache=satrec_cache)
+    for snapshot_id, e in parse_errors:
+        print(f"⚠️  Error parsing TLE for {names[snapshot_id] or snapshot_id}: {e}")
+    errors = len(parse_errors)
+    reused = satrec_cache.hits - hits
+    parsed = satrec_cache.misses - misses
+    if reused + parsed:
+        print(f"♻️  Reused {reused} parsed TLEs, parsed {parsed} "
+              f"(Satrec cache hit rate {reused / (reused + parsed):.1%})")
+    
+    updated = 0
+    
+    if satrecs:
+        positions = propagate_catalog(satrecs, datetime.now(timezone.utc))
+        print(f"⚡ Propagated {len(satrecs)} satellites in {positions['elapsed']:.3f}s "
+              f"({positions['satellites_per_second']:,.0f} satellites/s)")
         
-        for update in updates:
-            session.execute(text("""
-                UPDATE dev.tle_snapshots
-                SET 
-                    position = ST_GeomFromText(:point_wkt, 4326),
-                    longitude = :lon,
-                    latitude = :lat,
-                    altitude = :alt,
-                    inclination = :incl
-                WHERE id = :snapshot_id
-            """), update)
+        ok = positions['ok']
+        for i in np.flatnonzero(~ok):
+            print(f"⚠️  Error calculating position for {names[snapshot_ids[i]] or snapshot_ids[i]}: "
+                  f"SGP4 error code {positions['error_code'][i]}")
+        errors += int((~ok).sum())
         
-        session.commit()
-        print(f"✅ Successfully updated {len(updates)} satellite positions")
+        if ok.any():
+            print(f"💾 Updating {int(ok.sum())} satellite positions...")
+            written_ids = np.asarray(snapshot_ids)[ok]
+            updated = write_positions(written_ids, {
+                name: positions[name][ok]
+                for name in ('longitude', 'latitude', 'altitude', 'inclination', 'raan')
+            }, satellite_ids=[satellite_ids[i] for i in written_ids.tolist()])
+    
+    if updated:
+        print(f"✅ Successfully updated {updated} satellite positions")
         
         if errors > 0:
             print(f"⚠️  {errors} satellites had calculation errors")
@@ -106,25 +133,104 @@ def calculate_satellite_positions():
         print("❌ No valid position calculations completed")
     
     session.close()
+    return updated
+
+def write_positions(snapshot_ids, columns, batch_size=None, satellite_ids=None):
+    """Bulk-write computed positions with COPY and one set-based UPDATE
+    
+    Rows are streamed into a temporary staging table in batches, then a
+    single UPDATE ... FROM builds the PostGIS geometry server-side. When
+    `satellite_ids` is given, the tract occupancy index is updated in the
+    same transaction. dev.tle_latest is refreshed before the commit.
+    """
+    batch_size = batch_size or POSITION_BATCH_SIZE
+    started = time.perf_counter()
+    
+    rows = zip(
+        snapshot_ids.tolist(),
+        columns['longitude'].tolist(),
+        columns['latitude'].tolist(),
+        columns['altitude'].tolist(),
+        columns['inclination'].tolist(),
+        columns['raan'].tolist()
+    )
+    
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TEMP TABLE position_staging (
+                id BIGINT PRIMARY KEY,
+                longitude DOUBLE PRECISION,
+                latitude DOUBLE PRECISION,
+                altitude DOUBLE PRECISION,
+                inclination DOUBLE PRECISION,
+                raan DOUBLE PRECISION
+            ) ON COMMIT DROP
+        """)
+        copied = copy_rows(cur, 'position_staging',
+                           ['id', 'longitude', 'latitude', 'altitude', 'inclination', 'raan'],
+                           rows, batch_size)
+        cur.execute("ANALYZE position_staging")
+        
+        cur.execute("""
+            UPDATE dev.tle_snapshots s
+            SET 
+                position = ST_SetSRID(ST_MakePoint(st.longitude, st.latitude, st.altitude), 4326),
+                longitude = st.longitude,
+                latitude = st.latitude,
+                altitude = st.altitude,
+                inclination = st.inclination,
+                raan = st.raan
+            FROM position_staging st
+            WHERE s.id = st.id
+        """)
+        updated = cur.rowcount
+        
+        if satellite_ids is not None:
+            upserted, moved = update_occupancy(cur, satellite_ids, snapshot_ids, columns['altitude'],
+                                               columns['inclination'], columns['raan'], batch_size)
+            print(f"🗺️  Occupancy: {upserted} satellites indexed, {moved} changed tract")
+        
+        current = refresh_latest_view(cur)
+        print(f"📌 dev.tle_latest: {current} current satellites")
+        departed = remove_departed(cur)
+        if departed:
+            print(f"🗺️  Occupancy: {departed} satellites no longer tracked removed")
+        
+        # Tell API processes to drop cached responses once this commits
+        cur.execute("SELECT pg_notify('orbital_refresh', 'positions')")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    elapsed = time.perf_counter() - started
+    rate = copied / elapsed if elapsed > 0 else float('inf')
+    print(f"💾 Wrote {copied} rows in {elapsed:.3f}s ({rate:,.0f} rows/s, batch size {batch_size})")
+    
+    return updated
 
 def show_position_summary():
     """Show summary of calculated positions"""
     
     result = session.execute(text("""
         SELECT 
-            COUNT(*) as total_satellites,
-            COUNT(position) as positioned_satellites,
+            (SELECT COUNT(*) FROM dev.tle_snapshots) as archived_snapshots,
+            COUNT(*) as positioned_satellites,
             MIN(altitude) as min_altitude,
             MAX(altitude) as max_altitude,
             AVG(altitude) as avg_altitude
-        FROM dev.tle_snapshots
+        FROM dev.tle_latest
     """))
     
     stats = result.fetchone()
     
     print(f"\n📊 Satellite Position Summary:")
-    print(f"   Total satellites: {stats[0]}")
-    print(f"   With positions: {stats[1]}")
+    print(f"   Archived snapshots: {stats[0]}")
+    print(f"   Current satellites with positions: {stats[1]}")
     print(f"   Altitude range: {stats[2]:.1f} - {stats[3]:.1f} km")
     print(f"   Average altitude: {stats[4]:.1f} km")
     
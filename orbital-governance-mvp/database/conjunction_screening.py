@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Conjunction Screening
+
+Screens the whole catalog for close approaches over a time window without
+an all-pairs distance check:
+
+1. Apogee/perigee filter - two objects whose radial shells (perigee to
+   apogee, padded by the threshold) never overlap cannot meet.
+2. The catalog is propagated with the batch SGP4 engine (propagation.py)
+   a block of time steps at a time, so memory stays bounded.
+3. At each time step a uniform spatial hash over TEME positions finds the
+   pairs in neighbouring cells. Cells are sized so that any pair whose
+   closest approach falls within half a step of the sample is caught.
+4. Each candidate is refined with linear relative motion to a time of
+   closest approach (TCA) and miss distance; the closest approach per pair
+   over the window is reported.
+
+Usage:
+    python3 conjunction_screening.py [--hours 24] [--step 10] [--threshold 10]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sgp4.conveniences import jday_datetime
+
+from propagation import parse_catalog, propagate_teme
+
+# Screening defaults
+SCREENING_THRESHOLD_KM = 10.0
+WINDOW_HOURS = 24
+STEP_SECONDS = 10.0
+
+# Time steps propagated per SatrecArray call
+TIME_BATCH_STEPS = 60
+
+# Upper bound on the relative speed of two Earth orbiters (head-on LEO)
+MAX_RELATIVE_SPEED_KM_S = 16.0
+
+# Half of the 26 neighbouring cells plus the cell itself: each unordered
+# pair of cells is visited exactly once
+_OFFSETS = np.array([
+    (dx, dy, dz)
+    for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+    if (dx, dy, dz) >= (0, 0, 0)
+], dtype=np.int64)
+
+_CELL_BIAS = 1 << 20
+_CELL_BITS = 21
+
+
+def radial_extent(satrecs):
+    """Perigee and apogee radii in km for each satellite"""
+    count = len(satrecs)
+    # Satrec.a is the semi-major axis in Earth radii of the gravity model
+    a = np.fromiter((s.a * s.radiusearthkm for s in satrecs), dtype=float, count=count)
+    e = np.fromiter((s.ecco for s in satrecs), dtype=float, count=count)
+    return a * (1 - e), a * (1 + e)
+
+
+def shells_overlap(perigee, apogee, i, j, threshold):
+    """Apogee/perigee pre-filter for pairs (i, j)"""
+    return np.maximum(perigee[i], perigee[j]) - np.minimum(apogee[i], apogee[j]) <= threshold
+
+
+def _encode_cells(cells):
+    biased = cells + _CELL_BIAS
+    return (biased[..., 0] << (2 * _CELL_BITS)) | (biased[..., 1] << _CELL_BITS) | biased[..., 2]
+
+
+# Key deltas of the neighbour offsets; the encoding is linear in the cell
+# coordinates, so key(cell + offset) == key(cell) + delta
+_OFFSET_DELTAS = _encode_cells(_OFFSETS) - _encode_cells(np.zeros(3, dtype=np.int64))
+
+
+def hash_pairs(points, cell_size):
+    """Pairs of points (i < j as index arrays) in the same or adjacent hash cells"""
+    keys = _encode_cells(np.floor(points / cell_size).astype(np.int64))
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    positions = np.arange(len(points))
+
+    left, right = [], []
+    for delta in _OFFSET_DELTAS:
+        # Sorted needles keep searchsorted cache friendly
+        target = sorted_keys + delta
+        lo = np.searchsorted(sorted_keys, target, side='left')
+        counts = np.searchsorted(sorted_keys, target, side='right') - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        # Expand each point's [lo, lo + count) range of neighbours
+        p = np.repeat(positions, counts)
+        q = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)
+
+        if delta == 0:
+            keep = p < q
+            p, q = p[keep], q[keep]
+        left.append(order[p])
+        right.append(order[q])
+
+    if not left:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    i, j = np.concatenate(left), np.concatenate(right)
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def refine_linear(dr, dv, half_step):
+    """Time offset (s) and miss distance (km) of closest approach under linear motion"""
+    dv2 = np.einsum('ij,ij->i', dv, dv)
+    t = -np.einsum('ij,ij->i', dr, dv) / np.where(dv2 > 0, dv2, 1.0)
+    t = np.clip(np.where(dv2 > 0, t, 0.0), -half_step, half_step)
+    miss = np.linalg.norm(dr + dv * t[:, None], axis=1)
+    return t, miss
+
+
+def time_grid(start, hours, step_seconds):
+    """SGP4 (jd, fr) arrays and offsets in seconds for the screening window"""
+    offsets = np.arange(0.0, hours * 3600.0 + 1e-9, step_seconds)
+    jd0, fr0 = jday_datetime(start)
+    return np.full(len(offsets), jd0), fr0 + offsets / 86400.0, offsets
+
+
+def screen_catalog(satrecs, start=None, hours=WINDOW_HOURS, step_seconds=STEP_SECONDS,
+                   threshold_km=SCREENING_THRESHOLD_KM, time_batch=TIME_BATCH_STEPS):
+    """Screen a parsed catalog for close approaches
+
+    Returns a dict with per-conjunction arrays (`i`, `j` catalog indices,
+    `tca` offset in seconds from `start`, `miss_km`, `relative_speed`)
+    sorted by miss distance, plus pruning and timing statistics.
+    """
+    start = start or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    count = len(satrecs)
+
+    perigee, apogee = radial_extent(satrecs)
+    jd, fr, offsets = time_grid(start, hours, step_seconds)
+
+    # Any approach within threshold at some time in [t - step/2, t + step/2]
+    # is at most this far apart at the sample t
+    half_step = step_seconds / 2
+    cell_size = threshold_km + MAX_RELATIVE_SPEED_KM_S * half_step
+
+    best = {}
+    stats = {'satellites': count, 'steps': len(offsets), 'hash_pairs': 0,
+             'radial_pruned': 0, 'refined': 0, 'propagation_errors': 0}
+    propagation_time = 0.0
+
+    for block in range(0, len(offsets), time_batch):
+        block_started = time.perf_counter()
+        errors, r, v = propagate_teme(satrecs, jd[block:block + time_batch], fr[block:block + time_batch])
+        propagation_time += time.perf_counter() - block_started
+        stats['propagation_errors'] += int((errors != 0).sum())
+
+        for k in range(r.shape[1]):
+            valid = np.flatnonzero((errors[:, k] == 0) & np.isfinite(r[:, k, 0]))
+            points = r[valid, k]
+
+            i, j = hash_pairs(points, cell_size)
+            i, j = valid[i], valid[j]
+            stats['hash_pairs'] += len(i)
+
+            overlap = shells_overlap(perigee, apogee, i, j, threshold_km)
+            stats['radial_pruned'] += int((~overlap).sum())
+            i, j = i[overlap], j[overlap]
+
+            dr = r[j, k] - r[i, k]
+            close = np.einsum('ij,ij->i', dr, dr) <= cell_size * cell_size
+            i, j, dr = i[close], j[close], dr[close]
+            dv = v[j, k] - v[i, k]
+            stats['refined'] += len(i)
+
+            t, miss = refine_linear(dr, dv, half_step)
+            hit = miss <= threshold_km
+            tca = offsets[block + k] + t[hit]
+            speed = np.linalg.norm(dv[hit], axis=1)
+            for a, b, when, distance, rel in zip(i[hit].tolist(), j[hit].tolist(), tca.tolist(),
+                                                miss[hit].tolist(), speed.tolist()):
+                previous = best.get((a, b))
+                if previous is None or distance < previous[1]:
+                    best[(a, b)] = (when, distance, rel)
+
+    pairs = sorted(best.items(), key=lambda item: item[1][1])
+    elapsed = time.perf_counter() - started
+    stats.update({
+        'conjunctions': len(pairs),
+        'elapsed': elapsed,
+        'propagation_elapsed': propagation_time,
+        'all_pairs_per_step': count * (count - 1) // 2,
+    })
+    return {
+        'start': start,
+        'i': np.array([p[0][0] for p in pairs], dtype=np.int64),
+        'j': np.array([p[0][1] for p in pairs], dtype=np.int64),
+        'tca': np.array([p[1][0] for p in pairs], dtype=float),
+        'miss_km': np.array([p[1][1] for p in pairs], dtype=float),
+        'relative_speed': np.array([p[1][2] for p in pairs], dtype=float),
+        'stats': stats,
+    }
+
+
+def load_catalog():
+    """Latest TLE per satellite from dev.tle_snapshots"""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT DISTINCT ON (satellite_id) satellite_id, name, tle_line1, tle_line2
+            FROM dev.tle_snapshots
+            ORDER BY satellite_id, id DESC
+        """)).fetchall()
+
+    names = {row[0]: row[1] for row in rows}
+    keys, satrecs, errors = parse_catalog((row[0], row[2], row[3]) for row in rows)
+    for key, e in errors:
+        print(f"⚠️  Error parsing TLE for {names[key] or key}: {e}")
+    return keys, [names[key] for key in keys], satrecs
+
+
+def print_report(result, keys, names, limit=20):
+    stats = result['stats']
+    print(f"\n✅ Screened {stats['satellites']:,} satellites over {stats['steps']:,} steps "
+          f"in {stats['elapsed']:.1f}s (propagation {stats['propagation_elapsed']:.1f}s)")
+    print(f"   Hash candidate pairs: {stats['hash_pairs']:,} "
+          f"(vs {stats['all_pairs_per_step'] * stats['steps']:,} all-pairs checks)")
+    print(f"   Pruned by apogee/perigee: {stats['radial_pruned']:,}, refined: {stats['refined']:,}")
+    print(f"   Conjunctions: {stats['conjunctions']:,}")
+
+    if stats['conjunctions']:
+        print(f"\n⚠️  Closest approaches:")
+    for n in range(min(limit, stats['conjunctions'])):
+        i, j = result['i'][n], result['j'][n]
+        tca = result['start'] + timedelta(seconds=float(result['tca'][n]))
+        print(f"   {names[i] or keys[i]} × {names[j] or keys[j]}: "
+              f"miss={result['miss_km'][n]:.3f} km, TCA={tca:%Y-%m-%d %H:%M:%S} UTC, "
+              f"v_rel={result['relative_speed'][n]:.2f} km/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen the catalog for close approaches")
+    parser.add_argument('--hours', type=float, default=WINDOW_HOURS, help="screening window length")
+    parser.add_argument('--step', type=float, default=STEP_SECONDS, help="time step in seconds")
+    parser.add_argument('--threshold', type=float, default=SCREENING_THRESHOLD_KM, help="miss distance in km")
+    parser.add_argument('--limit', type=int, default=20, help="conjunctions to print")
+    args = parser.parse_args()
+
+    print("🛰️  Conjunction screening...")
+    try:
+        keys, names, satrecs = load_catalog()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+        return
+
+    print(f"📡 Loaded {len(satrecs):,} satellites; window {args.hours}h at {args.step}s, "
+          f"threshold {args.threshold} km")
+    result = screen_catalog(satrecs, hours=args.hours, step_seconds=args.step, threshold_km=args.threshold)
+    print_report(result, keys, names, args.limit)
+
+
+if __name__ == "__main__":
+    main()
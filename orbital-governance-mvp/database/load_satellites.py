@@ -1,54 +1,261 @@
-import requests
+#!/usr/bin/env python3
+"""
+Load TLE Snapshots
+
+Streams a TLE catalog (CelesTrak by default, or a local file / stdin for
+offline runs) into dev.tle_snapshots:
+- TLE triplets (name, line 1, line 2) are parsed from a line iterator,
+  so memory stays bounded no matter how large the catalog is
+- Line checksums are validated before anything is written
+- Rows are inserted in multi-row batches with execute_values
+- TLEs whose line pair hashes to the latest stored TLE of the same
+  satellite (dev.tle_hash_index, see tle_hash_index.py) are not written
+  again; the share skipped is reported as the run's hit rate
+
+Usage:
+    python3 database/load_satellites.py              # CelesTrak active catalog
+    python3 database/load_satellites.py catalog.tle  # local file
+    cat catalog.tle | python3 database/load_satellites.py -
+    python3 database/load_satellites.py --store-unchanged
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
 from datetime import datetime, timezone
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from skyfield.api import EarthSatellite
+
+import requests
+from psycopg2.extras import execute_values
+from sgp4.api import Satrec
+from sqlalchemy import create_engine
+
+from propagation import tle_hash
+from retention import ensure_snapshot_partitions
+from tle_hash_index import ensure_hash_index, indexed_hashes, record_inserted, touch_unchanged
 
 # === PostgreSQL connection using SQLAlchemy ===
 engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
-Session = sessionmaker(bind=engine)
-session = Session()
 
 # === TLE Source ===
-url = "https://celestrak.com/NORAD/elements/gp.php?GROUP=active&FORMAT=tle"
-response = requests.get(url)
-tle_lines = response.text.strip().splitlines()
+CELESTRAK_URL = "https://celestrak.com/NORAD/elements/gp.php?GROUP=active&FORMAT=tle"
 
-# === Process in groups of 3 (Name, Line1, Line2) ===
-now = datetime.now(timezone.utc)
-inserted = 0
+# Rows per multi-row INSERT
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '1000'))
+
+BASE_COLUMNS = ['satellite_id', 'name', 'tle_line1', 'tle_line2', 'timestamp_collected']
+
+
+def iter_source_lines(source=None):
+    """Yield text lines from CelesTrak, a local file, or stdin ('-')"""
+    if source is None:
+        with requests.get(CELESTRAK_URL, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            yield from response.iter_lines(decode_unicode=True)
+    elif source == '-':
+        yield from sys.stdin
+    else:
+        with open(source, encoding='utf-8') as f:
+            yield from f
+
+
+def tle_checksum(line):
+    """Modulo-10 checksum over the first 68 columns of a TLE line"""
+    total = 0
+    for char in line[:68]:
+        if char.isdigit():
+            total += int(char)
+        elif char == '-':
+            total += 1
+    return total % 10
+
+
+def checksum_valid(line):
+    """True when the line's final column matches its computed checksum"""
+    return len(line) >= 69 and line[68].isdigit() and int(line[68]) == tle_checksum(line)
+
+
+def iter_tle_triplets(lines, stats):
+    """Group a stream of lines into (name, line1, line2) triplets
+
+    Resynchronizes on the next name line after malformed input instead of
+    assuming the catalog is perfectly aligned in groups of three.
+    """
+    name = None
+    line1 = None
+
+    for raw in lines:
+        line = raw.rstrip()
+        if not line.strip():
+            continue
+
+        if line.startswith('1 ') and len(line) >= 69:
+            line1 = line
+        elif line.startswith('2 ') and len(line) >= 69 and line1 is not None:
+            if checksum_valid(line1) and checksum_valid(line):
+                yield (name or '', line1, line)
+            else:
+                stats['checksum_failures'] += 1
+            name = None
+            line1 = None
+        else:
+            if line1 is not None:
+                stats['malformed'] += 1
+            name = line.strip()
+            line1 = None
+
+
+def detect_columns(cur):
+    """Detect the dev.tle_snapshots columns once, before ingestion starts"""
+    cur.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'dev' AND table_name = 'tle_snapshots'
+    """)
+    return {row[0] for row in cur.fetchall()}
 
-for i in range(0, len(tle_lines), 3):
-    try:
-        name = tle_lines[i].strip()
-        line1 = tle_lines[i+1].strip()
-        line2 = tle_lines[i+2].strip()
-        sat = EarthSatellite(line1, line2, name)
-        sat_id = str(sat.model.satnum)
-        raan_deg = sat.model.nodeo * (180 / 3.141592653589793)
 
+def drop_unchanged(triplets, known_hashes, stats, skipped):
+    """Drop triplets whose line pair matches a stored TLE, collecting their hashes in `skipped`"""
+    for name, line1, line2 in triplets:
+        key = tle_hash(line1, line2)
+        if key in known_hashes:
+            stats['unchanged'] += 1
+            skipped.append(key)
+            continue
+        yield name, line1, line2
+
+
+def iter_batches(triplets, columns, collected_at, batch_size, stats):
+    """Parse triplets into insert rows and group them into batches"""
+    with_raan = 'raan_deg' in columns
+    batch = []
+
+    for name, line1, line2 in triplets:
         try:
-            session.execute(text("""
-                INSERT INTO dev.tle_snapshots (satellite_id, name, tle_line1, tle_line2, timestamp_collected, raan_deg)
-                VALUES (:sat_id, :name, :line1, :line2, :now, :raan_deg)
-                ON CONFLICT (satellite_id, timestamp_collected) DO NOTHING;
-            """), {"sat_id": sat_id, "name": name, "line1": line1, "line2": line2, "now": now, "raan_deg": raan_deg})
+            sat = Satrec.twoline2rv(line1, line2)
         except Exception as e:
-            # Retry insert without raan_deg in case column doesn't exist
-            session.rollback()
-            session.execute(text("""
-                INSERT INTO dev.tle_snapshots (satellite_id, name, tle_line1, tle_line2, timestamp_collected)
-                VALUES (:sat_id, :name, :line1, :line2, :now)
-                ON CONFLICT (satellite_id, timestamp_collected) DO NOTHING;
-            """), {"sat_id": sat_id, "name": name, "line1": line1, "line2": line2, "now": now})
+            print(f"❌ Error parsing satellite {name or line1[2:7]}: {e}")
+            stats['errors'] += 1
+            continue
+
+        row = [str(sat.satnum), name, line1, line2, collected_at]
+        if with_raan:
+            row.append(math.degrees(sat.nodeo))
+        batch.append(tuple(row))
+
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def new_stats():
+    """Counters shared by the parsing and insert stages"""
+    return {
+        'parsed': 0,
+        'inserted': 0,
+        'unchanged': 0,
+        'hit_rate': None,
+        'errors': 0,
+        'checksum_failures': 0,
+        'malformed': 0,
+        'elapsed': 0.0,
+        'per_second': 0.0,
+    }
+
+
+def ingest(triplets, batch_size=None, stats=None, skip_unchanged=True):
+    """Insert TLE triplets into dev.tle_snapshots in multi-row batches
+
+    With `skip_unchanged`, triplets identical to a satellite's latest
+    stored TLE are skipped and counted in stats['unchanged'];
+    stats['hit_rate'] is their share of the valid TLEs. The hash index is
+    kept current either way. Returns the stats dict with parsed/inserted
+    counts and throughput.
+    """
+    batch_size = batch_size or INGEST_BATCH_SIZE
+    if stats is None:
+        stats = new_stats()
+
+    collected_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        columns = detect_columns(cur)
+        if 'raan_deg' not in columns:
+            print("ℹ️  dev.tle_snapshots has no raan_deg column - storing TLEs without it")
+        # The day's partition must exist before rows can be routed to it
+        ensure_snapshot_partitions(cur, collected_at)
+        ensure_hash_index(cur)
+        skipped = []
+        if skip_unchanged:
+            triplets = drop_unchanged(triplets, indexed_hashes(cur), stats, skipped)
+
+        insert_columns = BASE_COLUMNS + (['raan_deg'] if 'raan_deg' in columns else [])
+        sql = f"""
+            INSERT INTO dev.tle_snapshots ({', '.join(insert_columns)})
+            VALUES %s
+            ON CONFLICT (satellite_id, timestamp_collected) DO NOTHING
+            RETURNING id, satellite_id, tle_line1, tle_line2
+        """
+
+        for batch in iter_batches(triplets, columns, collected_at, batch_size, stats):
+            inserted = execute_values(cur, sql, batch, page_size=len(batch), fetch=True)
+            stats['parsed'] += len(batch)
+            stats['inserted'] += len(inserted)
+            record_inserted(cur, inserted, collected_at)
+
+        touch_unchanged(cur, skipped, collected_at)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    stats['elapsed'] = time.perf_counter() - started
+    stats['per_second'] = stats['parsed'] / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+    seen = stats['parsed'] + stats['unchanged']
+    if skip_unchanged and seen:
+        stats['hit_rate'] = stats['unchanged'] / seen
+    return stats
+
+
+def load_satellites(source=None, batch_size=None, skip_unchanged=True):
+    """Stream a TLE catalog from `source` into the database"""
+    print(f"📡 Loading TLEs from {source or CELESTRAK_URL}...")
+
+    stats = new_stats()
+    triplets = iter_tle_triplets(iter_source_lines(source), stats)
+    ingest(triplets, batch_size, stats, skip_unchanged)
+
+    print(f"✅ TLE snapshot stored successfully. {stats['inserted']} new entries "
+          f"({stats['parsed']} parsed) in {stats['elapsed']:.2f}s "
+          f"({stats['per_second']:,.0f} TLEs/s)")
+    if stats['hit_rate'] is not None:
+        print(f"♻️  Skipped {stats['unchanged']} unchanged TLEs "
+              f"(hash index hit rate {stats['hit_rate']:.1%})")
+    if stats['checksum_failures'] or stats['malformed'] or stats['errors']:
+        print(f"⚠️  Skipped {stats['checksum_failures']} checksum failures, "
+              f"{stats['malformed']} malformed entries, {stats['errors']} parse errors")
 
-        inserted += 1
+    return stats
 
-    except Exception as e:
-        print(f"❌ Error inserting satellite {i//3}: {e}")
-        session.rollback()
 
-session.commit()
-session.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load TLE snapshots into dev.tle_snapshots")
+    parser.add_argument('source', nargs='?', help="TLE file path, or '-' for stdin (default: CelesTrak)")
+    parser.add_argument('--batch-size', type=int, default=INGEST_BATCH_SIZE,
+                        help="rows per multi-row INSERT")
+    parser.add_argument('--store-unchanged', action='store_true',
+                        help="store TLEs even when identical to the latest stored TLE")
+    args = parser.parse_args()
 
-print(f"✅ TLE snapshot stored successfully. {inserted} entries attempted.")
+    load_satellites(args.source, args.batch_size, skip_unchanged=not args.store_unchanged)
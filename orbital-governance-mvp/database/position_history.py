@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Satellite Position History
+
+Propagates the current TLE of every satellite (dev.tle_latest) to a regular grid of epochs
+(every 60 s for the next 24 h by default) and stores the trajectories in
+dev.position_history:
+
+- One row per satellite per hour. The hour's samples are packed into a
+  single BYTEA of little-endian float32 (latitude, longitude, altitude)
+  triples, so a 24 h track is 24 rows instead of 1,440.
+- The table is range-partitioned by hour_start into daily partitions,
+  which are created on demand and dropped wholesale after
+  HISTORY_RETENTION_DAYS.
+
+The API (api/history_query.py) answers track and catalog-at-time-T queries
+from these rows without re-propagating.
+
+Usage:
+    python3 position_history.py [--hours 24] [--step 60]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from bulk_copy import copy_rows
+from propagation import epoch_arrays, parse_catalog, propagate_teme, teme_to_geodetic
+from tle_latest import ensure_latest_view
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+HISTORY_HOURS = int(os.getenv('HISTORY_HOURS', '24'))
+HISTORY_STEP_SECONDS = int(os.getenv('HISTORY_STEP_SECONDS', '60'))
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', '7'))
+
+HISTORY_COLUMNS = ['satellite_id', 'hour_start', 'snapshot_id', 'step_seconds', 'sample_count', 'samples']
+
+# float32 (latitude, longitude, altitude) per sample
+SAMPLE_DTYPE = np.dtype('<f4')
+SAMPLE_WIDTH = 3
+
+
+def ensure_history_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dev.position_history (
+            satellite_id TEXT NOT NULL,
+            hour_start TIMESTAMP NOT NULL,
+            snapshot_id BIGINT NOT NULL,
+            step_seconds SMALLINT NOT NULL,
+            sample_count SMALLINT NOT NULL,
+            samples BYTEA NOT NULL,
+            PRIMARY KEY (satellite_id, hour_start)
+        ) PARTITION BY RANGE (hour_start)
+    """)
+
+
+def partition_name(day):
+    return f"dev.position_history_{day:%Y%m%d}"
+
+
+def ensure_partitions(cur, start, end):
+    """Create the daily partitions covering [start, end)"""
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {partition_name(day)}
+            PARTITION OF dev.position_history
+            FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}')
+        """)
+        day += timedelta(days=1)
+
+
+def drop_expired_partitions(cur, now, retention_days=HISTORY_RETENTION_DAYS):
+    """Drop daily partitions that end before the retention cutoff"""
+    cutoff = (now - timedelta(days=retention_days)).strftime('%Y%m%d')
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        JOIN pg_namespace n ON n.oid = p.relnamespace
+        WHERE n.nspname = 'dev' AND p.relname = 'position_history'
+    """)
+    dropped = []
+    for (name,) in cur.fetchall():
+        if name[-8:].isdigit() and name[-8:] < cutoff:
+            cur.execute(f"DROP TABLE dev.{name}")
+            dropped.append(name)
+    return dropped
+
+
+def hour_grid(start, hours, step_seconds):
+    """Hour starts and the sample epochs within each hour"""
+    hour_starts = [start + timedelta(hours=h) for h in range(hours)]
+    offsets = [timedelta(seconds=s) for s in range(0, 3600, step_seconds)]
+    return hour_starts, offsets
+
+
+def pack_samples(lat, lon, alt):
+    """Pack (n, m) latitude/longitude/altitude arrays into n hex BYTEA literals"""
+    packed = np.stack([lat, lon, alt], axis=-1).astype(SAMPLE_DTYPE)
+    return ['\\x' + row.tobytes().hex() for row in packed]
+
+
+def iter_history_rows(keys, snapshot_ids, satrecs, hour_starts, offsets, step_seconds, stats):
+    """Propagate one hour at a time and yield HISTORY_COLUMNS rows"""
+    for hour_start in hour_starts:
+        epochs = [hour_start + offset for offset in offsets]
+        jd, fr, jd_ut1, fraction_ut1 = epoch_arrays(epochs)
+
+        started = time.perf_counter()
+        errors, r, _ = propagate_teme(satrecs, jd, fr)
+        lat, lon, alt = teme_to_geodetic(r, jd_ut1, fraction_ut1)
+        stats['propagation_elapsed'] += time.perf_counter() - started
+
+        # Failed samples are stored as NaN so sample positions stay aligned
+        failed = errors != 0
+        lat[failed] = lon[failed] = alt[failed] = np.nan
+        stats['failed_samples'] += int(failed.sum())
+
+        naive_hour = hour_start.replace(tzinfo=None)
+        for key, snapshot_id, samples in zip(keys, snapshot_ids, pack_samples(lat, lon, alt)):
+            yield key, naive_hour, snapshot_id, step_seconds, len(offsets), samples
+
+
+def record_history(hours=HISTORY_HOURS, step_seconds=HISTORY_STEP_SECONDS, start=None):
+    """Propagate the catalog over the window and replace its history rows"""
+    if 3600 % step_seconds:
+        raise ValueError("step_seconds must divide an hour evenly")
+
+    start = (start or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=hours)
+    stats = {'propagation_elapsed': 0.0, 'failed_samples': 0}
+    started = time.perf_counter()
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        ensure_latest_view(cur)
+        cur.execute("SELECT satellite_id, id, tle_line1, tle_line2 FROM dev.tle_latest ORDER BY satellite_id")
+        rows = cur.fetchall()
+        snapshot_of = {row[0]: row[1] for row in rows}
+        keys, satrecs, errors = parse_catalog((row[0], row[2], row[3]) for row in rows)
+        for key, e in errors:
+            print(f"⚠️  Error parsing TLE for {key}: {e}")
+        print(f"📡 Propagating {len(satrecs):,} satellites from {start:%Y-%m-%d %H:%M} UTC "
+              f"for {hours}h every {step_seconds}s...")
+
+        ensure_history_table(cur)
+        ensure_partitions(cur, start.replace(tzinfo=None), end.replace(tzinfo=None))
+        cur.execute("DELETE FROM dev.position_history WHERE hour_start >= %s AND hour_start < %s",
+                    (start.replace(tzinfo=None), end.replace(tzinfo=None)))
+
+        hour_starts, offsets = hour_grid(start, hours, step_seconds)
+        written = copy_rows(cur, 'dev.position_history', HISTORY_COLUMNS,
+                            iter_history_rows(keys, [snapshot_of[k] for k in keys], satrecs,
+                                              hour_starts, offsets, step_seconds, stats),
+                            batch_size=max(len(keys), 1))
+
+        dropped = drop_expired_partitions(cur, start.replace(tzinfo=None))
+        cur.execute("SELECT pg_notify('orbital_refresh', 'history')")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    samples = written * len(offsets)
+    print(f"✅ Stored {written:,} hourly rows ({samples:,} samples) in {elapsed:.1f}s "
+          f"(propagation {stats['propagation_elapsed']:.1f}s, {samples / elapsed:,.0f} samples/s)")
+    if stats['failed_samples']:
+        print(f"⚠️  {stats['failed_samples']:,} samples failed to propagate (stored as NaN)")
+    if dropped:
+        print(f"🧹 Dropped expired partitions: {', '.join(dropped)}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propagate and store satellite position history")
+    parser.add_argument('--hours', type=int, default=HISTORY_HOURS, help="window length in hours")
+    parser.add_argument('--step', type=int, default=HISTORY_STEP_SECONDS, help="sample spacing in seconds")
+    args = parser.parse_args()
+
+    try:
+        record_history(args.hours, args.step)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Batch SGP4 Propagation Engine
+
+Parses a whole TLE catalog into a single SatrecArray and propagates every
+satellite against one shared epoch array in a single vectorized call.
+
+Outputs are plain NumPy arrays (latitude, longitude, altitude, inclination,
+RAAN) so they can be handed straight to the database writer without
+building one Python object per satellite.
+
+TLEs are identified by tle_hash(), a content hash of the line pair.
+SatrecCache keeps parsed Satrec objects under that hash, so a long-running
+process (the scheduler, the API) parses each element set only once.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+from sgp4.api import Satrec, SatrecArray
+from sgp4.conveniences import jday_datetime
+from skyfield.api import load
+from skyfield.sgp4lib import theta_GMST1982
+
+# WGS84 ellipsoid (matches skyfield's wgs84 subpoint model)
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+_ts = None
+
+
+def get_timescale():
+    """Load the skyfield timescale once per process"""
+    global _ts
+    if _ts is None:
+        _ts = load.timescale()
+    return _ts
+
+
+def tle_hash(line1, line2):
+    """SHA-1 of a TLE line pair (trailing whitespace ignored)"""
+    return hashlib.sha1(f"{line1.rstrip()}\n{line2.rstrip()}".encode('ascii', 'replace')).hexdigest()
+
+
+class SatrecCache:
+    """LRU + TTL cache of parsed Satrec objects keyed by tle_hash()
+
+    The key covers the whole line pair, so a changed element set is always
+    parsed again, while an unchanged one is reused whatever snapshot row
+    it was read from.
+    """
+
+    def __init__(self, max_entries=50000, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, line1, line2):
+        key = tle_hash(line1, line2)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        satrec = Satrec.twoline2rv(line1, line2)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (satrec, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return satrec
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+def parse_catalog(rows, cache=None):
+    """Parse (key, line1, line2) rows into Satrec objects
+
+    Returns the keys that parsed successfully, their Satrec objects, and a
+    list of (key, error) tuples for rows that could not be parsed. With a
+    SatrecCache, unchanged TLEs reuse the Satrec parsed on an earlier call.
+    """
+    keys = []
+    satrecs = []
+    errors = []
+    parse = cache.get if cache is not None else Satrec.twoline2rv
+
+    for key, line1, line2 in rows:
+        try:
+            satrecs.append(parse(line1, line2))
+            keys.append(key)
+        except Exception as e:
+            errors.append((key, e))
+
+    return keys, satrecs, errors
+
+
+def epoch_arrays(when):
+    """Build SGP4 (UTC) and GMST (UT1) epoch arrays for one or more datetimes"""
+    if isinstance(when, datetime):
+        when = [when]
+    when = [w if w.tzinfo else w.replace(tzinfo=timezone.utc) for w in when]
+
+    jd = np.empty(len(when))
+    fr = np.empty(len(when))
+    for i, w in enumerate(when):
+        jd[i], fr[i] = jday_datetime(w)
+
+    t = get_timescale().from_datetimes(when)
+    return jd, fr, t.whole, t.ut1_fraction
+
+
+def teme_to_geodetic(r_teme, jd_ut1, fraction_ut1):
+    """Convert TEME positions (n, m, 3) in km to WGS84 latitude/longitude/altitude
+
+    `jd_ut1` and `fraction_ut1` have shape (m,), one entry per epoch.
+    """
+    theta, _ = theta_GMST1982(jd_ut1, fraction_ut1)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+
+    # Rotate TEME into the pseudo Earth-fixed frame (polar motion ignored)
+    x = cos_t * r_teme[..., 0] + sin_t * r_teme[..., 1]
+    y = -sin_t * r_teme[..., 0] + cos_t * r_teme[..., 1]
+    z = r_teme[..., 2]
+
+    lon = np.arctan2(y, x)
+    p = np.hypot(x, y)
+    lat = np.arctan2(z, p * (1 - WGS84_E2))
+
+    # A few fixed-point iterations converge to well below a millimetre in LEO
+    for _ in range(4):
+        sin_lat = np.sin(lat)
+        n = WGS84_A_KM / np.sqrt(1 - WGS84_E2 * sin_lat * sin_lat)
+        alt = p / np.cos(lat) - n
+        lat = np.arctan2(z, p * (1 - WGS84_E2 * n / (n + alt)))
+
+    sin_lat = np.sin(lat)
+    n = WGS84_A_KM / np.sqrt(1 - WGS84_E2 * sin_lat * sin_lat)
+    alt = p / np.cos(lat) - n
+
+    return np.degrees(lat), np.degrees(lon), alt
+
+
+def propagate_teme(satrecs, jd, fr):
+    """Propagate every satellite to every epoch in one SatrecArray call
+
+    Returns error codes (n, m), TEME positions (n, m, 3) and velocities
+    (n, m, 3) in km and km/s.
+    """
+    satrec_array = SatrecArray(satrecs)
+    return satrec_array.sgp4(jd, fr)
+
+
+def mean_raan(satrecs, jd, fr):
+    """Mean RAAN in degrees [0, 360) at (jd, fr), one per satellite
+
+    Advances each TLE's epoch node by the secular nodal rate SGP4 derives
+    at initialisation (J2 precession plus the smaller J4 term), so the
+    result tracks the orbit plane as it drifts after the TLE epoch.
+    """
+    count = len(satrecs)
+    nodeo = np.fromiter((s.nodeo for s in satrecs), dtype=float, count=count)
+    nodedot = np.fromiter((s.nodedot for s in satrecs), dtype=float, count=count)
+    epoch = np.fromiter((s.jdsatepoch for s in satrecs), dtype=float, count=count)
+    epoch_fraction = np.fromiter((s.jdsatepochF for s in satrecs), dtype=float, count=count)
+
+    # Minutes since each TLE epoch; nodedot is in radians per minute
+    minutes = ((jd - epoch) + (fr - epoch_fraction)) * 1440.0
+    return np.mod(np.degrees(nodeo + nodedot * minutes), 360.0)
+
+
+def osculating_raan(r_teme, v_teme):
+    """Osculating RAAN in degrees [0, 360) from TEME state vectors (..., 3)
+
+    The ascending node lies along z × h, where h = r × v is the orbit
+    normal; undefined (NaN) for equatorial orbits.
+    """
+    h = np.cross(r_teme, v_teme)
+    node_x, node_y = -h[..., 1], h[..., 0]
+    raan = np.mod(np.degrees(np.arctan2(node_y, node_x)), 360.0)
+    return np.where(np.hypot(node_x, node_y) > 1e-9 * np.linalg.norm(h, axis=-1), raan, np.nan)
+
+
+def propagate_catalog(satrecs, when=None):
+    """Propagate a parsed catalog to a single epoch
+
+    Returns a dict of per-satellite arrays (`latitude`, `longitude`,
+    `altitude`, `inclination`, mean `raan` and `raan_osculating` at the
+    epoch) plus an `ok` mask for satellites whose propagation succeeded,
+    along with timing information.
+    """
+    if when is None:
+        when = datetime.now(timezone.utc)
+
+    started = time.perf_counter()
+
+    jd, fr, jd_ut1, fraction_ut1 = epoch_arrays(when)
+    errors, r, v = propagate_teme(satrecs, jd, fr)
+
+    lat, lon, alt = teme_to_geodetic(r, jd_ut1, fraction_ut1)
+    inclination = np.degrees(np.fromiter((s.inclo for s in satrecs), dtype=float, count=len(satrecs)))
+    raan = mean_raan(satrecs, jd[0], fr[0])
+
+    ok = (errors[:, 0] == 0) & np.isfinite(alt[:, 0])
+    elapsed = time.perf_counter() - started
+
+    return {
+        'epoch': when,
+        'latitude': lat[:, 0],
+        'longitude': lon[:, 0],
+        'altitude': alt[:, 0],
+        'inclination': inclination,
+        'raan': raan,
+        'raan_osculating': osculating_raan(r[:, 0], v[:, 0]),
+        'error_code': errors[:, 0],
+        'ok': ok,
+        'elapsed': elapsed,
+        'satellites_per_second': len(satrecs) / elapsed if elapsed > 0 else float('inf'),
+    }
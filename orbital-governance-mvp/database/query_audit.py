@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Query Planner Audit
+
+Runs EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) on each of the project's hot
+queries and compares the result with a saved baseline:
+
+- timing regression: median execution time grew by more than --tolerance
+  (and by more than --min-delta-ms, so sub-millisecond noise is ignored)
+- plan regression: a relation is now read with a sequential scan that the
+  baseline answered from an index, or a baseline index is no longer used
+
+The /api/satellites variants are built with the API's own SatelliteQuery,
+so the audited SQL is exactly what the endpoint sends. Queries whose tables
+do not exist yet are skipped. Capture the baseline after applying the
+migrations in schema.py.
+
+Usage:
+    python3 query_audit.py --save-baseline   # record the current plans and timings
+    python3 query_audit.py                   # compare against the baseline (exit 1 on regressions)
+    python3 query_audit.py --only tracts_available --verbose
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+DEFAULT_BASELINE = os.getenv('QUERY_AUDIT_BASELINE',
+                             os.path.join(os.path.dirname(__file__), 'query_baseline.json'))
+
+# Representative parameter values resolved once per run
+SAMPLES = {
+    'tract_id': "SELECT tract_id FROM dev.tracts ORDER BY tract_id LIMIT 1",
+    'occupied_tract_id': """
+        SELECT tract_id FROM dev.tract_occupancy
+        WHERE tract_id IS NOT NULL GROUP BY tract_id ORDER BY COUNT(*) DESC LIMIT 1
+    """,
+    'satellite_id': "SELECT satellite_id FROM dev.tle_latest LIMIT 1",
+}
+
+
+class Sample:
+    """Placeholder for a parameter taken from SAMPLES"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+class AuditQuery:
+    """One known query: SQL, parameters and the tables it reads"""
+
+    def __init__(self, name, source, sql, params=(), tables=('dev.tle_latest',)):
+        self.name = name
+        self.source = source
+        self.sql = sql
+        self.params = params
+        self.tables = tables
+
+
+def satellite_feed_query(name, **args):
+    """An /api/satellites query built exactly as the endpoint builds it"""
+    from werkzeug.datastructures import MultiDict
+    from satellite_query import SatelliteQuery
+
+    query = SatelliteQuery(MultiDict(args))
+    return AuditQuery(name, 'api/app.py /api/satellites', query.sql(), tuple(query.params))
+
+
+def known_queries():
+    history_start = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    return [
+        AuditQuery('stats_total_tracts', 'api/app.py /api/stats',
+                   "SELECT COUNT(*) FROM dev.tracts", tables=('dev.tracts',)),
+        AuditQuery('stats_active_satellites', 'api/app.py /api/stats',
+                   "SELECT COUNT(*) FROM dev.tle_latest"),
+        AuditQuery('stats_occupied_tracts', 'api/app.py /api/stats',
+                   "SELECT COUNT(DISTINCT tract_id) FROM dev.tract_occupancy",
+                   tables=('dev.tract_occupancy',)),
+        satellite_feed_query('satellites_page', limit='500'),
+        satellite_feed_query('satellites_bbox', bbox='-10,35,30,60'),
+        satellite_feed_query('satellites_altitude', min_altitude='500', max_altitude='600'),
+        AuditQuery('tracts_available', 'api/app.py /api/tracts/available', """
+            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+            FROM dev.tracts
+            WHERE ST_MakeEnvelope(alt_min, inc_min, alt_max, inc_max) && ST_MakePoint(%s, %s)
+            AND %s BETWEEN alt_min AND alt_max
+            AND %s BETWEEN inc_min AND inc_max
+            AND NOT EXISTS (SELECT 1 FROM dev.tract_occupancy o WHERE o.tract_id = dev.tracts.tract_id)
+            LIMIT 10
+        """, (550.0, 53.0, 550.0, 53.0), ('dev.tracts', 'dev.tract_occupancy')),
+        AuditQuery('tract_by_id', 'api/app.py /api/satellites/register', """
+            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+            FROM dev.tracts WHERE tract_id = %s
+        """, (Sample('tract_id'),), ('dev.tracts',)),
+        AuditQuery('tract_occupants', 'api/app.py /api/tracts/<id>/occupants', """
+            SELECT o.satellite_id, l.name, o.altitude, o.inclination, o.raan, o.updated_at
+            FROM dev.tract_occupancy o
+            LEFT JOIN dev.tle_latest l ON l.satellite_id::text = o.satellite_id
+            WHERE o.tract_id = %s
+            ORDER BY COALESCE(l.name, ''), o.satellite_id
+        """, (Sample('occupied_tract_id'),), ('dev.tract_occupancy', 'dev.tle_latest')),
+        AuditQuery('latest_per_satellite', 'position_history.py, conjunction_screening.py', """
+            SELECT DISTINCT ON (satellite_id) satellite_id, name, tle_line1, tle_line2
+            FROM dev.tle_snapshots
+            ORDER BY satellite_id, id DESC
+        """, tables=('dev.tle_snapshots',)),
+        AuditQuery('pending_positions', 'calculate_positions.py', """
+            SELECT id, tle_line1, tle_line2, name, satellite_id
+            FROM dev.tle_snapshots
+            WHERE position IS NULL OR raan IS NULL
+            ORDER BY id
+        """, tables=('dev.tle_snapshots',)),
+        AuditQuery('leo_satellites', 'validate_system.py, test_spatial_accuracy.py', """
+            SELECT name, altitude, inclination, raan
+            FROM dev.tle_latest
+            WHERE position IS NOT NULL
+            AND raan IS NOT NULL
+            AND altitude BETWEEN 200 AND 2000
+        """),
+        AuditQuery('leo_tracts', 'test_spatial_accuracy.py', """
+            SELECT tract_id, alt_min, alt_max, inc_min, inc_max, az_min, az_max
+            FROM dev.tracts
+            WHERE orbit_zone = 'LEO'
+        """, tables=('dev.tracts',)),
+        AuditQuery('shell_point', 'validate_system.py test_point_in_shell', """
+            SELECT v.tract_id
+            FROM dev.tract_volumetric_shells v
+            WHERE ST_MakeEnvelope(v.alt_min, v.inc_min, v.alt_max, v.inc_max) && ST_MakePoint(%s, %s)
+            AND %s BETWEEN v.alt_min AND v.alt_max
+            AND %s BETWEEN v.inc_min AND v.inc_max
+            AND %s BETWEEN v.raan_min AND v.raan_max
+            AND ST_Contains(v.geom, ST_MakePoint(%s, %s, %s))
+        """, (400.0, 45.0, 400.0, 45.0, 90.0, 90.0, 45.0, 400.0), ('dev.tract_volumetric_shells',)),
+        AuditQuery('satellite_track', 'history_query.py satellite_track', """
+            SELECT hour_start, step_seconds, samples
+            FROM dev.position_history
+            WHERE satellite_id = %s
+            AND hour_start >= %s AND hour_start < %s
+            ORDER BY hour_start
+        """, (Sample('satellite_id'), history_start, history_start + timedelta(hours=2)),
+            ('dev.position_history',)),
+    ]
+
+
+def walk_plan(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk_plan(child)
+
+
+def summarize_plan(explain):
+    """Timing, cost and access paths from one EXPLAIN (FORMAT JSON) result"""
+    result = explain[0]
+    root = result['Plan']
+    nodes = list(walk_plan(root))
+    return {
+        'execution_ms': result.get('Execution Time'),
+        'planning_ms': result.get('Planning Time'),
+        'total_cost': root.get('Total Cost'),
+        'rows': root.get('Actual Rows'),
+        'node_types': sorted({node['Node Type'] for node in nodes}),
+        'seq_scans': sorted({node['Relation Name'] for node in nodes
+                             if node['Node Type'] == 'Seq Scan' and 'Relation Name' in node}),
+        'indexes': sorted({node['Index Name'] for node in nodes if 'Index Name' in node}),
+        'shared_hit_blocks': root.get('Shared Hit Blocks'),
+        'shared_read_blocks': root.get('Shared Read Blocks'),
+    }
+
+
+def compare(baseline, current, tolerance=0.5, min_delta_ms=2.0):
+    """List of regression messages for one query (empty when it is fine)"""
+    problems = []
+    before, after = baseline['execution_ms'], current['execution_ms']
+    if before is not None and after is not None:
+        if after > before * (1 + tolerance) and after - before > min_delta_ms:
+            problems.append(f"execution {before:.1f} → {after:.1f} ms (+{(after / before - 1) * 100:.0f}%)"
+                            if before > 0 else f"execution {before:.1f} → {after:.1f} ms")
+
+    new_seq = sorted(set(current['seq_scans']) - set(baseline['seq_scans']))
+    if new_seq:
+        problems.append(f"new sequential scan on {', '.join(new_seq)}")
+    lost = sorted(set(baseline['indexes']) - set(current['indexes']))
+    if lost:
+        problems.append(f"no longer uses {', '.join(lost)}")
+    return problems
+
+
+def resolve_samples(cur):
+    values = {}
+    for name, sql in SAMPLES.items():
+        try:
+            cur.execute(sql)
+            row = cur.fetchone()
+            values[name] = row[0] if row else None
+        except Exception:
+            cur.connection.rollback()
+            values[name] = None
+    return values
+
+
+def table_exists(cur, table):
+    cur.execute("SELECT to_regclass(%s)", (table,))
+    return cur.fetchone()[0] is not None
+
+
+def audit_query(cur, query, samples, runs=3):
+    """Median-of-`runs` EXPLAIN ANALYZE summary, or None when it cannot run"""
+    params = tuple(samples.get(p.name) if isinstance(p, Sample) else p for p in query.params)
+    summaries = []
+    for _ in range(runs):
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query.sql, params)
+        explain = cur.fetchone()[0]
+        if isinstance(explain, str):
+            explain = json.loads(explain)
+        summaries.append(summarize_plan(explain))
+    # Read-only, but never leave anything behind
+    cur.connection.rollback()
+
+    summary = summaries[-1]
+    summary['execution_ms'] = statistics.median(s['execution_ms'] for s in summaries)
+    summary['planning_ms'] = statistics.median(s['planning_ms'] for s in summaries)
+    return summary
+
+
+def run_audit(names=None, runs=3):
+    """Summaries for every known query that can run against this database"""
+    conn = engine.raw_connection()
+    results = {}
+    try:
+        cur = conn.cursor()
+        samples = resolve_samples(cur)
+        for query in known_queries():
+            if names and query.name not in names:
+                continue
+            missing = [t for t in query.tables if not table_exists(cur, t)]
+            if missing:
+                print(f"⏭️  {query.name}: skipped ({', '.join(missing)} missing)")
+                continue
+            try:
+                results[query.name] = audit_query(cur, query, samples, runs)
+                results[query.name]['source'] = query.source
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ {query.name}: {e}")
+    finally:
+        conn.close()
+    return results
+
+
+def print_summary(name, summary, verbose=False):
+    indexes = ', '.join(summary['indexes']) or '-'
+    seq = ', '.join(summary['seq_scans']) or '-'
+    print(f"   {name:<26} {summary['execution_ms']:>9.2f} ms  rows={summary['rows']}  "
+          f"index: {indexes}  seq: {seq}")
+    if verbose:
+        print(f"      {summary['source']}: nodes {', '.join(summary['node_types'])}, "
+              f"cost {summary['total_cost']}, planning {summary['planning_ms']:.2f} ms, "
+              f"buffers hit {summary['shared_hit_blocks']} read {summary['shared_read_blocks']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the project's hot queries")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON path")
+    parser.add_argument('--save-baseline', action='store_true', help="write the current results as the baseline")
+    parser.add_argument('--runs', type=int, default=3, help="EXPLAIN ANALYZE runs per query (median is kept)")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="allowed relative slowdown")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument('--only', nargs='+', help="audit only these query names")
+    parser.add_argument('--verbose', action='store_true', help="print plan details")
+    args = parser.parse_args()
+
+    print("🔬 Auditing query plans...")
+    try:
+        results = run_audit(args.only, args.runs)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+        sys.exit(2)
+
+    print(f"\n📊 Current plans:")
+    for name, summary in results.items():
+        print_summary(name, summary, args.verbose)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'captured_at': datetime.now(timezone.utc).isoformat(), 'queries': results}, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No baseline at {args.baseline}; run with --save-baseline first")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\n🔍 Compared with baseline from {baseline['captured_at']}:")
+
+    regressions = 0
+    for name, summary in results.items():
+        before = baseline['queries'].get(name)
+        if before is None:
+            print(f"   🆕 {name}: not in baseline")
+            continue
+        problems = compare(before, summary, args.tolerance, args.min_delta_ms)
+        if problems:
+            regressions += 1
+            print(f"   ❌ {name}: {'; '.join(problems)}")
+        else:
+            print(f"   ✅ {name}: {before['execution_ms']:.2f} → {summary['execution_ms']:.2f} ms")
+
+    if regressions:
+        print(f"\n⚠️  {regressions} quer{'y' if regressions == 1 else 'ies'} regressed")
+        sys.exit(1)
+    print(f"\n✅ No plan or timing regressions")
+
+
+if __name__ == "__main__":
+    main()
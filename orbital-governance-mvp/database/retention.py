@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+TLE Snapshot Retention
+
+Keeps dev.tle_snapshots from growing by a full catalog per load forever:
+
+- The table is range-partitioned by timestamp_collected into daily
+  partitions (dev.tle_snapshots_YYYYMMDD). --partition converts an existing
+  plain table once; the loader creates the day's partition before inserting.
+- Days older than TLE_DOWNSAMPLE_DAYS are downsampled to one TLE per
+  satellite (the latest positioned one, so the rows dev.tle_latest and
+  dev.tract_occupancy point at survive). The kept rows are copied into a new
+  table that is swapped in for the partition, so nothing is row-deleted.
+- Days older than TLE_RETENTION_DAYS are dropped as whole partitions. The
+  loader does not store unchanged TLEs again, so a satellite's current
+  snapshot can be older than that; rows dev.tle_hash_index still points at
+  for satellites seen within the window are first moved into the default
+  partition dev.tle_snapshots_carried, which no daily partition covers.
+  Carried rows are deleted once their satellite gets a newer snapshot or is
+  no longer seen within the window.
+
+Each partition is swapped or dropped in its own short transaction, so
+ingestion is only blocked for a moment. dev.tle_latest is refreshed at the
+end (re-created when the conversion replaces the table it reads from) and
+the reclaimed space is reported.
+
+Usage:
+    python3 retention.py               # downsample and drop old partitions
+    python3 retention.py --partition   # one-off: convert dev.tle_snapshots to daily partitions
+    python3 retention.py --status      # list partitions with row estimates and sizes
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+
+from schema import ORBIT_BINS_INDEX, ensure_indexes
+from tle_hash_index import ensure_hash_index, prune_hash_index
+from tle_latest import ensure_latest_view, refresh_latest_view
+from tract_occupancy import remove_departed
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+SNAPSHOT_TABLE = 'dev.tle_snapshots'
+CARRIED_TABLE = 'dev.tle_snapshots_carried'
+
+TLE_RETENTION_DAYS = int(os.getenv('TLE_RETENTION_DAYS', '90'))
+TLE_DOWNSAMPLE_DAYS = int(os.getenv('TLE_DOWNSAMPLE_DAYS', '7'))
+TLE_PARTITION_AHEAD_DAYS = int(os.getenv('TLE_PARTITION_AHEAD_DAYS', '2'))
+
+# Table comment marking a partition that already holds one TLE per satellite
+DOWNSAMPLED = 'downsampled'
+
+
+def utc_day(moment):
+    """Midnight UTC of a datetime, as a naive datetime"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(day):
+    return f"{SNAPSHOT_TABLE}_{day:%Y%m%d}"
+
+
+def partition_bounds(day):
+    # Explicit UTC offset: the same day boundaries whether timestamp_collected
+    # is TIMESTAMP or TIMESTAMPTZ
+    return (f"FROM ('{day:%Y-%m-%d} 00:00:00+00') "
+            f"TO ('{day + timedelta(days=1):%Y-%m-%d} 00:00:00+00')")
+
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(size) < 1024 or unit == 'GiB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def is_partitioned(cur):
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (SNAPSHOT_TABLE,))
+    row = cur.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def ensure_snapshot_partitions(cur, start, days=1):
+    """Create the daily partitions for `days` days from `start`
+
+    A no-op while dev.tle_snapshots is a plain table, so the loader can
+    call it unconditionally.
+    """
+    if not is_partitioned(cur):
+        return
+    day = utc_day(start)
+    for _ in range(days):
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {partition_name(day)}
+            PARTITION OF {SNAPSHOT_TABLE} {partition_bounds(day)}
+        """)
+        day += timedelta(days=1)
+
+
+def ensure_carried_partition(cur):
+    """Create the default partition that holds snapshots carried past their day"""
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {CARRIED_TABLE} PARTITION OF {SNAPSHOT_TABLE} DEFAULT")
+
+
+def list_partitions(cur):
+    """(day, table, estimated rows, bytes, downsampled) per daily partition"""
+    cur.execute("""
+        SELECT c.relname, c.reltuples, pg_total_relation_size(c.oid),
+               obj_description(c.oid, 'pg_class')
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, (SNAPSHOT_TABLE,))
+    partitions = []
+    for name, rows, size, comment in cur.fetchall():
+        suffix = name[-8:]
+        if suffix.isdigit():
+            day = datetime.strptime(suffix, '%Y%m%d')
+            partitions.append((day, f"dev.{name}", max(int(rows), 0), size, comment == DOWNSAMPLED))
+    return partitions
+
+
+def snapshot_bytes(cur):
+    """Total size of dev.tle_snapshots and all of its partitions, indexes included"""
+    cur.execute("""
+        SELECT COALESCE(SUM(pg_total_relation_size(relid)), 0)
+        FROM pg_partition_tree(to_regclass(%s))
+    """, (SNAPSHOT_TABLE,))
+    return int(cur.fetchone()[0])
+
+
+def snapshot_columns(cur):
+    cur.execute("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'dev' AND table_name = 'tle_snapshots'
+        ORDER BY ordinal_position
+    """)
+    return [row[0] for row in cur.fetchall()]
+
+
+def swap_partition(cur, day, columns, keep, params=()):
+    """Swap one daily partition for a copy of its rows matching `keep`
+
+    `keep` is a WHERE condition over the partition's rows. A partition with
+    nothing to keep is dropped outright. Returns (rows before, rows kept).
+    """
+    name = partition_name(day)
+    compact = f"{name}_compact"
+    column_list = ', '.join(columns)
+
+    cur.execute(f"SELECT COUNT(*) FROM {name}")
+    before = cur.fetchone()[0]
+    cur.execute(f"DROP TABLE IF EXISTS {compact}")
+    cur.execute(f"CREATE TABLE {compact} (LIKE {SNAPSHOT_TABLE} INCLUDING DEFAULTS)")
+    cur.execute(f"""
+        INSERT INTO {compact} ({column_list})
+        SELECT {column_list} FROM {name} WHERE {keep}
+    """, params)
+    kept = cur.rowcount
+
+    if kept == 0:
+        cur.execute(f"DROP TABLE {compact}")
+        cur.execute(f"DROP TABLE {name}")
+        return before, kept
+    if kept < before:
+        cur.execute(f"ALTER TABLE {SNAPSHOT_TABLE} DETACH PARTITION {name}")
+        cur.execute(f"DROP TABLE {name}")
+        cur.execute(f"ALTER TABLE {compact} RENAME TO {name.split('.')[1]}")
+        # Attaching builds the partition's share of the parent's indexes
+        cur.execute(f"ALTER TABLE {SNAPSHOT_TABLE} ATTACH PARTITION {name} {partition_bounds(day)}")
+    else:
+        cur.execute(f"DROP TABLE {compact}")
+    cur.execute(f"COMMENT ON TABLE {name} IS '{DOWNSAMPLED}'")
+    return before, kept
+
+
+def downsample_partition(cur, day, columns):
+    """Keep one TLE per satellite (plus any snapshot the hash index points at)"""
+    name = partition_name(day)
+    return swap_partition(cur, day, columns, f"""
+        id IN (SELECT DISTINCT ON (satellite_id) id FROM {name}
+               ORDER BY satellite_id, (position IS NULL), timestamp_collected DESC, id DESC)
+        OR id IN (SELECT snapshot_id FROM dev.tle_hash_index)
+    """)
+
+
+def expire_partition(cur, day, columns, cutoff):
+    """Drop a partition, carrying over current snapshots of satellites seen since `cutoff`
+
+    The partition is detached first, so re-inserting its kept rows through
+    the parent routes them to the default partition. Returns (rows before,
+    rows carried over).
+    """
+    name = partition_name(day)
+    column_list = ', '.join(columns)
+
+    cur.execute(f"SELECT COUNT(*) FROM {name}")
+    before = cur.fetchone()[0]
+    cur.execute(f"ALTER TABLE {SNAPSHOT_TABLE} DETACH PARTITION {name}")
+    cur.execute(f"""
+        INSERT INTO {SNAPSHOT_TABLE} ({column_list}) OVERRIDING SYSTEM VALUE
+        SELECT {column_list} FROM {name}
+        WHERE id IN (SELECT snapshot_id FROM dev.tle_hash_index WHERE last_seen >= %s)
+    """, (cutoff,))
+    carried = cur.rowcount
+    cur.execute(f"DROP TABLE {name}")
+    return before, carried
+
+
+def prune_carried(cur, cutoff):
+    """Delete carried snapshots that are no longer current or no longer seen since `cutoff`"""
+    cur.execute(f"""
+        DELETE FROM {CARRIED_TABLE} c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM dev.tle_hash_index h
+            WHERE h.snapshot_id = c.id AND h.last_seen >= %s
+        )
+    """, (cutoff,))
+    return cur.rowcount
+
+
+def apply_retention(retention_days=TLE_RETENTION_DAYS, downsample_days=TLE_DOWNSAMPLE_DAYS):
+    """Drop partitions past `retention_days` and downsample those past `downsample_days`
+
+    Returns a stats dict; 'partitioned' is False (and nothing is changed)
+    while dev.tle_snapshots is still a plain table.
+    """
+    if retention_days < 1:
+        raise ValueError("retention_days must be at least 1")
+
+    today = utc_day(datetime.now(timezone.utc))
+    drop_before = today - timedelta(days=retention_days)
+    downsample_before = today - timedelta(days=downsample_days)
+    stats = {'partitioned': True, 'dropped': [], 'downsampled': 0, 'rows_removed': 0, 'carried_over': 0,
+             'bytes_before': 0, 'bytes_after': 0, 'reclaimed': 0, 'current': None}
+    started = time.perf_counter()
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if not is_partitioned(cur):
+            stats['partitioned'] = False
+            return stats
+
+        stats['bytes_before'] = snapshot_bytes(cur)
+        ensure_snapshot_partitions(cur, today, TLE_PARTITION_AHEAD_DAYS + 1)
+        ensure_carried_partition(cur)
+        ensure_hash_index(cur)
+        columns = snapshot_columns(cur)
+        partitions = list_partitions(cur)
+        conn.commit()
+
+        for day, name, _, size, downsampled in partitions:
+            if day < drop_before:
+                before, carried = expire_partition(cur, day, columns, drop_before)
+                conn.commit()
+                stats['dropped'].append(name)
+                stats['rows_removed'] += before - carried
+                stats['carried_over'] += carried
+                print(f"🗑️  Dropped {name} ({format_size(size)})"
+                      + (f", {carried:,} current snapshots carried over" if carried else ""))
+            elif day < downsample_before and not downsampled:
+                before, kept = downsample_partition(cur, day, columns)
+                conn.commit()
+                stats['downsampled'] += 1
+                stats['rows_removed'] += before - kept
+                print(f"🗜️  Downsampled {name}: {before:,} → {kept:,} rows")
+
+        superseded = prune_carried(cur, drop_before)
+        stats['rows_removed'] += superseded
+        forgotten = prune_hash_index(cur)
+        stats['current'] = refresh_latest_view(cur)
+        departed = remove_departed(cur)
+        stats['bytes_after'] = snapshot_bytes(cur)
+        cur.execute("SELECT pg_notify('orbital_refresh', 'retention')")
+        if superseded:
+            print(f"🗑️  Removed {superseded:,} carried snapshots that are no longer current")
+        if forgotten:
+            print(f"🧮 Removed {forgotten:,} expired satellites from the hash index")
+        if departed:
+            print(f"🗺️  Removed {departed:,} expired satellites from the occupancy index")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    stats['reclaimed'] = stats['bytes_before'] - stats['bytes_after']
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def partition_table():
+    """Convert a plain dev.tle_snapshots into daily partitions
+
+    Rows are copied into a new partitioned table under an EXCLUSIVE lock
+    (reads continue, loads wait), which is then renamed into place. The id
+    sequence moves to the new table; uniqueness of (satellite_id,
+    timestamp_collected) is kept for the loader's ON CONFLICT, while id is
+    indexed but no longer constrained (a partitioned unique key must include
+    the partition column). Dropping the old table drops dev.tle_latest with
+    it, so the view and the managed indexes are re-created in the same
+    transaction. Returns (rows copied, bytes before, bytes after).
+    """
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if is_partitioned(cur):
+            return None
+
+        staging = f"{SNAPSHOT_TABLE}_partitioned"
+        cur.execute(f"LOCK TABLE {SNAPSHOT_TABLE} IN EXCLUSIVE MODE")
+        bytes_before = snapshot_bytes(cur)
+        cur.execute(f"SELECT MIN(timestamp_collected) FROM {SNAPSHOT_TABLE}")
+        first = cur.fetchone()[0] or datetime.now(timezone.utc)
+        cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (SNAPSHOT_TABLE,))
+        sequence = cur.fetchone()[0]
+        cur.execute("""
+            SELECT attidentity <> '' FROM pg_attribute
+            WHERE attrelid = to_regclass(%s) AND attname = 'id'
+        """, (SNAPSHOT_TABLE,))
+        identity = cur.fetchone()[0]
+
+        cur.execute(f"""
+            CREATE TABLE {staging}
+            (LIKE {SNAPSHOT_TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY)
+            PARTITION BY RANGE (timestamp_collected)
+        """)
+        cur.execute(f"ALTER TABLE {staging} ADD UNIQUE (satellite_id, timestamp_collected)")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_tle_snapshots_id ON {staging} (id)")
+
+        today = utc_day(datetime.now(timezone.utc))
+        day = utc_day(first)
+        while day <= today + timedelta(days=TLE_PARTITION_AHEAD_DAYS):
+            cur.execute(f"""
+                CREATE TABLE {partition_name(day)}
+                PARTITION OF {staging} {partition_bounds(day)}
+            """)
+            day += timedelta(days=1)
+
+        column_list = ', '.join(snapshot_columns(cur))
+        overriding = "OVERRIDING SYSTEM VALUE" if identity else ""
+        cur.execute(f"""
+            INSERT INTO {staging} ({column_list}) {overriding}
+            SELECT {column_list} FROM {SNAPSHOT_TABLE}
+        """)
+        copied = cur.rowcount
+
+        if identity:
+            cur.execute(f"""
+                SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false)
+                FROM {staging}
+            """, (staging,))
+        elif sequence:
+            cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY {staging}.id")
+
+        cur.execute(f"ALTER TABLE {SNAPSHOT_TABLE} RENAME TO tle_snapshots_unpartitioned")
+        cur.execute(f"ALTER TABLE {staging} RENAME TO tle_snapshots")
+        # CASCADE takes dev.tle_latest with it; it is rebuilt below
+        cur.execute("DROP TABLE dev.tle_snapshots_unpartitioned CASCADE")
+
+        created = ensure_indexes(cur)
+        cur.execute(ORBIT_BINS_INDEX)
+        ensure_latest_view(cur)
+        refresh_latest_view(cur)
+        bytes_after = snapshot_bytes(cur)
+        cur.execute(f"ANALYZE {SNAPSHOT_TABLE}")
+        cur.execute("SELECT pg_notify('orbital_refresh', 'retention')")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if created:
+        print(f"🗄️  Re-created indexes: {', '.join(created)}")
+    return copied, bytes_before, bytes_after
+
+
+def show_status():
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        if not is_partitioned(cur):
+            print(f"ℹ️  {SNAPSHOT_TABLE} is not partitioned ({format_size(snapshot_bytes(cur))}); "
+                  f"run retention.py --partition once")
+            return
+        partitions = list_partitions(cur)
+        total = snapshot_bytes(cur)
+    finally:
+        conn.close()
+
+    print(f"\n📋 {SNAPSHOT_TABLE}: {len(partitions)} daily partitions, {format_size(total)}")
+    for day, name, rows, size, downsampled in partitions:
+        note = " (downsampled)" if downsampled else ""
+        print(f"   {day:%Y-%m-%d}  ~{rows:>9,} rows  {format_size(size):>11}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition, downsample and expire TLE snapshot history")
+    parser.add_argument('--partition', action='store_true',
+                        help="convert dev.tle_snapshots to daily partitions (one-off)")
+    parser.add_argument('--status', action='store_true', help="list partitions and their sizes")
+    parser.add_argument('--retention-days', type=int, default=TLE_RETENTION_DAYS,
+                        help="drop partitions older than this many days")
+    parser.add_argument('--downsample-days', type=int, default=TLE_DOWNSAMPLE_DAYS,
+                        help="keep one TLE per satellite per day beyond this many days")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            show_status()
+            return
+
+        if args.partition:
+            print(f"🗂️  Converting {SNAPSHOT_TABLE} to daily partitions...")
+            result = partition_table()
+            if result is None:
+                print(f"✅ {SNAPSHOT_TABLE} is already partitioned")
+                return
+            copied, before, after = result
+            print(f"✅ Copied {copied:,} snapshots into daily partitions "
+                  f"({format_size(before)} → {format_size(after)})")
+
+        print(f"🧹 Applying retention: downsample after {args.downsample_days} days, "
+              f"drop after {args.retention_days} days...")
+        stats = apply_retention(args.retention_days, args.downsample_days)
+        if not stats['partitioned']:
+            print(f"ℹ️  {SNAPSHOT_TABLE} is not partitioned; run retention.py --partition once")
+            return
+        print(f"✅ Retention done in {stats['elapsed']:.1f}s: {len(stats['dropped'])} partitions dropped, "
+              f"{stats['downsampled']} downsampled ({stats['rows_removed']:,} rows removed, "
+              f"{stats['carried_over']:,} current snapshots carried over), "
+              f"{stats['current']:,} current satellites")
+        print(f"💾 Reclaimed {format_size(stats['reclaimed'])} "
+              f"({format_size(stats['bytes_before'])} → {format_size(stats['bytes_after'])})")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+
+
+if __name__ == "__main__":
+    main()
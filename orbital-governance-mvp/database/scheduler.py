@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Pipeline Scheduler
+
+Long-running worker that keeps the database current without manual runs of
+load_satellites.py and calculate_positions.py:
+
+- ingest: fetches the TLE catalog every SCHEDULER_INGEST_SECONDS. TLEs whose
+  line pair hashes to a stored TLE (dev.tle_hash_index) are skipped, and new
+  ones are positioned straight away.
+- positions: re-propagates the latest snapshot of every satellite every
+  SCHEDULER_POSITIONS_SECONDS so /api/satellites keeps moving.
+- history: rebuilds dev.position_history every SCHEDULER_HISTORY_SECONDS
+  (0, the default, disables it).
+- retention: downsamples and drops old dev.tle_snapshots partitions every
+  SCHEDULER_RETENTION_SECONDS (see retention.py).
+
+Each run holds a PostgreSQL advisory lock for its job, so a second scheduler
+process can never run the same job concurrently; a busy job is skipped until
+its next slot. A run that outlasts its interval is followed by the next one
+immediately rather than by a burst of catch-up runs. Every run is recorded
+in dev.scheduler_runs (surfaced by /api/metrics), and a successful run sends
+NOTIFY orbital_refresh so API processes drop their caches.
+
+Usage:
+    python3 scheduler.py         # run until interrupted
+    python3 scheduler.py --once  # run every enabled job once and exit
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+
+from calculate_positions import calculate_satellite_positions
+from load_satellites import load_satellites
+from position_history import record_history
+from retention import apply_retention, format_size
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+SCHEDULER_INGEST_SECONDS = int(os.getenv('SCHEDULER_INGEST_SECONDS', '7200'))
+SCHEDULER_POSITIONS_SECONDS = int(os.getenv('SCHEDULER_POSITIONS_SECONDS', '300'))
+SCHEDULER_HISTORY_SECONDS = int(os.getenv('SCHEDULER_HISTORY_SECONDS', '0'))
+SCHEDULER_RETENTION_SECONDS = int(os.getenv('SCHEDULER_RETENTION_SECONDS', '86400'))
+# TLE file for offline runs; CelesTrak when unset
+SCHEDULER_TLE_SOURCE = os.getenv('SCHEDULER_TLE_SOURCE') or None
+
+# Advisory locks are keyed by hashtext() of this prefix plus the job name
+LOCK_PREFIX = 'orbital_scheduler:'
+
+
+class Job:
+    """One pipeline step with its cadence and run-duration metrics"""
+
+    def __init__(self, name, interval, action):
+        self.name = name
+        self.interval = interval
+        self.action = action
+        self.next_run = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.last_duration = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self._running = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def due(self, now):
+        return self.enabled and now >= self.next_run
+
+    def record(self, started, duration, failed):
+        self.runs += 1
+        self.failures += int(failed)
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+
+        # Fixed cadence, but never schedule a run in the past
+        self.next_run = started + self.interval
+        if duration > self.interval:
+            self.overruns += 1
+            self.next_run = time.monotonic()
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'overruns': self.overruns,
+            'last_seconds': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'avg_seconds': round(self.total_duration / self.runs, 3) if self.runs else None,
+            'max_seconds': round(self.max_duration, 3),
+        }
+
+
+def ensure_runs_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dev.scheduler_runs (
+            id BIGSERIAL PRIMARY KEY,
+            job TEXT NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            duration_seconds DOUBLE PRECISION,
+            status TEXT NOT NULL,
+            detail TEXT
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job_started
+        ON dev.scheduler_runs (job, started_at DESC)
+    """)
+
+
+def ingest_tles():
+    """Load the catalog, skipping unchanged TLEs, and position what is new"""
+    stats = load_satellites(SCHEDULER_TLE_SOURCE, skip_unchanged=True)
+    positioned = calculate_satellite_positions() if stats['inserted'] else 0
+    hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else "n/a"
+    return (f"{stats['inserted']} new, {stats['unchanged']} unchanged (hit rate {hit_rate}), "
+            f"{positioned} positioned")
+
+
+def recompute_positions():
+    """Re-propagate the latest snapshot of every satellite to now"""
+    return f"{calculate_satellite_positions(recompute_latest=True)} positioned"
+
+
+def rebuild_history():
+    return f"{record_history()} hourly rows"
+
+
+def expire_snapshots():
+    """Downsample and drop old TLE snapshot partitions"""
+    stats = apply_retention()
+    if not stats['partitioned']:
+        return "dev.tle_snapshots is not partitioned (run retention.py --partition)"
+    return (f"{len(stats['dropped'])} dropped, {stats['downsampled']} downsampled, "
+            f"{format_size(stats['reclaimed'])} reclaimed")
+
+
+def build_jobs():
+    return [
+        Job('ingest', SCHEDULER_INGEST_SECONDS, ingest_tles),
+        Job('positions', SCHEDULER_POSITIONS_SECONDS, recompute_positions),
+        Job('history', SCHEDULER_HISTORY_SECONDS, rebuild_history),
+        Job('retention', SCHEDULER_RETENTION_SECONDS, expire_snapshots),
+    ]
+
+
+def run_job(job):
+    """Run one job under its advisory lock; returns 'ok', 'failed' or 'skipped'"""
+    if not job._running.acquire(blocking=False):
+        job.skipped += 1
+        return 'skipped'
+
+    conn = engine.raw_connection()
+    locked = False
+    try:
+        cur = conn.cursor()
+        ensure_runs_table(cur)
+        started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (LOCK_PREFIX + job.name,))
+        locked = cur.fetchone()[0]
+
+        if not locked:
+            job.skipped += 1
+            print(f"⏭️  {job.name}: another run holds the lock, skipping")
+            cur.execute("""
+                INSERT INTO dev.scheduler_runs (job, started_at, status, detail)
+                VALUES (%s, %s, 'skipped', 'locked by another run')
+            """, (job.name, started_at))
+            conn.commit()
+            job.next_run = time.monotonic() + job.interval
+            return 'skipped'
+        conn.commit()
+
+        print(f"\n▶️  {job.name} started at {started_at:%Y-%m-%d %H:%M:%S} UTC")
+        started = time.monotonic()
+        try:
+            detail = job.action()
+            status = 'ok'
+        except Exception as e:
+            detail = str(e)
+            status = 'failed'
+        duration = time.monotonic() - started
+        job.record(started, duration, status == 'failed')
+
+        cur.execute("""
+            INSERT INTO dev.scheduler_runs (job, started_at, duration_seconds, status, detail)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (job.name, started_at, duration, status, detail))
+        if status == 'ok':
+            cur.execute("SELECT pg_notify('orbital_refresh', %s)", (f"scheduler:{job.name}",))
+        conn.commit()
+    finally:
+        if locked:
+            # Session-level lock: returning the connection to the pool would keep it held
+            try:
+                conn.rollback()
+                conn.cursor().execute("SELECT pg_advisory_unlock(hashtext(%s))", (LOCK_PREFIX + job.name,))
+                conn.commit()
+            except Exception as e:
+                print(f"⚠️  {job.name}: could not release the advisory lock, discarding the connection: {e}")
+                conn.invalidate()
+        conn.close()
+        job._running.release()
+
+    stats = job.stats()
+    icon = '✅' if status == 'ok' else '❌'
+    print(f"{icon} {job.name} {status} in {duration:.1f}s: {detail}")
+    print(f"⏱️  {job.name}: avg {stats['avg_seconds']:.1f}s, max {stats['max_seconds']:.1f}s, "
+          f"{stats['runs']} runs, {stats['failures']} failed, {stats['skipped']} skipped, "
+          f"{stats['overruns']} overran")
+    if duration > job.interval:
+        print(f"⚠️  {job.name} took longer than its {job.interval}s interval")
+    return status
+
+
+def run_forever(jobs, stop):
+    """Run due jobs in order until `stop` is set"""
+    enabled = [job for job in jobs if job.enabled]
+    for job in enabled:
+        print(f"🗓️  {job.name} every {job.interval}s")
+
+    while not stop.is_set():
+        for job in enabled:
+            if stop.is_set():
+                break
+            if job.due(time.monotonic()):
+                try:
+                    run_job(job)
+                except Exception as e:
+                    # Database unreachable: retry at the next slot
+                    job.failures += 1
+                    job.next_run = time.monotonic() + job.interval
+                    print(f"❌ {job.name}: {e}")
+
+        wait = min(job.next_run for job in enabled) - time.monotonic()
+        stop.wait(max(wait, 1.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the TLE ingest and position pipeline on a schedule")
+    parser.add_argument('--once', action='store_true', help="run every enabled job once and exit")
+    args = parser.parse_args()
+
+    jobs = [job for job in build_jobs() if job.enabled]
+    if not jobs:
+        print("❌ Every job is disabled; set SCHEDULER_*_SECONDS above 0")
+        return
+
+    print("🛰️  Orbital pipeline scheduler starting...")
+    if args.once:
+        for job in jobs:
+            try:
+                run_job(job)
+            except Exception as e:
+                print(f"❌ {job.name}: {e}")
+                print("Make sure PostgreSQL is running and the database exists")
+        return
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    run_forever(jobs, stop)
+    print("👋 Scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
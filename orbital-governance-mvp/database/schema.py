@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations for the dev Schema
+
+Ordered, versioned DDL for the indexes behind the project's hot queries.
+Applied versions are recorded in dev.schema_migrations, so each migration
+runs once; a migration whose tables do not exist yet (e.g. no shells have
+been generated) is left pending and applied on a later run.
+
+Every statement is idempotent (IF NOT EXISTS), which lets ensure_indexes()
+re-create indexes lost when a table is dropped and rebuilt, as
+generate_tracts.py does with dev.tract_volumetric_shells in rebuild mode.
+
+query_audit.py checks that the planner actually uses these indexes.
+
+Usage:
+    python3 schema.py           # apply pending migrations
+    python3 schema.py --status  # list migrations and missing indexes
+    python3 schema.py --ensure  # re-create missing indexes of applied migrations
+"""
+
+import argparse
+import re
+import time
+
+from sqlalchemy import create_engine
+
+from tle_latest import LATEST_VIEW_STATEMENTS
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+# Tract assignment over positioned snapshots; created by calculate_positions.py
+# and re-created by retention.py after partitioning dev.tle_snapshots
+ORBIT_BINS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_tle_snapshots_orbit_bins
+    ON dev.tle_snapshots (altitude, inclination, raan)
+    WHERE position IS NOT NULL
+"""
+
+
+class Migration:
+    """One versioned schema change and the tables it needs"""
+
+    def __init__(self, version, name, tables, statements):
+        self.version = version
+        self.name = name
+        self.tables = tables
+        self.statements = statements
+
+    @property
+    def indexes(self):
+        """Index names created by this migration"""
+        return [m.group(1) for m in (re.search(r'CREATE (?:UNIQUE )?INDEX IF NOT EXISTS (\w+)', s)
+                                     for s in self.statements) if m]
+
+
+MIGRATIONS = [
+    Migration(1, 'tle_snapshots_positioned', ['dev.tle_snapshots'], [
+        # bbox filter of /api/satellites (position && ST_MakeEnvelope)
+        """CREATE INDEX IF NOT EXISTS idx_tle_snapshots_position
+           ON dev.tle_snapshots USING GIST (position)""",
+        # /api/satellites ordering and keyset pagination over positioned rows;
+        # positioned altitude ranges use idx_tle_snapshots_orbit_bins
+        # (calculate_positions.py)
+        """CREATE INDEX IF NOT EXISTS idx_tle_snapshots_positioned_name
+           ON dev.tle_snapshots ((COALESCE(name, '')), id)
+           WHERE position IS NOT NULL""",
+        # DISTINCT ON (satellite_id) ... ORDER BY satellite_id, id DESC
+        """CREATE INDEX IF NOT EXISTS idx_tle_snapshots_satellite_latest
+           ON dev.tle_snapshots (satellite_id, id DESC)""",
+        "ANALYZE dev.tle_snapshots",
+    ]),
+    Migration(2, 'tract_bounds', ['dev.tracts'], [
+        # "x BETWEEN alt_min AND alt_max AND y BETWEEN inc_min AND inc_max"
+        # as a 2D box containment that GiST can answer
+        """CREATE INDEX IF NOT EXISTS idx_tracts_bounds_envelope
+           ON dev.tracts USING GIST (ST_MakeEnvelope(alt_min, inc_min, alt_max, inc_max))""",
+        # Per-zone scans (grid reconstruction, LEO validation)
+        """CREATE INDEX IF NOT EXISTS idx_tracts_zone_bounds
+           ON dev.tracts (orbit_zone, alt_min, inc_min, az_min)""",
+        "ANALYZE dev.tracts",
+    ]),
+    Migration(3, 'shell_bounds', ['dev.tract_volumetric_shells'], [
+        # Same name GeoAlchemy2 uses, so a table it created is not indexed twice
+        """CREATE INDEX IF NOT EXISTS idx_tract_volumetric_shells_geom
+           ON dev.tract_volumetric_shells USING GIST (geom)""",
+        """CREATE INDEX IF NOT EXISTS idx_tract_volumetric_shells_bounds_envelope
+           ON dev.tract_volumetric_shells USING GIST (ST_MakeEnvelope(alt_min, inc_min, alt_max, inc_max))""",
+        "ANALYZE dev.tract_volumetric_shells",
+    ]),
+    # Current snapshot per satellite (tle_latest.py)
+    Migration(4, 'tle_latest_view', ['dev.tle_snapshots'], LATEST_VIEW_STATEMENTS + [
+        "ANALYZE dev.tle_latest",
+    ]),
+]
+
+
+def ensure_migrations_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dev.schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT timezone('utc', now()),
+            duration_seconds DOUBLE PRECISION
+        )
+    """)
+
+
+def applied_versions(cur):
+    cur.execute("SELECT version FROM dev.schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def tables_exist(cur, tables):
+    for table in tables:
+        cur.execute("SELECT to_regclass(%s)", (table,))
+        if cur.fetchone()[0] is None:
+            return False
+    return True
+
+
+def existing_indexes(cur):
+    cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = 'dev'")
+    return {row[0] for row in cur.fetchall()}
+
+
+def migrate(conn):
+    """Apply pending migrations in version order, one transaction each
+
+    Returns (applied, waiting) lists of migration versions.
+    """
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    conn.commit()
+    done = applied_versions(cur)
+
+    applied, waiting = [], []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        if not tables_exist(cur, migration.tables):
+            waiting.append(migration.version)
+            print(f"⏸️  {migration.version:03d} {migration.name}: waiting for {', '.join(migration.tables)}")
+            continue
+
+        started = time.perf_counter()
+        try:
+            for statement in migration.statements:
+                cur.execute(statement)
+            elapsed = time.perf_counter() - started
+            cur.execute("""
+                INSERT INTO dev.schema_migrations (version, name, duration_seconds)
+                VALUES (%s, %s, %s)
+            """, (migration.version, migration.name, elapsed))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+        print(f"✅ {migration.version:03d} {migration.name} applied in {elapsed:.2f}s")
+    return applied, waiting
+
+
+def ensure_indexes(cur):
+    """Re-create missing indexes of applied migrations (runs in the caller's transaction)"""
+    ensure_migrations_table(cur)
+    done = applied_versions(cur)
+    present = existing_indexes(cur)
+
+    created = []
+    for migration in MIGRATIONS:
+        if migration.version not in done or not tables_exist(cur, migration.tables):
+            continue
+        missing = [name for name in migration.indexes if name not in present]
+        if not missing:
+            continue
+        for statement in migration.statements:
+            cur.execute(statement)
+        created += missing
+    return created
+
+
+def show_status(conn):
+    cur = conn.cursor()
+    ensure_migrations_table(cur)
+    cur.execute("SELECT version, applied_at FROM dev.schema_migrations")
+    applied = dict(cur.fetchall())
+    present = existing_indexes(cur)
+    conn.commit()
+
+    print(f"\n📋 Schema migrations:")
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            state = f"applied {applied[migration.version]:%Y-%m-%d %H:%M}"
+        elif tables_exist(cur, migration.tables):
+            state = "pending"
+        else:
+            state = f"waiting for {', '.join(migration.tables)}"
+        missing = [name for name in migration.indexes if name not in present]
+        print(f"   {migration.version:03d} {migration.name}: {state}")
+        if migration.version in applied and missing:
+            print(f"      ⚠️  missing: {', '.join(missing)} (run --ensure)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply dev schema migrations")
+    parser.add_argument('--status', action='store_true', help="list migrations and missing indexes")
+    parser.add_argument('--ensure', action='store_true', help="re-create missing indexes of applied migrations")
+    args = parser.parse_args()
+
+    conn = engine.raw_connection()
+    try:
+        if args.status:
+            show_status(conn)
+        elif args.ensure:
+            created = ensure_indexes(conn.cursor())
+            conn.commit()
+            print(f"✅ Re-created {len(created)} indexes" + (f": {', '.join(created)}" if created else ""))
+        else:
+            print("🗄️  Applying schema migrations...")
+            applied, waiting = migrate(conn)
+            if not applied and not waiting:
+                print("✅ Schema is up to date")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
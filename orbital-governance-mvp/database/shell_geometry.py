@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Vectorized Volumetric Shell Geometry
+
+Builds the parameter-space shell polygons for a whole chunk of tracts with
+Shapely 2 array operations instead of one Polygon per tract. Each shell is
+a rectangle in (RAAN, inclination) space at the tract's mean altitude.
+
+Kept free of database side effects so chunks can be farmed out to a
+process pool by generate_tracts.py and the benchmarks.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+
+# Tracts with inc_min at or above this are skipped (extreme retrograde polar)
+POLAR_CUTOFF = 170
+
+# Tract metadata columns a chunk is built from, in SELECT order
+SHELL_INPUT_COLUMNS = ['tract_id', 'alt_min', 'alt_max', 'inc_min', 'inc_max', 'az_min', 'az_max']
+
+
+def build_shell_chunk(chunk):
+    """Build shells for one chunk of tracts
+
+    `chunk` is a dict of equal-length arrays: tract_id, alt_min, alt_max,
+    inc_min, inc_max, az_min, az_max. Returns a dict with the surviving
+    rows (hex WKB geometry included) and per-reason counters.
+    """
+    tract_ids = np.asarray(chunk['tract_id'], dtype=object)
+    alt_min = np.asarray(chunk['alt_min'], dtype=float)
+    alt_max = np.asarray(chunk['alt_max'], dtype=float)
+    inc_min = np.asarray(chunk['inc_min'], dtype=float)
+    inc_max = np.asarray(chunk['inc_max'], dtype=float)
+    raan_min = np.asarray(chunk['az_min'], dtype=float)
+    raan_max = np.asarray(chunk['az_max'], dtype=float)
+
+    polar = inc_min >= POLAR_CUTOFF
+    degenerate = ~polar & ((raan_max <= raan_min) | (inc_max <= inc_min) | (alt_max <= alt_min))
+    candidates = ~polar & ~degenerate
+
+    # Rectangle at the mean altitude to avoid self-intersection
+    avg_alt = (alt_min + alt_max) / 2
+    coords = np.stack([
+        np.stack([raan_min, inc_min, avg_alt], axis=-1),
+        np.stack([raan_max, inc_min, avg_alt], axis=-1),
+        np.stack([raan_max, inc_max, avg_alt], axis=-1),
+        np.stack([raan_min, inc_max, avg_alt], axis=-1),
+        np.stack([raan_min, inc_min, avg_alt], axis=-1),
+    ], axis=1)[candidates]
+
+    polygons = shapely.polygons(coords)
+    area = shapely.area(polygons)
+    valid = shapely.is_valid(polygons) & ~shapely.is_empty(polygons) & (area > 0)
+
+    keep = np.flatnonzero(candidates)[valid]
+    polygons = polygons[valid]
+    area = area[valid]
+
+    return {
+        'tract_id': tract_ids[keep].tolist(),
+        'geom_wkb': shapely.to_wkb(polygons, hex=True, output_dimension=3).tolist(),
+        'alt_min': alt_min[keep].tolist(),
+        'alt_max': alt_max[keep].tolist(),
+        'inc_min': inc_min[keep].tolist(),
+        'inc_max': inc_max[keep].tolist(),
+        'raan_min': raan_min[keep].tolist(),
+        'raan_max': raan_max[keep].tolist(),
+        # Rough approximation, as before: parameter-space area × altitude span
+        'volume_m3': (area * (alt_max[keep] - alt_min[keep]) * 1000).tolist(),
+        'skipped_polar': int(polar.sum()),
+        'failed_generation': int(degenerate.sum()),
+        'invalid_geometry': int((~valid).sum()),
+        'total': len(tract_ids),
+    }
+
+
+SHELL_COLUMNS = ['tract_id', 'geom', 'alt_min', 'alt_max', 'inc_min', 'inc_max',
+                 'raan_min', 'raan_max', 'volume_m3', 'created_at']
+
+
+def shell_rows(result, created_at):
+    """COPY rows (SHELL_COLUMNS order) for a build_shell_chunk result"""
+    return zip(
+        result['tract_id'], result['geom_wkb'],
+        result['alt_min'], result['alt_max'],
+        result['inc_min'], result['inc_max'],
+        result['raan_min'], result['raan_max'],
+        result['volume_m3'],
+        [created_at] * len(result['tract_id']),
+    )
+
+
+def map_shell_chunks(chunks, workers=None):
+    """Yield build_shell_chunk results in order, across a process pool
+
+    Uses the fork start method: generate_tracts.py does its database work at
+    import time, so spawned workers re-importing it would rerun the script.
+    Falls back to building in-process where fork is unavailable or when
+    workers == 1.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        yield from map(build_shell_chunk, chunks)
+        return
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+        yield from pool.map(build_shell_chunk, chunks)
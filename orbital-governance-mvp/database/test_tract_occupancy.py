@@ -0,0 +1,58 @@
+"""
+Tract Occupancy Grid Detection Test
+
+Checks that load_zone_grids' detection only treats complete, evenly binned
+zones as regular grids, so irregular zones fall back to the range join
+instead of failing the position write. Needs no database.
+"""
+
+import numpy as np
+
+from tract_grid import BinAxis, ZoneGrid
+from tract_occupancy import assign_tract_ids, detect_axis, detect_zone_grids
+
+
+def zone_bins(grid):
+    bounds = grid.bounds(np.arange(grid.size))
+    rows = set()
+    for axis, lo, hi in (('alt', 'alt_min', 'alt_max'), ('inc', 'inc_min', 'inc_max'), ('az', 'az_min', 'az_max')):
+        rows.update((grid.zone, axis, a, b) for a, b in zip(bounds[lo].tolist(), bounds[hi].tolist()))
+    return sorted(rows)
+
+
+LEO = ZoneGrid('LEO', BinAxis(200, 400, 50), BinAxis(0, 20, 5), BinAxis(0, 20, 5))
+
+IRREGULAR = [
+    # Uneven altitude bins: 2050-3050 and 3050-5050
+    ('MEO', 'alt', 2050.0, 3050.0), ('MEO', 'alt', 3050.0, 5050.0),
+    ('MEO', 'inc', 0.0, 5.0), ('MEO', 'az', 0.0, 5.0),
+    # A single zero-width tract
+    ('GEO', 'alt', 35786.0, 35786.0), ('GEO', 'inc', 0.0, 5.0), ('GEO', 'az', 0.0, 5.0),
+]
+
+
+def test_detect_axis():
+    axis = detect_axis([(0, 5), (5, 10), (10, 15)])
+    assert (axis.start, axis.stop, axis.width, axis.count) == (0, 15, 5, 3)
+    assert detect_axis([(35700, 35750)]).count == 1
+    assert detect_axis([(0, 5), (5, 15)]) is None          # uneven widths
+    assert detect_axis([(0, 5), (10, 15)]) is None         # gap
+    assert detect_axis([(0, 5), (2.5, 7.5)]) is None       # overlap
+    assert detect_axis([(35786, 35786)]) is None           # zero width
+    assert detect_axis([]) is None
+
+
+def test_irregular_zones_are_skipped():
+    grids, irregular = detect_zone_grids(zone_bins(LEO) + IRREGULAR, {'LEO': LEO.size})
+
+    assert [grid.zone for grid in grids] == ['LEO']
+    assert grids[0].shape == LEO.shape
+    assert irregular == ['GEO', 'MEO']
+
+
+def test_regular_zones_still_assigned():
+    grids, _ = detect_zone_grids(zone_bins(LEO) + IRREGULAR)
+    tract_ids = assign_tract_ids(grids, [225.0, 2500.0, 35786.0], [7.5, 2.0, 2.0], [12.5, 2.0, 2.0])
+
+    # The irregular-zone satellites are left for update_occupancy's range join
+    assert tract_ids.tolist() == ['LEO-A200-I5-RAAN10_15', None, None]
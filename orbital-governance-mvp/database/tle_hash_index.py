@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+TLE Content-Hash Index
+
+dev.tle_hash_index holds one row per satellite: the tle_hash() of its
+latest stored element set, the snapshot row holding it, and when that set
+was first and last seen in a catalog pull. The loader checks incoming TLEs
+against it instead of scanning dev.tle_snapshots for each satellite's
+latest row, and bumps last_seen for the unchanged ones it skips.
+
+retention.py keeps the snapshots referenced here while their satellite is
+still being seen, so a TLE that has not changed for longer than the
+retention window is not expired with its partition.
+
+Usage:
+    python3 tle_hash_index.py   # build the index if needed and show its summary
+"""
+
+from datetime import timezone
+
+from psycopg2.extras import execute_values
+from sqlalchemy import create_engine
+
+from propagation import tle_hash
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+HASH_INDEX = 'dev.tle_hash_index'
+
+
+def naive_utc(moment):
+    if moment is not None and moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def ensure_hash_index(cur):
+    """Create dev.tle_hash_index, backfilled from the latest snapshot per satellite"""
+    cur.execute("SELECT to_regclass(%s)", (HASH_INDEX,))
+    if cur.fetchone()[0] is not None:
+        return 0
+
+    cur.execute("""
+        CREATE TABLE dev.tle_hash_index (
+            satellite_id TEXT PRIMARY KEY,
+            tle_hash TEXT NOT NULL,
+            snapshot_id BIGINT NOT NULL,
+            first_seen TIMESTAMP NOT NULL,
+            last_seen TIMESTAMP NOT NULL
+        )
+    """)
+    cur.execute("CREATE INDEX idx_tle_hash_index_snapshot ON dev.tle_hash_index (snapshot_id)")
+
+    # One-off scan of the history; every later load maintains the index
+    cur.execute("""
+        SELECT DISTINCT ON (satellite_id) satellite_id, tle_line1, tle_line2, id, timestamp_collected
+        FROM dev.tle_snapshots
+        ORDER BY satellite_id, timestamp_collected DESC, id DESC
+    """)
+    rows = [(str(satellite_id), tle_hash(line1, line2), snapshot_id, naive_utc(seen), naive_utc(seen))
+            for satellite_id, line1, line2, snapshot_id, seen in cur.fetchall()]
+    if rows:
+        execute_values(cur, """
+            INSERT INTO dev.tle_hash_index (satellite_id, tle_hash, snapshot_id, first_seen, last_seen)
+            VALUES %s
+        """, rows, page_size=5000)
+    return len(rows)
+
+
+def indexed_hashes(cur):
+    """Hashes of every satellite's latest stored element set"""
+    cur.execute("SELECT tle_hash FROM dev.tle_hash_index")
+    return {row[0] for row in cur.fetchall()}
+
+
+def record_inserted(cur, rows, seen_at):
+    """Point the index at newly stored snapshots
+
+    `rows` are (id, satellite_id, tle_line1, tle_line2) as returned by the
+    loader's INSERT. first_seen only moves when the element set changed.
+    """
+    rows = [(str(satellite_id), tle_hash(line1, line2), snapshot_id, naive_utc(seen_at), naive_utc(seen_at))
+            for snapshot_id, satellite_id, line1, line2 in rows]
+    if not rows:
+        return 0
+    execute_values(cur, """
+        INSERT INTO dev.tle_hash_index AS h (satellite_id, tle_hash, snapshot_id, first_seen, last_seen)
+        VALUES %s
+        ON CONFLICT (satellite_id) DO UPDATE
+        SET first_seen = CASE WHEN h.tle_hash = EXCLUDED.tle_hash THEN h.first_seen
+                              ELSE EXCLUDED.first_seen END,
+            tle_hash = EXCLUDED.tle_hash,
+            snapshot_id = EXCLUDED.snapshot_id,
+            last_seen = EXCLUDED.last_seen
+    """, rows, page_size=5000)
+    return len(rows)
+
+
+def touch_unchanged(cur, hashes, seen_at):
+    """Mark skipped (unchanged) element sets as seen in this pull"""
+    if not hashes:
+        return 0
+    cur.execute("UPDATE dev.tle_hash_index SET last_seen = %s WHERE tle_hash = ANY(%s)",
+                (naive_utc(seen_at), list(hashes)))
+    return cur.rowcount
+
+
+def prune_hash_index(cur):
+    """Forget satellites whose indexed snapshot no longer exists (expired by retention.py)"""
+    cur.execute("""
+        DELETE FROM dev.tle_hash_index h
+        WHERE NOT EXISTS (SELECT 1 FROM dev.tle_snapshots s WHERE s.id = h.snapshot_id)
+    """)
+    return cur.rowcount
+
+
+def main():
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        backfilled = ensure_hash_index(cur)
+        cur.execute("""
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE first_seen < last_seen), MAX(last_seen)
+            FROM dev.tle_hash_index
+        """)
+        total, unchanged, last_seen = cur.fetchone()
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+        return
+    finally:
+        conn.close()
+
+    if backfilled:
+        print(f"🧮 Indexed {backfilled:,} satellites from dev.tle_snapshots")
+    print(f"\n📊 TLE hash index: {total:,} satellites, "
+          f"{unchanged:,} seen again with an unchanged element set"
+          + (f", last pull {last_seen:%Y-%m-%d %H:%M} UTC" if last_seen else ""))
+
+
+if __name__ == "__main__":
+    main()
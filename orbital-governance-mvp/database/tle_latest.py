@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Current Snapshot per Satellite
+
+dev.tle_snapshots is the append-only archive: every load adds a row per
+satellite. dev.tle_latest is a materialized view holding each satellite's
+latest positioned snapshot, so the API counts and lists satellites without
+scanning (or double counting) the history.
+
+Only positioned snapshots qualify, so a freshly loaded TLE does not hide its
+satellite until calculate_positions.py has run; write_positions() refreshes
+the view in the same transaction as the positions, concurrently so readers
+are never blocked.
+
+Usage:
+    python3 tle_latest.py   # create the view if needed and refresh it
+"""
+
+import time
+
+from sqlalchemy import create_engine
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+LATEST_VIEW = 'dev.tle_latest'
+
+LATEST_VIEW_STATEMENTS = [
+    # The view lists raan explicitly; older tables may predate it
+    "ALTER TABLE dev.tle_snapshots ADD COLUMN IF NOT EXISTS raan DOUBLE PRECISION",
+    """CREATE MATERIALIZED VIEW IF NOT EXISTS dev.tle_latest AS
+       SELECT DISTINCT ON (satellite_id)
+              id, satellite_id, name, tle_line1, tle_line2, timestamp_collected,
+              position, longitude, latitude, altitude, inclination, raan
+       FROM dev.tle_snapshots
+       WHERE position IS NOT NULL
+       ORDER BY satellite_id, timestamp_collected DESC, id DESC""",
+    # REFRESH ... CONCURRENTLY requires a unique index
+    """CREATE UNIQUE INDEX IF NOT EXISTS idx_tle_latest_satellite
+       ON dev.tle_latest (satellite_id)""",
+    """CREATE INDEX IF NOT EXISTS idx_tle_latest_name
+       ON dev.tle_latest ((COALESCE(name, '')), id)""",
+    """CREATE INDEX IF NOT EXISTS idx_tle_latest_position
+       ON dev.tle_latest USING GIST (position)""",
+    """CREATE INDEX IF NOT EXISTS idx_tle_latest_orbit_bins
+       ON dev.tle_latest (altitude, inclination, raan)""",
+    # Snapshots still waiting for calculate_positions.py, without a history scan
+    """CREATE INDEX IF NOT EXISTS idx_tle_snapshots_pending
+       ON dev.tle_snapshots (id)
+       WHERE position IS NULL OR raan IS NULL""",
+]
+
+
+def ensure_latest_view(cur):
+    """Create dev.tle_latest and its indexes if missing"""
+    for statement in LATEST_VIEW_STATEMENTS:
+        cur.execute(statement)
+
+
+def refresh_latest_view(cur):
+    """Refresh dev.tle_latest in the caller's transaction; returns its row count"""
+    cur.execute("SELECT relispopulated FROM pg_class WHERE oid = to_regclass(%s)", (LATEST_VIEW,))
+    row = cur.fetchone()
+    if row is None:
+        ensure_latest_view(cur)
+    elif row[0]:
+        cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {LATEST_VIEW}")
+    else:
+        # CONCURRENTLY needs a populated view
+        cur.execute(f"REFRESH MATERIALIZED VIEW {LATEST_VIEW}")
+    cur.execute(f"SELECT COUNT(*) FROM {LATEST_VIEW}")
+    return cur.fetchone()[0]
+
+
+def main():
+    started = time.perf_counter()
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        ensure_latest_view(cur)
+        current = refresh_latest_view(cur)
+        cur.execute("SELECT COUNT(*) FROM dev.tle_snapshots")
+        archived = cur.fetchone()[0]
+        cur.execute("SELECT pg_notify('orbital_refresh', 'latest')")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+        return
+    finally:
+        conn.close()
+
+    print(f"✅ dev.tle_latest refreshed in {time.perf_counter() - started:.2f}s: "
+          f"{current:,} current satellites from {archived:,} archived snapshots")
+
+
+if __name__ == "__main__":
+    main()
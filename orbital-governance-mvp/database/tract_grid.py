@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Orbital Tract Grid Definition
+
+Describes the tract grid as regular bins over altitude, inclination and RAAN
+for each orbit zone, and generates it as NumPy arrays in bounded chunks
+instead of one Python object per tract.
+
+Default LEO grid (matches the original generator):
+- Altitude: 200-2050 km in 50 km bins
+- Inclination: 0-180° in 5° bins
+- RAAN: 0-360° in 5° bins
+= 37 × 36 × 72 = 95,904 tracts
+"""
+
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Angular resolution of the arc segment indices (theta_start_idx / theta_end_idx)
+SEGMENT_SPAN = 1.0
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def format_bound(value):
+    """Format a bin edge the way tract ids spell it (200, not 200.0)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:g}"
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class BinAxis:
+    """Contiguous bins of equal width: [start, start + width), ... up to stop"""
+
+    def __init__(self, start, stop, width):
+        if width <= 0 or stop <= start:
+            raise ValueError(f"Invalid bin axis: start={start}, stop={stop}, width={width}")
+        self.start = _number(start)
+        self.width = _number(width)
+        self.count = int(math.ceil(round((stop - start) / width, 9)))
+        self.stop = _number(self.start + self.count * self.width)
+
+    @property
+    def mins(self):
+        return self.start + self.width * np.arange(self.count, dtype=float)
+
+    @property
+    def edges(self):
+        return self.start + self.width * np.arange(self.count + 1, dtype=float)
+
+    def index_of(self, values):
+        """Vectorized half-open bin index; -1 for values outside the axis"""
+        idx = np.floor((np.asarray(values, dtype=float) - self.start) / self.width)
+        return np.where((idx >= 0) & (idx < self.count), idx, -1).astype(np.int64)
+
+    def distance_to_edge(self, values):
+        """Distance from each value to the nearest bin edge"""
+        offset = np.mod(np.asarray(values, dtype=float) - self.start, self.width)
+        return np.minimum(offset, self.width - offset)
+
+    def __repr__(self):
+        return f"BinAxis({self.start}, {self.stop}, {self.width})"
+
+
+class ZoneGrid:
+    """Regular altitude × inclination × RAAN tract grid for one orbit zone"""
+
+    def __init__(self, zone, alt, inc, raan):
+        self.zone = zone
+        self.alt = alt
+        self.inc = inc
+        self.raan = raan
+
+    @property
+    def shape(self):
+        return (self.alt.count, self.inc.count, self.raan.count)
+
+    @property
+    def size(self):
+        return self.alt.count * self.inc.count * self.raan.count
+
+    def with_widths(self, alt_width=None, inc_width=None, raan_width=None):
+        """Same zone extent at a different resolution"""
+        return ZoneGrid(
+            self.zone,
+            BinAxis(self.alt.start, self.alt.stop, alt_width or self.alt.width),
+            BinAxis(self.inc.start, self.inc.stop, inc_width or self.inc.width),
+            BinAxis(self.raan.start, self.raan.stop, raan_width or self.raan.width),
+        )
+
+    def flat_index(self, altitude, inclination, raan):
+        """Vectorized tract index for satellites; -1 when outside the grid"""
+        a = self.alt.index_of(altitude)
+        i = self.inc.index_of(inclination)
+        r = self.raan.index_of(np.mod(raan, 360.0))
+        flat = (a * self.inc.count + i) * self.raan.count + r
+        return np.where((a < 0) | (i < 0) | (r < 0), -1, flat)
+
+    def bounds(self, flat):
+        """Bin bounds for flat indices, as a dict of arrays"""
+        a, i, r = np.unravel_index(np.asarray(flat, dtype=np.int64), self.shape)
+        alt_min = self.alt.start + a * self.alt.width
+        inc_min = self.inc.start + i * self.inc.width
+        az_min = self.raan.start + r * self.raan.width
+        return {
+            'alt_min': alt_min,
+            'alt_max': alt_min + self.alt.width,
+            'inc_min': inc_min,
+            'inc_max': inc_min + self.inc.width,
+            'az_min': az_min,
+            'az_max': az_min + self.raan.width,
+        }
+
+    def tract_ids(self, bounds):
+        return [
+            f"{self.zone}-A{format_bound(a)}-I{format_bound(i)}-RAAN{format_bound(r0)}_{format_bound(r1)}"
+            for a, i, r0, r1 in zip(bounds['alt_min'], bounds['inc_min'], bounds['az_min'], bounds['az_max'])
+        ]
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield the grid as dicts of arrays, at most chunk_size tracts each
+
+        Tracts come out in (altitude, inclination, RAAN) order, the same
+        order the original nested loops produced.
+        """
+        for start in range(0, self.size, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, self.size), dtype=np.int64)
+            chunk = self.bounds(flat)
+            chunk['flat_index'] = flat
+            chunk['tract_id'] = self.tract_ids(chunk)
+            chunk['theta_start_idx'] = np.floor(chunk['az_min'] / SEGMENT_SPAN).astype(np.int64)
+            chunk['theta_end_idx'] = np.floor(chunk['az_max'] / SEGMENT_SPAN).astype(np.int64)
+            yield chunk
+
+    def iter_rows(self, chunk_size=DEFAULT_CHUNK_SIZE, created_at=None):
+        """Yield dev.tracts rows (see TRACT_COLUMNS) chunk by chunk"""
+        created_at = created_at or datetime.now(timezone.utc).replace(tzinfo=None)
+        for chunk in self.iter_chunks(chunk_size):
+            yield from zip(
+                chunk['tract_id'],
+                chunk['alt_min'].tolist(), chunk['alt_max'].tolist(),
+                chunk['inc_min'].tolist(), chunk['inc_max'].tolist(),
+                chunk['az_min'].tolist(), chunk['az_max'].tolist(),
+                [self.zone] * len(chunk['tract_id']),
+                chunk['theta_start_idx'].tolist(), chunk['theta_end_idx'].tolist(),
+                [created_at] * len(chunk['tract_id']),
+            )
+
+    def generate_series_sql(self, table='dev.tracts'):
+        """INSERT ... SELECT that builds this zone's tracts server-side"""
+        params = {
+            'zone': self.zone,
+            'alt_start': self.alt.start, 'alt_last': self.alt.start + (self.alt.count - 1) * self.alt.width,
+            'alt_w': self.alt.width,
+            'inc_start': self.inc.start, 'inc_last': self.inc.start + (self.inc.count - 1) * self.inc.width,
+            'inc_w': self.inc.width,
+            'raan_start': self.raan.start, 'raan_last': self.raan.start + (self.raan.count - 1) * self.raan.width,
+            'raan_w': self.raan.width,
+            'segment': SEGMENT_SPAN,
+        }
+        sql = f"""
+            INSERT INTO {table} ({', '.join(TRACT_COLUMNS)})
+            SELECT
+                format('%s-A%s-I%s-RAAN%s_%s', CAST(:zone AS text),
+                       trim_scale(a), trim_scale(i), trim_scale(r), trim_scale(r + CAST(:raan_w AS numeric))),
+                a, a + CAST(:alt_w AS numeric),
+                i, i + CAST(:inc_w AS numeric),
+                r, r + CAST(:raan_w AS numeric),
+                CAST(:zone AS text),
+                floor(r / CAST(:segment AS numeric))::int,
+                floor((r + CAST(:raan_w AS numeric)) / CAST(:segment AS numeric))::int,
+                timezone('utc', now())
+            FROM generate_series(CAST(:alt_start AS numeric), CAST(:alt_last AS numeric), CAST(:alt_w AS numeric)) AS a,
+                 generate_series(CAST(:inc_start AS numeric), CAST(:inc_last AS numeric), CAST(:inc_w AS numeric)) AS i,
+                 generate_series(CAST(:raan_start AS numeric), CAST(:raan_last AS numeric), CAST(:raan_w AS numeric)) AS r
+            ORDER BY a, i, r
+        """
+        return sql, params
+
+    def __repr__(self):
+        return f"ZoneGrid({self.zone!r}, alt={self.alt}, inc={self.inc}, raan={self.raan})"
+
+
+TRACT_COLUMNS = [
+    'tract_id', 'alt_min', 'alt_max', 'inc_min', 'inc_max', 'az_min', 'az_max',
+    'orbit_zone', 'theta_start_idx', 'theta_end_idx', 'created_at',
+]
+
+# Bin definitions per orbit zone
+ZONES = {
+    'LEO': ZoneGrid('LEO', BinAxis(200, 2050, 50), BinAxis(0, 180, 5), BinAxis(0, 360, 5)),
+    'MEO': ZoneGrid('MEO', BinAxis(2050, 35050, 1000), BinAxis(0, 180, 5), BinAxis(0, 360, 5)),
+    'GEO': ZoneGrid('GEO', BinAxis(35700, 35900, 50), BinAxis(0, 180, 5), BinAxis(0, 360, 5)),
+}
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Satellite-to-Tract Occupancy Index
+
+Maintains dev.tract_occupancy: one row per positioned satellite with the
+tract it currently occupies. Tract ids come from grid arithmetic on the
+satellite's altitude, inclination and RAAN (see tract_grid.py), so no range
+join against dev.tracts is needed; only zones whose stored tracts do not
+form a regular grid fall back to one. calculate_positions.py upserts the rows
+for each position batch inside the same transaction as the positions, and
+removes satellites that are no longer in dev.tle_latest (as does
+retention.py after expiring snapshots).
+
+Answers "how many tracts are occupied" with COUNT(DISTINCT tract_id) and
+"who is in tract X" with an index lookup on tract_id.
+
+Usage:
+    python3 tract_occupancy.py            # show occupancy summary
+    python3 tract_occupancy.py --rebuild  # recompute from dev.tle_latest
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from bulk_copy import DEFAULT_BATCH_SIZE, copy_rows
+from tract_grid import BinAxis, ZoneGrid
+
+engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
+
+OCCUPANCY_COLUMNS = ['satellite_id', 'snapshot_id', 'tract_id', 'altitude', 'inclination', 'raan']
+
+
+def ensure_occupancy_table(cur):
+    """Create dev.tract_occupancy and its tract_id index if missing"""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS dev.tract_occupancy (
+            satellite_id TEXT PRIMARY KEY,
+            snapshot_id BIGINT NOT NULL,
+            tract_id TEXT,
+            altitude DOUBLE PRECISION,
+            inclination DOUBLE PRECISION,
+            raan DOUBLE PRECISION,
+            updated_at TIMESTAMP NOT NULL DEFAULT timezone('utc', now())
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tract_occupancy_tract
+        ON dev.tract_occupancy (tract_id)
+        WHERE tract_id IS NOT NULL
+    """)
+
+
+def detect_axis(bins):
+    """BinAxis for distinct (min, max) bins if they are uniform and contiguous, else None"""
+    bins = np.asarray(sorted(bins), dtype=float).reshape(-1, 2)
+    if len(bins) == 0:
+        return None
+    widths = bins[:, 1] - bins[:, 0]
+    width = widths[0]
+    if width <= 0 or not np.allclose(widths, width):
+        return None
+    starts = np.unique(bins[:, 0])
+    if len(starts) != len(bins) or not np.allclose(starts, starts[0] + width * np.arange(len(starts))):
+        return None
+    return BinAxis(starts[0], starts[-1] + width, width)
+
+
+def detect_zone_grids(bins, counts=None):
+    """Split zones into regular grids and irregular zone names
+
+    `bins` are (orbit_zone, axis, min, max) rows with axis one of 'alt',
+    'inc' or 'az'. Zones whose bins are not uniform and contiguous on every
+    axis (uneven widths, zero-width tracts) cannot be matched by grid
+    arithmetic; update_occupancy matches them with a range join instead.
+    """
+    zones = {}
+    for zone, axis, lo, hi in bins:
+        zones.setdefault(zone, {'alt': [], 'inc': [], 'az': []})[axis].append((lo, hi))
+
+    grids, irregular = [], []
+    for zone, axes in zones.items():
+        alt, inc, raan = (detect_axis(axes[axis]) for axis in ('alt', 'inc', 'az'))
+        if alt is None or inc is None or raan is None:
+            irregular.append(zone)
+            continue
+        grid = ZoneGrid(zone, alt, inc, raan)
+        count = (counts or {}).get(zone)
+        if count is not None and grid.size != count:
+            # Gaps are harmless: ids that do not exist are dropped by the join in update_occupancy
+            print(f"⚠️  {zone} tracts are not a complete regular grid ({count:,} of {grid.size:,})")
+        grids.append(grid)
+
+    grids.sort(key=lambda grid: grid.alt.start)
+    return grids, sorted(irregular)
+
+
+def load_zone_grids(cur):
+    """Reconstruct each zone's bin grid from the bounds stored in dev.tracts
+
+    Returns (grids, irregular_zones); see detect_zone_grids.
+    """
+    cur.execute("""
+        SELECT orbit_zone, 'alt', alt_min, alt_max FROM dev.tracts GROUP BY orbit_zone, alt_min, alt_max
+        UNION ALL
+        SELECT orbit_zone, 'inc', inc_min, inc_max FROM dev.tracts GROUP BY orbit_zone, inc_min, inc_max
+        UNION ALL
+        SELECT orbit_zone, 'az', az_min, az_max FROM dev.tracts GROUP BY orbit_zone, az_min, az_max
+    """)
+    bins = cur.fetchall()
+    cur.execute("SELECT orbit_zone, COUNT(*) FROM dev.tracts GROUP BY orbit_zone")
+    counts = dict(cur.fetchall())
+    grids, irregular = detect_zone_grids(bins, counts)
+    if irregular:
+        print(f"⚠️  Irregular tract grid in {', '.join(irregular)}; matching those zones with a range join")
+    return grids, irregular
+
+
+def assign_tract_ids(grids, altitude, inclination, raan):
+    """Vectorized tract id per satellite (None when outside every grid)"""
+    altitude = np.asarray(altitude, dtype=float)
+    tract_ids = np.full(len(altitude), None, dtype=object)
+    unassigned = np.ones(len(altitude), dtype=bool)
+
+    for grid in grids:
+        flat = grid.flat_index(altitude, inclination, raan)
+        hit = unassigned & (flat >= 0)
+        if hit.any():
+            tract_ids[hit] = grid.tract_ids(grid.bounds(flat[hit]))
+            unassigned &= ~hit
+    return tract_ids
+
+
+def update_occupancy(cur, satellite_ids, snapshot_ids, altitude, inclination, raan,
+                     batch_size=DEFAULT_BATCH_SIZE):
+    """Upsert occupancy rows for one position batch
+
+    Runs in the caller's transaction. A satellite's row is only replaced by
+    a newer (or the same) snapshot, so reprocessing old snapshots never
+    moves a satellite back. Returns (upserted, moved) row counts.
+    """
+    ensure_occupancy_table(cur)
+    grids, irregular = load_zone_grids(cur)
+    tract_ids = assign_tract_ids(grids, altitude, inclination, raan)
+
+    cur.execute("""
+        CREATE TEMP TABLE occupancy_staging (
+            satellite_id TEXT,
+            snapshot_id BIGINT,
+            tract_id TEXT,
+            altitude DOUBLE PRECISION,
+            inclination DOUBLE PRECISION,
+            raan DOUBLE PRECISION
+        ) ON COMMIT DROP
+    """)
+    rows = zip(
+        [str(s) for s in satellite_ids],
+        np.asarray(snapshot_ids).tolist(),
+        tract_ids.tolist(),
+        np.asarray(altitude, dtype=float).tolist(),
+        np.asarray(inclination, dtype=float).tolist(),
+        np.asarray(raan, dtype=float).tolist(),
+    )
+    copy_rows(cur, 'occupancy_staging', OCCUPANCY_COLUMNS, rows, batch_size)
+
+    if irregular:
+        # Same half-open bins as the grid arithmetic, lowest tract first
+        cur.execute("""
+            UPDATE occupancy_staging s
+            SET tract_id = (
+                SELECT t.tract_id
+                FROM dev.tracts t
+                WHERE t.orbit_zone = ANY(%s)
+                  AND s.altitude >= t.alt_min AND s.altitude < t.alt_max
+                  AND s.inclination >= t.inc_min AND s.inclination < t.inc_max
+                  AND mod(mod(s.raan::numeric, 360) + 360, 360) >= t.az_min
+                  AND mod(mod(s.raan::numeric, 360) + 360, 360) < t.az_max
+                ORDER BY t.alt_min, t.inc_min, t.az_min
+                LIMIT 1
+            )
+            WHERE s.tract_id IS NULL
+        """, (irregular,))
+
+    # Latest snapshot per satellite; the PK join keeps only tract ids that exist
+    cur.execute("""
+        WITH latest AS (
+            SELECT DISTINCT ON (satellite_id) *
+            FROM occupancy_staging
+            ORDER BY satellite_id, snapshot_id DESC
+        ),
+        previous AS (
+            SELECT o.satellite_id, o.tract_id
+            FROM dev.tract_occupancy o
+            JOIN latest l ON l.satellite_id = o.satellite_id
+        ),
+        upserted AS (
+            INSERT INTO dev.tract_occupancy AS o
+                (satellite_id, snapshot_id, tract_id, altitude, inclination, raan, updated_at)
+            SELECT l.satellite_id, l.snapshot_id, t.tract_id, l.altitude, l.inclination, l.raan,
+                   timezone('utc', now())
+            FROM latest l
+            LEFT JOIN dev.tracts t ON t.tract_id = l.tract_id
+            ON CONFLICT (satellite_id) DO UPDATE
+            SET snapshot_id = EXCLUDED.snapshot_id,
+                tract_id = EXCLUDED.tract_id,
+                altitude = EXCLUDED.altitude,
+                inclination = EXCLUDED.inclination,
+                raan = EXCLUDED.raan,
+                updated_at = EXCLUDED.updated_at
+            WHERE o.snapshot_id <= EXCLUDED.snapshot_id
+            RETURNING o.satellite_id, o.tract_id
+        )
+        SELECT COUNT(*),
+               COUNT(*) FILTER (WHERE p.satellite_id IS NOT NULL
+                                AND p.tract_id IS DISTINCT FROM u.tract_id)
+        FROM upserted u
+        LEFT JOIN previous p ON p.satellite_id = u.satellite_id
+    """)
+    upserted, moved = cur.fetchone()
+    return upserted, moved
+
+
+def remove_departed(cur):
+    """Delete occupancy rows of satellites no longer in dev.tle_latest
+
+    Runs in the caller's transaction, after the view was refreshed. Returns
+    the number of rows removed.
+    """
+    cur.execute("SELECT to_regclass('dev.tract_occupancy') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return 0
+    cur.execute("""
+        DELETE FROM dev.tract_occupancy o
+        WHERE NOT EXISTS (
+            SELECT 1 FROM dev.tle_latest l WHERE l.satellite_id::text = o.satellite_id
+        )
+    """)
+    return cur.rowcount
+
+
+def rebuild_occupancy(batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute the whole index from the latest positioned snapshot per satellite"""
+    started = time.perf_counter()
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        ensure_occupancy_table(cur)
+        cur.execute("""
+            SELECT satellite_id, id, altitude, inclination, raan
+            FROM dev.tle_latest
+            WHERE raan IS NOT NULL
+        """)
+        rows = cur.fetchall()
+        cur.execute("TRUNCATE dev.tract_occupancy")
+        if rows:
+            satellite_ids, snapshot_ids, altitude, inclination, raan = zip(*rows)
+            update_occupancy(cur, satellite_ids, snapshot_ids, altitude, inclination, raan, batch_size)
+        cur.execute("SELECT pg_notify('orbital_refresh', 'occupancy')")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Rebuilt occupancy for {len(rows):,} satellites in {elapsed:.2f}s")
+
+
+def show_occupancy_summary():
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT COUNT(*), COUNT(tract_id), COUNT(DISTINCT tract_id),
+                   (SELECT COUNT(*) FROM dev.tracts)
+            FROM dev.tract_occupancy
+        """)
+        satellites, assigned, occupied, total = cur.fetchone()
+        cur.execute("""
+            SELECT tract_id, COUNT(*) AS occupants
+            FROM dev.tract_occupancy
+            WHERE tract_id IS NOT NULL
+            GROUP BY tract_id
+            ORDER BY occupants DESC
+            LIMIT 5
+        """)
+        busiest = cur.fetchall()
+    finally:
+        conn.close()
+
+    print(f"\n📊 Tract Occupancy Summary:")
+    print(f"   Satellites indexed: {satellites:,} ({assigned:,} inside a tract)")
+    print(f"   Occupied tracts: {occupied:,} of {total:,}")
+    print(f"   Available tracts: {total - occupied:,}")
+    for tract_id, occupants in busiest:
+        print(f"   {tract_id}: {occupants} satellites")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the satellite-to-tract occupancy index")
+    parser.add_argument('--rebuild', action='store_true', help="recompute from dev.tle_latest")
+    args = parser.parse_args()
+
+    try:
+        if args.rebuild:
+            rebuild_occupancy()
+        show_occupancy_summary()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("Make sure PostgreSQL is running and the database exists")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,116 +3,95 @@
 Spatial Accuracy Validation for Orbital Tract Volumetric Shells
 
 Tests if satellite points correctly fall within their expected volumetric shells
-using PostGIS spatial queries and orbital parameter matching.
+using PostGIS spatial queries and orbital parameter matching. The whole
+catalog is scored in one vectorized pass, so this is cheap enough to run
+after every refresh.
 """
 
+import time
+
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 import pandas as pd
 
+from shell_matching import ShellBins
+
 engine = create_engine("postgresql+psycopg2://postgres:@localhost:5432/extra_orbital")
 Session = sessionmaker(bind=engine)
 session = Session()
 
+def load_shell_bins():
+    """Load every volumetric shell once into a vectorized lookup"""
+    shells = pd.read_sql(text("""
+        SELECT tract_id, alt_min, alt_max, inc_min, inc_max, raan_min, raan_max
+        FROM dev.tract_volumetric_shells
+    """), engine)
+    return ShellBins.from_columns(shells)
+
 def validate_spatial_accuracy():
-    """Check if satellites fall within correct volumetric shells"""
+    """Check if satellites fall within correct volumetric shells
+
+    Scores the whole LEO catalog at once: one query for the satellites, one
+    for the shells, then NumPy bin assignment over the full arrays.
+    """
     
     print("🔍 Validating spatial accuracy of volumetric shells...")
+    started = time.perf_counter()
     
     # Get satellite positions with orbital parameters
     satellites_query = text("""
         SELECT 
             satellite_id,
             name,
-            longitude,
-            latitude, 
             altitude,
             inclination,
-            ST_X(position) as pos_lon,
-            ST_Y(position) as pos_lat,
-            ST_Z(position) as pos_alt
-        FROM dev.tle_snapshots 
+            raan
+        FROM dev.tle_latest  -- one current snapshot per satellite
         WHERE position IS NOT NULL 
+        AND raan IS NOT NULL  -- mean RAAN at the propagation epoch (calculate_positions.py)
         AND altitude BETWEEN 200 AND 2000  -- LEO range
-        LIMIT 100
     """)
     
     satellites = pd.read_sql(satellites_query, engine)
-    print(f"📡 Found {len(satellites)} LEO satellites to validate")
+    shells = load_shell_bins()
+    loaded = time.perf_counter()
+    print(f"📡 Found {len(satellites):,} LEO satellites and {len(shells):,} shells to validate against")
     
-    # Check each satellite against volumetric shells
-    matches = []
-    mismatches = []
+    result = shells.evaluate(satellites['altitude'].to_numpy(dtype=float),
+                             satellites['inclination'].to_numpy(dtype=float),
+                             satellites['raan'].to_numpy(dtype=float))
+    scored = time.perf_counter()
     
-    for _, sat in satellites.iterrows():
-        sat_alt = sat['altitude']
-        sat_inc = sat['inclination']
-        
-        # Calculate expected RAAN from longitude (simplified)
-        # In reality, RAAN calculation is more complex
-        sat_raan = sat['longitude'] % 360
-        if sat_raan < 0:
-            sat_raan += 360
-            
-        # Find matching volumetric shells using orbital parameters
-        shell_query = text("""
-            SELECT 
-                tract_id,
-                alt_min, alt_max,
-                inc_min, inc_max, 
-                raan_min, raan_max,
-                ST_AsText(geom) as geom_wkt
-            FROM dev.tract_volumetric_shells
-            WHERE :sat_alt BETWEEN alt_min AND alt_max
-            AND :sat_inc BETWEEN inc_min AND inc_max
-            AND (:sat_raan BETWEEN raan_min AND raan_max 
-                 OR (:sat_raan + 360) BETWEEN raan_min AND raan_max
-                 OR (:sat_raan - 360) BETWEEN raan_min AND raan_max)
-        """)
-        
-        matching_shells = pd.read_sql(shell_query, engine, params={
-            'sat_alt': sat_alt,
-            'sat_inc': sat_inc, 
-            'sat_raan': sat_raan
-        })
-        
-        if len(matching_shells) > 0:
-            matches.append({
-                'satellite_id': sat['satellite_id'],
-                'name': sat['name'],
-                'altitude': sat_alt,
-                'inclination': sat_inc,
-                'raan': sat_raan,
-                'matching_shells': len(matching_shells),
-                'shell_ids': matching_shells['tract_id'].tolist()[:3]  # First 3
-            })
-        else:
-            mismatches.append({
-                'satellite_id': sat['satellite_id'],
-                'name': sat['name'],
-                'altitude': sat_alt,
-                'inclination': sat_inc,
-                'raan': sat_raan
-            })
+    satellites['tract_id'] = result['tract_id']
+    matches = satellites[result['matched']]
+    mismatches = satellites[~result['matched']]
     
     print(f"\n✅ Spatial Accuracy Results:")
-    print(f"   Matches: {len(matches)} satellites")
-    print(f"   Mismatches: {len(mismatches)} satellites")
-    print(f"   Accuracy: {len(matches)/(len(matches)+len(mismatches))*100:.1f}%")
+    print(f"   Matches: {result['matches']:,} satellites")
+    print(f"   Mismatches: {result['mismatches']:,} satellites")
+    print(f"   Accuracy: {result['accuracy']:.1f}%")
+    
+    print(f"\n🧪 Boundary cases (matched satellites):")
+    for boundary_type, count in result['boundary_counts'].items():
+        percent = count / result['matches'] * 100 if result['matches'] else 0
+        print(f"   {boundary_type}: {count:,} satellites ({percent:.1f}%)")
+    
+    print(f"\n⏱️  Timing: load {loaded - started:.2f}s, score {scored - loaded:.3f}s "
+          f"({len(satellites) / max(scored - loaded, 1e-9):,.0f} satellites/s)")
     
     # Show sample matches
-    if matches:
+    if len(matches):
         print(f"\n📊 Sample Matches:")
-        for match in matches[:5]:
-            print(f"   {match['name']}: ALT={match['altitude']:.0f}km, INC={match['inclination']:.1f}°, RAAN={match['raan']:.1f}° → {match['matching_shells']} shells")
+        for _, match in matches.head(5).iterrows():
+            print(f"   {match['name']}: ALT={match['altitude']:.0f}km, INC={match['inclination']:.1f}°, RAAN={match['raan']:.1f}° → {match['tract_id']}")
     
     # Show mismatches for debugging
-    if mismatches:
+    if len(mismatches):
         print(f"\n⚠️  Sample Mismatches:")
-        for miss in mismatches[:5]:
+        for _, miss in mismatches.head(5).iterrows():
             print(f"   {miss['name']}: ALT={miss['altitude']:.0f}km, INC={miss['inclination']:.1f}°, RAAN={miss['raan']:.1f}°")
     
-    return len(matches), len(mismatches)
+    return result['matches'], result['mismatches']
 
 def check_shell_coverage():
     """Check volumetric shell parameter space coverage"""
@@ -164,7 +143,10 @@ def test_point_in_shell():
                 ) as contains_point
             FROM dev.tract_volumetric_shells v
             CROSS JOIN test_satellite t
-            WHERE t.altitude BETWEEN v.alt_min AND v.alt_max
+            -- Envelope test first so the shell bounds GiST index applies (schema.py)
+            WHERE ST_MakeEnvelope(v.alt_min, v.inc_min, v.alt_max, v.inc_max)
+                  && ST_MakePoint(t.altitude, t.inclination)
+            AND t.altitude BETWEEN v.alt_min AND v.alt_max
             AND t.inclination BETWEEN v.inc_min AND v.inc_max  
             AND t.raan BETWEEN v.raan_min AND v.raan_max
         )
@@ -1,8 +1,46 @@
 // Orbital Governance Demo JavaScript
+
+// Decode the binary feed served by /api/satellites/columnar.
+// Position columns are zero-copy Float32Array views over the response buffer.
+function decodeSatelliteFeed(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'OGSF' || view.getUint16(4, true) !== 1) {
+        throw new Error('Unsupported satellite feed format');
+    }
+    
+    const columnCount = view.getUint16(6, true);
+    const count = view.getUint32(8, true);
+    const dictionaryLength = view.getUint32(12, true);
+    const columnNames = ['latitude', 'longitude', 'altitude', 'inclination'];
+    
+    const feed = { count };
+    let offset = 16;
+    for (let k = 0; k < columnCount; k++) {
+        feed[columnNames[k]] = new Float32Array(buffer, offset, count);
+        offset += 4 * count;
+    }
+    
+    const dictionary = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, dictionaryLength)));
+    feed.satelliteIds = dictionary.satellite_id;
+    feed.names = dictionary.name;
+    return feed;
+}
+
+async function loadSatelliteFeed() {
+    const response = await fetch('/api/satellites/columnar');
+    if (!response.ok) {
+        throw new Error(`Satellite feed request failed (${response.status})`);
+    }
+    return decodeSatelliteFeed(await response.arrayBuffer());
+}
 class OrbitalDemo {
     constructor() {
         this.allSatellites = [];
         this.filteredSatellites = [];
+        this.satelliteIndex = new Map();
+        this.stream = null;
+        this.pollTimer = null;
         this.init();
     }
 
@@ -10,22 +48,83 @@ class OrbitalDemo {
         console.log('🚀 Initializing Extra-Orbital Solutions Demo');
         
         await this.loadStats();
-        await this.loadSatellites();
         this.setupEventListeners();
         this.setupTractSelection();
         
+        // Push updates when the browser supports them, polling otherwise
+        if (window.EventSource) {
+            this.connectStream();
+        } else {
+            await this.loadSatellites();
+            this.startPolling();
+        }
+        
         console.log('✅ Demo initialization complete');
         
+        // Update timestamp immediately
+        this.updateTimestamp();
+    }
+
+    connectStream() {
+        console.log('📡 Subscribing to live satellite updates...');
+        this.stream = new EventSource('/api/satellites/stream');
+        
+        this.stream.addEventListener('snapshot', (e) => {
+            const message = JSON.parse(e.data);
+            this.satelliteIndex = new Map();
+            this.mergeSatelliteRows(message.fields, message.satellites);
+            console.log(`📡 Snapshot v${message.version}: ${message.satellites.length} satellites`);
+            this.applySatellites();
+            this.updateTimestamp();
+        });
+        
+        this.stream.addEventListener('delta', (e) => {
+            const message = JSON.parse(e.data);
+            this.mergeSatelliteRows(message.fields, message.changed);
+            message.removed.forEach(id => this.satelliteIndex.delete(id));
+            console.log(`🔄 Delta v${message.version}: ${message.changed.length} moved, ${message.removed.length} removed`);
+            this.applySatellites();
+            this.loadStats();
+            this.updateTimestamp();
+        });
+        
+        this.stream.onerror = () => {
+            // EventSource retries on its own; it only gives up when the
+            // endpoint fails outright, and then we fall back to polling
+            if (this.stream.readyState === EventSource.CLOSED) {
+                console.warn('⚠️ Live updates unavailable, falling back to polling');
+                this.stream = null;
+                this.loadSatellites();
+                this.startPolling();
+            }
+        };
+    }
+
+    startPolling() {
+        if (this.pollTimer) {
+            return;
+        }
         // Refresh data every 30 seconds
-        setInterval(() => {
+        this.pollTimer = setInterval(() => {
             console.log('🔄 Auto-refreshing data...');
             this.loadStats();
             this.loadSatellites();
             this.updateTimestamp();
         }, 30000);
-        
-        // Update timestamp immediately
-        this.updateTimestamp();
+    }
+
+    mergeSatelliteRows(fields, rows) {
+        rows.forEach(row => {
+            const sat = {};
+            fields.forEach((field, k) => { sat[field] = row[k]; });
+            this.satelliteIndex.set(sat.satellite_id, sat);
+        });
+    }
+
+    applySatellites() {
+        const satellites = Array.from(this.satelliteIndex.values());
+        satellites.sort((a, b) => (a.name || '').localeCompare(b.name || ''));
+        this.showSatellites(satellites);
     }
 
     async loadStats() {
@@ -79,28 +178,18 @@ class OrbitalDemo {
     async loadSatellites() {
         try {
             console.log('🛰️ Loading satellite data...');
-            const response = await fetch('/api/satellites');
-            const satellites = await response.json();
+            const feed = await loadSatelliteFeed();
+            const satellites = feed.satelliteIds.map((id, i) => ({
+                satellite_id: id,
+                name: feed.names[i],
+                latitude: Math.round(feed.latitude[i] * 10) / 10,
+                longitude: Math.round(feed.longitude[i] * 10) / 10,
+                altitude: Math.round(feed.altitude[i] * 10) / 10,
+                inclination: Math.round(feed.inclination[i] * 10) / 10
+            }));
             
             console.log(`📡 Loaded ${satellites.length} satellites`);
-            this.allSatellites = satellites;
-            
-            if (satellites.length === 0) {
-                console.warn('⚠️ No satellite data available');
-                document.getElementById('satellite-list').innerHTML = '<div class="loading-container"><span>No satellite data available</span></div>';
-                return;
-            }
-            
-            // Preserve current search filter
-            const currentSearch = document.getElementById('satellite-search').value;
-            if (currentSearch.trim()) {
-                console.log('🔍 Preserving search filter:', currentSearch);
-                this.filterSatellites(currentSearch);
-            } else {
-                this.filteredSatellites = satellites;
-                this.updateSatelliteStats(satellites);
-                this.renderSatellites(this.filteredSatellites);
-            }
+            this.showSatellites(satellites);
         } catch (error) {
             console.error('❌ Error loading satellites:', error);
             document.getElementById('satellite-list').innerHTML = `
@@ -111,6 +200,27 @@ class OrbitalDemo {
         }
     }
 
+    showSatellites(satellites) {
+        this.allSatellites = satellites;
+        
+        if (satellites.length === 0) {
+            console.warn('⚠️ No satellite data available');
+            document.getElementById('satellite-list').innerHTML = '<div class="loading-container"><span>No satellite data available</span></div>';
+            return;
+        }
+        
+        // Preserve current search filter
+        const currentSearch = document.getElementById('satellite-search').value;
+        if (currentSearch.trim()) {
+            console.log('🔍 Preserving search filter:', currentSearch);
+            this.filterSatellites(currentSearch);
+        } else {
+            this.filteredSatellites = satellites;
+            this.updateSatelliteStats(satellites);
+            this.renderSatellites(this.filteredSatellites);
+        }
+    }
+
     updateTimestamp() {
         const now = new Date();
         const timeString = now.toLocaleTimeString();
@@ -21,9 +21,14 @@ else
     exit 1
 fi
 
+# Create indexes for the hot queries (recorded in dev.schema_migrations)
+echo "🗄️  Applying schema migrations..."
+python3 database/schema.py
+
 # Calculate satellite positions if needed
 echo "🛰️  Calculating satellite positions..."
 python3 database/calculate_positions.py
 
 echo "✅ Setup complete!"
 echo "🚀 Run './scripts/run_demo.sh' to start the demo server"
+echo "🔄 Run 'cd database && python3 scheduler.py' to keep TLEs and positions current"